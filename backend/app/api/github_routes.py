@@ -45,10 +45,9 @@ def user_stats(api_type, username):
 @github_bp.route("/<api_type>/user-contributions/<username>/<start>/<end>", methods=["GET"])
 def user_contributions(api_type, username, start, end):
     service = get_service_by_api_type(api_type)
-    start = str(datetime.strptime(start, r"%Y-%m-%dT%H:%M"))
-    start = '"' + "T".join(start.split()) + '"'
-    end = str(datetime.strptime(end, r"%Y-%m-%dT%H:%M"))
-    end = '"' + "T".join(end.split()) + '"'
+    # the times are sent as GraphQL variables and REST parameters, so they are not quoted
+    start = datetime.strptime(start, r"%Y-%m-%dT%H:%M").strftime(r"%Y-%m-%dT%H:%M:%SZ")
+    end = datetime.strptime(end, r"%Y-%m-%dT%H:%M").strftime(r"%Y-%m-%dT%H:%M:%SZ")
     return service.get_user_contributions(username, start, end)
 
 
@@ -12,7 +12,6 @@ from backend.app.services.github_query.github_graphql.authentication import (
 )
 
 from backend.app.services.github_query.queries.profiles.user_login import (
-    UserLoginViewer,
     UserLogin,
 )
 from backend.app.services.github_query.queries.comments.user_gist_comments import (
@@ -46,6 +45,21 @@ from backend.app.services.github_query.queries.contributions.user_pull_requests
 from backend.app.services.github_query.queries.contributions.user_repository_discussions import (
     UserRepositoryDiscussions,
 )
+from backend.app.services.github_query.utils.identity_cache import user_identities
+from backend.app.services.github_query.utils.client_registry import ClientRegistry
+
+
+def _create_client(token: str) -> Client:
+    return Client(
+        host="api.github.com",
+        is_enterprise=False,
+        authenticator=PersonalAccessTokenAuthenticator(token=token),
+    )
+
+
+# one client per access token, reused across requests, so that every user keeps its connection pool
+# and rate limit state
+graphql_clients = ClientRegistry(_create_client, max_size=256, idle_timeout=60 * 60)
 
 
 def get_current_user_login():
@@ -60,16 +74,11 @@ def get_current_user_login():
     if not token:
         return {"error": "User not authenticated"}
 
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
-        query = UserLoginViewer()
-        response = client.execute(query=query, substitutions={})
-        return response
+        # the login of a token does not change, so it is only queried once per token
+        return {"viewer": {"login": user_identities.viewer(client, token)}}
     except QueryFailedException as e:
         return {"error": str(e)}
 
@@ -88,11 +97,7 @@ def get_specific_user_login(username: str):
     token = session.get("access_token")
     if not token:
         return {"error": "User not authenticated"}
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserLogin()
@@ -116,11 +121,7 @@ def get_user_gist_comments(**kwargs):
     token = session.get("access_token")
     if not token:
         return {"error": "User not authenticated"}
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserGistComments()
@@ -153,11 +154,7 @@ def get_user_repository_discussion_comments(**kwargs):
     token = session.get("access_token")
     if not token:
         return {"error": "User not authenticated"}
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserRepositoryDiscussionComments()
@@ -190,11 +187,7 @@ def get_user_issue_comments(**kwargs):
     token = session.get("access_token")
     if not token:
         return {"error": "User not authenticated"}
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserIssueComments()
@@ -227,11 +220,7 @@ def get_user_commit_comments(**kwargs):
     token = session.get("access_token")
     if not token:
         return {"error": "User not authenticated"}
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserCommitComments()
@@ -286,11 +275,7 @@ def get_user_profile_stats(username: str):
     token = session.get("access_token")
     if not token:
         return {"error": "User not authenticated"}
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserProfileStats()
@@ -313,11 +298,7 @@ def get_user_contributions(username: str, start: str, end: str):
     token = session.get("access_token")
     if not token:
         return {"error": "User not authenticated"}
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserContributionsCollection()
@@ -347,11 +328,7 @@ def get_user_gists(username: str, pg_size: int = 10):
     if not token:
         return {"error": "User not authenticated"}
 
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserGists()
@@ -382,11 +359,7 @@ def get_user_issues(username: str, pg_size: int = 10):
     if not token:
         return {"error": "User not authenticated"}
 
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserIssues()
@@ -417,11 +390,7 @@ def get_user_repositories(username: str, pg_size: int = 10, is_fork: bool = Fals
     if not token:
         return {"error": "User not authenticated"}
 
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
     ownership_str = str(ownership).replace("'", '"')
     try:
         query = UserRepositories()
@@ -455,11 +424,7 @@ def get_user_pull_requests(username: str, pg_size: int = 10):
     if not token:
         return {"error": "User not authenticated"}
 
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserPullRequests()
@@ -490,11 +455,7 @@ def get_user_repository_discussions(username: str, pg_size: int = 10):
     if not token:
         return {"error": "User not authenticated"}
 
-    client = Client(
-        host="api.github.com",
-        is_enterprise=False,
-        authenticator=PersonalAccessTokenAuthenticator(token=token),
-    )
+    client = graphql_clients.get(token)
 
     try:
         query = UserRepositoryDiscussions()
@@ -0,0 +1,289 @@
+import asyncio
+from typing import Union, Optional, Dict, Any, List, AsyncGenerator
+import aiohttp
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from backend.app.services.github_query.github_graphql.authentication import (
+    Authenticator,
+)
+from backend.app.services.github_query.github_graphql.client import (
+    BaseClient,
+    QueryFailedException,
+)
+from backend.app.services.github_query.github_graphql.query import Query, PaginatedQuery, BatchedQuery, CompiledQuery
+from backend.app.services.github_query.github_graphql.rate_limit_tracker import RateLimitTracker
+from backend.app.services.github_query.github_graphql.response_cache import ResponseCache
+
+
+class AsyncClient(BaseClient):
+    """
+    AsyncClient is the asyncio counterpart of Client. It accepts the same Query and PaginatedQuery objects,
+    but sends them over a shared aiohttp session with a bounded number of requests in flight,
+    so independent queries can be awaited concurrently.
+    """
+
+    def __init__(
+        self,
+        protocol: str = "https",
+        host: str = "api.github.com",
+        is_enterprise: bool = False,
+        authenticator: Optional[Authenticator] = None,
+        max_concurrency: int = 8,
+        rate_limit_tracker: Optional[RateLimitTracker] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> None:
+        """
+        Initializes the client with the necessary configuration and authentication.
+
+        Args:
+            protocol (str): The protocol to use for connecting to the GitHub server (usually https).
+            host (str): The host address of the GitHub server.
+            is_enterprise (bool): Indicates whether the client is connecting to a GitHub Enterprise instance.
+            authenticator (Optional[Authenticator]): The authenticator instance for handling authentication.
+            max_concurrency (int): The maximum number of requests in flight at the same time.
+            rate_limit_tracker (Optional[RateLimitTracker]): Tracks the remaining rate limit from the responses.
+                                                             A new tracker is created when omitted.
+            response_cache (Optional[ResponseCache]): Persists the responses of queries whose cache_ttl allows it,
+                                                      so repeated runs do not spend rate limit on unchanged data.
+
+        Raises:
+            InvalidAuthenticationError: If no authenticator is provided or if the provided authenticator is invalid.
+        """
+        super().__init__(protocol, host, is_enterprise, authenticator, rate_limit_tracker=rate_limit_tracker,
+                         response_cache=response_cache)
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared session, creating it together with the concurrency semaphore on first use,
+        so that both are bound to the running event loop.
+
+        Returns:
+            aiohttp.ClientSession: The session used for every request of this client.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self._max_concurrency, limit_per_host=self._max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Closes the shared session and releases its pooled connections.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @staticmethod
+    def _to_response(status: int, headers: Dict[str, str], body: bytes, url: str) -> Response:
+        """
+        Wraps a finished aiohttp exchange in a requests Response, so that the responses of both clients
+        are handled the same way, and callers handling QueryFailedException can inspect them alike.
+
+        Returns:
+            Response: A response carrying the status code, headers and body of the request.
+        """
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = url
+        response.encoding = "utf-8"
+        return response
+
+    async def _send(
+        self, session: aiohttp.ClientSession, payload: Dict[str, Any], headers: Dict[str, str], timeout_seconds: int
+    ) -> Response:
+        """
+        Sends a single request over the given session.
+
+        Args:
+            session (aiohttp.ClientSession): The shared session.
+            payload (Dict[str, Any]): The JSON body of the request.
+            headers (Dict[str, str]): The headers of the request.
+            timeout_seconds (int): The number of seconds to wait for a response before timing out.
+
+        Returns:
+            Response: The server's response to the HTTP request.
+        """
+        async with session.post(
+            self._base_path(),
+            json=payload,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout_seconds),
+        ) as response:
+            body = await response.read()
+            return AsyncClient._to_response(response.status, dict(response.headers), body, str(response.url))
+
+    async def _post(self, payload: Dict[str, Any], headers: Dict[str, str], timeout_seconds: int) -> Response:
+        """
+        Sends a single request while holding a slot of the concurrency semaphore.
+
+        Args:
+            payload (Dict[str, Any]): The JSON body of the request.
+            headers (Dict[str, str]): The headers of the request.
+            timeout_seconds (int): The number of seconds to wait for a response before timing out.
+
+        Returns:
+            Response: The server's response to the HTTP request.
+        """
+        session = self._get_session()
+        async with self._semaphore:
+            return await self._send(session, payload, headers, timeout_seconds)
+
+    async def _retry_request(
+        self,
+        retry_attempts: int,
+        timeout_seconds: int,
+        query: Union[str, Query, CompiledQuery],
+        substitutions: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        """
+        Tries to send a request multiple times until it succeeds or the retry limit is reached.
+
+        Args:
+            retry_attempts (int): The number of times to retry the request before giving up.
+            timeout_seconds (int): The number of seconds to wait for a response before timing out.
+            query (Union[str, Query, CompiledQuery]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            headers (Optional[Dict[str, str]]): The headers to send. Generated from the authenticator when omitted.
+
+        Returns:
+            Response: The server's response to the HTTP request.
+
+        Raises:
+            asyncio.TimeoutError: If all retry attempts are exhausted and the request keeps timing out.
+        """
+        last_exception = None
+        response = None
+        if headers is None:
+            headers = self._generate_headers()
+        payload = AsyncClient._payload(query, substitutions)
+        for _ in range(retry_attempts):
+            try:
+                response = await self._post(payload, headers, timeout_seconds)
+                if self._accept_response(response, headers):
+                    return response
+            except asyncio.TimeoutError as e:
+                last_exception = e
+                print("Request timed out. Retrying...")
+        # If this point is reached, all retries have been exhausted
+        if not last_exception:
+            raise QueryFailedException(query=query, response=response)
+        raise asyncio.TimeoutError("All retry attempts exhausted.")
+
+    async def _check_rate_limit(
+        self, query: Union[str, Query], substitutions: Dict[str, Any], headers: Dict[str, str]
+    ) -> None:
+        """
+        Sends a dry-run request to get the exact cost of the upcoming query and waits for the
+        rate limit to reset if the remaining budget cannot afford it.
+
+        Args:
+            query (Union[str, Query]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            headers (Dict[str, str]): The headers the query will be sent with.
+        """
+        probe, probe_substitutions = AsyncClient._cost_probe(query, substitutions)
+        rate_limit = await self._retry_request(3, 10, probe, probe_substitutions, headers)
+        if self._must_wait_for_reset(rate_limit, headers):
+            await asyncio.to_thread(self._get_rate_limit_tracker(headers).wait_for_reset)
+
+    async def _execute(
+        self, query: Union[str, Query], substitutions: Dict[str, Any], allow_partial: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Executes a query with the given substitutions and handles response processing and error checking.
+
+        Args:
+            query (Union[str, Query]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            allow_partial (bool): Whether to return the data of a response that also reports errors,
+                                  as happens when some aliases of a batched query cannot be resolved.
+
+        Returns:
+            Dict[str, Any]: The parsed JSON response from the server.
+
+        Raises:
+            QueryFailedException: If the query execution fails or returns errors.
+        """
+        cache_key, ttl, data = self._cached(query, substitutions)
+        if data is not None:
+            return data
+
+        headers = self._generate_headers()
+        if self._get_rate_limit_tracker(headers).is_near_exhaustion():
+            await self._check_rate_limit(query, substitutions, headers)
+
+        response = await self._retry_request(3, 10, query, substitutions, headers)
+        return self._response_data(query, response, headers, allow_partial, cache_key, ttl)
+
+    async def _execute_batch(self, query: Query, batch: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Sends one batch of query instances as a single aliased request.
+
+        Args:
+            query (Query): The query to execute for every substitution.
+            batch (List[Dict[str, Any]]): The substitutions of the instances in the batch.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The data of each instance, or None where it could not be resolved.
+        """
+        batched_query = BatchedQuery([(query, substitutions) for substitutions in batch])
+        data = await self._execute(batched_query, batched_query.variables, allow_partial=True)
+        return batched_query.demultiplex(data)
+
+    async def execute_batch(
+        self,
+        query: Query,
+        substitutions: List[Dict[str, Any]],
+        max_batch_size: int = 50,
+        max_nodes: int = 500000,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Executes a non-paginated query once per substitution, merging the instances into as few
+        aliased requests as the batch size and node ceiling allow. The batches are sent concurrently.
+
+        Args:
+            query (Query): The query to execute for every substitution.
+            substitutions (List[Dict[str, Any]]): The substitutions of each instance.
+            max_batch_size (int): The maximum number of instances merged into one request.
+            max_nodes (int): The maximum estimated number of nodes requested by one request.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The data of each instance in the order of the substitutions,
+                                            or None where it could not be resolved.
+        """
+        batches = BatchedQuery.split(query, substitutions, max_batch_size, max_nodes)
+        results = await asyncio.gather(*[self._execute_batch(query, batch) for batch in batches])
+        return [result for batch_results in results for result in batch_results]
+
+    async def _execution_generator(
+        self, query: Union[Query, PaginatedQuery], substitutions: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Handles the iteration over paginated query results, yielding each page's data as it's fetched.
+
+        Args:
+            query (Union[Query, PaginatedQuery]): The paginated GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+
+        Returns:
+            AsyncGenerator[Dict[str, Any], None]: A generator yielding each page's data as a dictionary.
+        """
+        while query.paginator.has_next():
+            response = await self._execute(query, substitutions)
+            AsyncClient._update_paginator(query, substitutions, response)
+            yield response
@@ -1,4 +1,8 @@
-from typing import Dict
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional
+from backend.app.services.github_query.github_graphql.rate_limit_tracker import RateLimitTracker
 
 class Authenticator:
     """
@@ -17,6 +21,30 @@ class Authenticator:
         """
         raise NotImplementedError("Authenticator cannot be implemented")
 
+    def get_rate_limit_tracker(self, headers: Dict[str, str]) -> Optional[RateLimitTracker]:
+        """
+        Returns the rate limit tracker of the credential that produced the given headers.
+        Authenticators holding a single credential return None, and the client uses its own tracker.
+
+        Args:
+            headers (Dict[str, str]): The headers the request was sent with.
+
+        Returns:
+            Optional[RateLimitTracker]: The tracker to update from the response, or None.
+        """
+        return None
+
+    def credential_hash(self) -> str:
+        """
+        Returns a hash identifying the credentials of the authenticator. What a response holds can depend on
+        the credential it was requested with (e.g. private repositories), so cached responses are keyed by it.
+
+        Returns:
+            str: The hex digest of the authorization header.
+        """
+        header = json.dumps(self.get_authorization_header(), sort_keys=True)
+        return hashlib.sha256(header.encode()).hexdigest()
+
 
 class PersonalAccessTokenAuthenticator(Authenticator):
     """
@@ -43,3 +71,97 @@ class PersonalAccessTokenAuthenticator(Authenticator):
         return {
             "Authorization": f"token {self._token}"
         }
+
+
+class TokenPoolAuthenticator(Authenticator):
+    """
+    TokenPoolAuthenticator is a concrete implementation of the Authenticator class holding several
+    personal access tokens. Every request is signed with the token that has the most rate limit headroom,
+    so the client only has to wait for a reset once every token is exhausted.
+    """
+    def __init__(self, tokens: List[str], threshold: int = 100) -> None:
+        """
+        Initializes the authenticator with a pool of personal access tokens.
+
+        Args:
+            tokens (List[str]): The personal access tokens used for authentication.
+            threshold (int): The number of remaining points at or below which a token is considered exhausted.
+
+        Raises:
+            ValueError: If no token is provided.
+        """
+        if not tokens:
+            raise ValueError("At least one token needs to be specified")
+        self._tokens = list(tokens)
+        self._trackers = {token: RateLimitTracker(threshold=threshold) for token in self._tokens}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _header_value(token: str) -> str:
+        return f"token {token}"
+
+    @staticmethod
+    def _headroom(tracker: RateLimitTracker) -> float:
+        """
+        Returns the number of points a token can still spend, treating an unknown or reset budget as unlimited.
+        """
+        if tracker.remaining is None or tracker.seconds_until_reset() == 0:
+            return float("inf")
+        return tracker.remaining
+
+    def _select_token(self) -> str:
+        """
+        Picks the token with the most headroom. When every token is exhausted, picks the one
+        that resets first, so that waiting on it is as short as possible.
+
+        Returns:
+            str: The selected token.
+        """
+        available = [token for token in self._tokens if not self._trackers[token].is_near_exhaustion()]
+        if available:
+            return max(available, key=lambda token: TokenPoolAuthenticator._headroom(self._trackers[token]))
+        return min(self._tokens, key=lambda token: self._trackers[token].seconds_until_reset())
+
+    def credential_hash(self) -> str:
+        """
+        Returns a hash identifying the pool as a whole, as any of its tokens may sign a request.
+        Signing a header is avoided, as it would reserve rate limit budget.
+
+        Returns:
+            str: The hex digest of the sorted tokens of the pool.
+        """
+        return hashlib.sha256("\n".join(sorted(self._tokens)).encode()).hexdigest()
+
+    def get_authorization_header(self) -> Dict[str, str]:
+        """
+        Constructs and returns the authorization header using the token with the most headroom.
+        The selected token's known budget is reserved by one point until the response updates it,
+        so concurrent requests spread over the pool.
+
+        Returns:
+            dict: A dictionary representing the authorization header required for
+                  authentication with the GitHub API using a personal access token.
+        """
+        with self._lock:
+            token = self._select_token()
+            tracker = self._trackers[token]
+            if tracker.remaining is not None:
+                tracker.remaining -= 1
+        return {
+            "Authorization": TokenPoolAuthenticator._header_value(token)
+        }
+
+    def get_rate_limit_tracker(self, headers: Dict[str, str]) -> Optional[RateLimitTracker]:
+        """
+        Returns the rate limit tracker of the token that signed the given headers.
+
+        Args:
+            headers (Dict[str, str]): The headers the request was sent with.
+
+        Returns:
+            Optional[RateLimitTracker]: The tracker of the token, or None if the headers were not signed by the pool.
+        """
+        for token in self._tokens:
+            if headers.get("Authorization") == TokenPoolAuthenticator._header_value(token):
+                return self._trackers[token]
+        return None
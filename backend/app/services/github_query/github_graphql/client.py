@@ -1,16 +1,17 @@
 import re
-import time
-from datetime import datetime
 from random import randint
 from string import Template
-from typing import Union, Optional, Dict, Any, Generator
+from typing import Union, Optional, Dict, Any, List, Generator, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import Timeout, RequestException
 from requests import Response
 from backend.app.services.github_query.github_graphql.authentication import (
     Authenticator,
 )
-from backend.app.services.github_query.github_graphql.query import Query, PaginatedQuery
+from backend.app.services.github_query.github_graphql.query import Query, PaginatedQuery, BatchedQuery, CompiledQuery
+from backend.app.services.github_query.github_graphql.rate_limit_tracker import RateLimitTracker
+from backend.app.services.github_query.github_graphql.response_cache import ResponseCache
 from backend.app.services.github_query.queries.costs.query_cost import QueryCost
 
 
@@ -38,10 +39,11 @@ class QueryFailedException(Exception):
         super().__init__(message)
 
 
-class Client:
+class BaseClient:
     """
-    Client is a class that handles making GraphQL queries to a GitHub instance using the provided authentication.
-    It manages request construction, execution, and error handling, along with support for pagination.
+    BaseClient holds what Client and AsyncClient share: the configuration and authentication, the request
+    payloads, the response cache, the rate limit bookkeeping and the handling of responses and pages.
+    The subclasses only add the transport sending the requests.
     """
 
     def __init__(
@@ -50,6 +52,9 @@ class Client:
         host: str = "api.github.com",
         is_enterprise: bool = False,
         authenticator: Optional[Authenticator] = None,
+        keep_alive: bool = True,
+        rate_limit_tracker: Optional[RateLimitTracker] = None,
+        response_cache: Optional[ResponseCache] = None,
     ) -> None:
         """
         Initializes the client with the necessary configuration and authentication.
@@ -59,6 +64,11 @@ class Client:
             host (str): The host address of the GitHub server.
             is_enterprise (bool): Indicates whether the client is connecting to a GitHub Enterprise instance.
             authenticator (Optional[Authenticator]): The authenticator instance for handling authentication.
+            keep_alive (bool): Whether connections are reused between requests.
+            rate_limit_tracker (Optional[RateLimitTracker]): Tracks the remaining rate limit from the responses.
+                                                             A new tracker is created when omitted.
+            response_cache (Optional[ResponseCache]): Persists the responses of queries whose cache_ttl allows it,
+                                                      so repeated runs do not spend rate limit on unchanged data.
 
         Raises:
             InvalidAuthenticationError: If no authenticator is provided or if the provided authenticator is invalid.
@@ -71,6 +81,10 @@ class Client:
             raise InvalidAuthenticationError("Authentication needs to be specified")
         self._authenticator = authenticator
 
+        self._keep_alive = keep_alive
+        self._rate_limit_tracker = rate_limit_tracker if rate_limit_tracker is not None else RateLimitTracker()
+        self._response_cache = response_cache
+
     def _base_path(self) -> str:
         """
         Constructs the base URL path for the GitHub GraphQL API.
@@ -95,15 +109,297 @@ class Client:
             Dict[str, str]: A dictionary of headers for the request.
         """
         headers = self._authenticator.get_authorization_header()
+        if not self._keep_alive:
+            headers["Connection"] = "close"
         headers.update(kwargs)
         return headers
 
+    def _get_rate_limit_tracker(self, headers: Dict[str, str]) -> RateLimitTracker:
+        """
+        Returns the tracker of the credential that signed the given headers, falling back to the
+        client's own tracker for authenticators holding a single credential.
+
+        Args:
+            headers (Dict[str, str]): The headers the request is sent with.
+
+        Returns:
+            RateLimitTracker: The tracker to consult and update for the request.
+        """
+        tracker = self._authenticator.get_rate_limit_tracker(headers)
+        return tracker if tracker is not None else self._rate_limit_tracker
+
+    @staticmethod
+    def _payload(query: Union[str, Query, CompiledQuery], substitutions: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the JSON body of a request. Query objects are sent as their compiled document
+        with the substitutions as GraphQL variables; plain strings are substituted as templates.
+
+        Args:
+            query (Union[str, Query, CompiledQuery]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query.
+
+        Returns:
+            Dict[str, Any]: The request body.
+        """
+        if isinstance(query, str):
+            return {"query": Template(query).substitute(**substitutions)}
+        if isinstance(query, Query):
+            query = query.compile()
+        return query.payload(substitutions)
+
+    def _accept_response(self, response: Response, headers: Dict[str, str]) -> bool:
+        """
+        Tells whether a response ends the retries of a request. The rate limit reported by the headers of
+        a successful response is recorded for the credential that signed the request.
+
+        Args:
+            response (Response): The server's response to the HTTP request.
+            headers (Dict[str, str]): The headers the request was sent with.
+
+        Returns:
+            bool: Whether the request succeeded.
+        """
+        if response.status_code != 200:
+            return False
+        self._get_rate_limit_tracker(headers).update_from_headers(response.headers)
+        return True
+
+    @staticmethod
+    def _cost_probe(query: Union[str, Query], substitutions: Dict[str, Any]) -> Tuple[Union[Query, CompiledQuery],
+                                                                                      Dict[str, Any]]:
+        """
+        Builds the dry-run request getting the exact cost of a query without consuming the rate limit.
+
+        Args:
+            query (Union[str, Query]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+
+        Returns:
+            Tuple[Union[Query, CompiledQuery], Dict[str, Any]]: The dry-run query and its substitutions.
+        """
+        if isinstance(query, str):
+            match = re.search(r"query\s*{(?P<content>.+)}", Template(query).substitute(**substitutions))
+            return QueryCost(match.group("content")), {"dryrun": True}
+        # the dry run reuses the compiled document and variables of the query itself
+        return query.compile().cost_probe(), substitutions
+
+    def _must_wait_for_reset(self, response: Response, headers: Dict[str, str]) -> bool:
+        """
+        Records the rate limit reported by a dry run and tells whether the remaining budget cannot afford
+        the upcoming query, which then has to wait for the rate limit to reset.
+
+        Args:
+            response (Response): The response to the dry-run request.
+            headers (Dict[str, str]): The headers the query will be sent with.
+
+        Returns:
+            bool: Whether the query has to wait for the reset.
+        """
+        tracker = self._get_rate_limit_tracker(headers)
+        rate_limit = response.json()["data"]["rateLimit"]
+        tracker.update_from_rate_limit(rate_limit)
+        return not tracker.can_afford(rate_limit["cost"])
+
+    def _cached(self, query: Union[str, Query],
+                substitutions: Dict[str, Any]) -> Tuple[Optional[str], Optional[float], Optional[Dict[str, Any]]]:
+        """
+        Looks up the response of a query in the response cache.
+
+        Args:
+            query (Union[str, Query]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+
+        Returns:
+            Tuple[Optional[str], Optional[float], Optional[Dict[str, Any]]]: The cache key of the query, or None
+            if its response is not cached, the lifetime of its response and the cached data, if any.
+        """
+        ttl = 0
+        if self._response_cache is not None and isinstance(query, Query):
+            ttl = query.cache_ttl(substitutions)
+        if ttl == 0:
+            return None, ttl, None
+        cache_key = ResponseCache.key(BaseClient._payload(query, substitutions), self._base_path(),
+                                      self._authenticator.credential_hash())
+        return cache_key, ttl, self._response_cache.get(cache_key)
+
+    def _response_data(self, query: Union[str, Query], response: Response, headers: Dict[str, str],
+                       allow_partial: bool = False, cache_key: Optional[str] = None,
+                       ttl: Optional[float] = 0) -> Dict[str, Any]:
+        """
+        Extracts the data of a response, checking it for errors and caching it if the query allows it.
+
+        Args:
+            query (Union[str, Query]): The executed GraphQL query.
+            response (Response): The server's response to the HTTP request.
+            headers (Dict[str, str]): The headers the query was sent with.
+            allow_partial (bool): Whether to return the data of a response that also reports errors,
+                                  as happens when some aliases of a batched query cannot be resolved.
+            cache_key (Optional[str]): The cache key of the query, or None if its response is not cached.
+            ttl (Optional[float]): The lifetime of the cached response.
+
+        Returns:
+            Dict[str, Any]: The parsed JSON response from the server.
+
+        Raises:
+            QueryFailedException: If the query execution fails or returns errors.
+        """
+        try:
+            json_response = response.json()
+        except (RequestException, ValueError):
+            raise QueryFailedException(query=query, response=response)
+
+        if response.status_code == 200 and "errors" not in json_response:
+            if isinstance(json_response["data"], dict) and "rateLimit" in json_response["data"]:
+                self._get_rate_limit_tracker(headers).update_from_rate_limit(json_response["data"]["rateLimit"])
+            if cache_key is not None:
+                self._response_cache.set(cache_key, json_response["data"], ttl)
+            return json_response["data"]
+        elif allow_partial and response.status_code == 200 and json_response.get("data"):
+            return json_response["data"]
+        else:
+            raise QueryFailedException(query=query, response=response)
+
+    @staticmethod
+    def _update_paginator(query: PaginatedQuery, substitutions: Dict[str, Any], data: Dict[str, Any]) -> None:
+        """
+        Moves the paginator of a query past a page.
+
+        Args:
+            query (PaginatedQuery): The paginated GraphQL query.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            data (Dict[str, Any]): The data of the page.
+        """
+        curr_node = data
+        for field_name in query.path:
+            curr_node = curr_node[Template(field_name).substitute(**substitutions)]
+
+        end_cursor = curr_node["pageInfo"]["endCursor"]
+        has_next_page = curr_node["pageInfo"]["hasNextPage"]
+        query.paginator.update_paginator(has_next_page, end_cursor)
+
+    def execute(self, query: Union[str, Query, PaginatedQuery], substitutions: Dict[str, Any]) -> Any:
+        """
+        Public method to execute a non-paginated or paginated query.
+        A paginated query returns a generator of its pages, an async one for AsyncClient, and other
+        queries return their data, to be awaited for AsyncClient.
+
+        Args:
+            query (Union[str, Query, PaginatedQuery]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+
+        Returns:
+            Any: The parsed JSON response from the server, or a generator yielding each page of it.
+        """
+        if isinstance(query, PaginatedQuery):
+            return self._execution_generator(query, substitutions)
+
+        return self._execute(query, substitutions)
+
+
+class Client(BaseClient):
+    """
+    Client is a class that handles making GraphQL queries to a GitHub instance using the provided authentication.
+    It manages request construction, execution, and error handling, along with support for pagination.
+    """
+
+    def __init__(
+        self,
+        protocol: str = "https",
+        host: str = "api.github.com",
+        is_enterprise: bool = False,
+        authenticator: Optional[Authenticator] = None,
+        session: Optional[requests.Session] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        rate_limit_tracker: Optional[RateLimitTracker] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> None:
+        """
+        Initializes the client with the necessary configuration and authentication.
+
+        Args:
+            protocol (str): The protocol to use for connecting to the GitHub server (usually https).
+            host (str): The host address of the GitHub server.
+            is_enterprise (bool): Indicates whether the client is connecting to a GitHub Enterprise instance.
+            authenticator (Optional[Authenticator]): The authenticator instance for handling authentication.
+            session (Optional[requests.Session]): An existing session to share between clients. When omitted,
+                                                  the client creates and owns a pooled session.
+            pool_connections (int): The number of per-host connection pools to cache.
+            pool_maxsize (int): The maximum number of connections kept alive per host.
+            pool_block (bool): Whether to block when the per-host pool has no free connection
+                               instead of opening a throwaway one.
+            keep_alive (bool): Whether connections are reused between requests.
+            rate_limit_tracker (Optional[RateLimitTracker]): Tracks the remaining rate limit from the responses.
+                                                             A new tracker is created when omitted.
+            response_cache (Optional[ResponseCache]): Persists the responses of queries whose cache_ttl allows it,
+                                                      so repeated runs do not spend rate limit on unchanged data.
+
+        Raises:
+            InvalidAuthenticationError: If no authenticator is provided or if the provided authenticator is invalid.
+        """
+        super().__init__(protocol, host, is_enterprise, authenticator, keep_alive, rate_limit_tracker, response_cache)
+        self._owns_session = session is None
+        self._session = session if session is not None else Client._create_session(
+            pool_connections, pool_maxsize, pool_block
+        )
+
+    @staticmethod
+    def _create_session(pool_connections: int, pool_maxsize: int, pool_block: bool) -> requests.Session:
+        """
+        Creates a session whose connection pool is shared by every request the client sends,
+        so consecutive queries reuse the same TCP/TLS connection.
+
+        Args:
+            pool_connections (int): The number of per-host connection pools to cache.
+            pool_maxsize (int): The maximum number of connections kept alive per host.
+            pool_block (bool): Whether to block when the per-host pool has no free connection.
+
+        Returns:
+            requests.Session: A session with pooled adapters mounted for http and https.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Releases the pooled connections if the session is owned by this client.
+        Shared sessions passed in by the caller are left open.
+        """
+        if self._owns_session:
+            self._session.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _send(self, payload: Dict[str, Any], headers: Dict[str, str], timeout_seconds: int) -> Response:
+        """
+        Sends a single request over the pooled session.
+
+        Args:
+            payload (Dict[str, Any]): The JSON body of the request.
+            headers (Dict[str, str]): The headers of the request.
+            timeout_seconds (int): The number of seconds to wait for a response before timing out.
+
+        Returns:
+            Response: The server's response to the HTTP request.
+        """
+        return self._session.post(self._base_path(), json=payload, headers=headers, timeout=timeout_seconds)
+
     def _retry_request(
         self,
         retry_attempts: int,
         timeout_seconds: int,
-        query: Union[str, Query],
+        query: Union[str, Query, CompiledQuery],
         substitutions: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
     ) -> Response:
         """
         Tries to send a request multiple times until it succeeds or the retry limit is reached.
@@ -111,8 +407,9 @@ class Client:
         Args:
             retry_attempts (int): The number of times to retry the request before giving up.
             timeout_seconds (int): The number of seconds to wait for a response before timing out.
-            query (Union[str, Query]): The GraphQL query to execute.
+            query (Union[str, Query, CompiledQuery]): The GraphQL query to execute.
             substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            headers (Optional[Dict[str, str]]): The headers to send. Generated from the authenticator when omitted.
 
         Returns:
             Response: The server's response to the HTTP request.
@@ -122,21 +419,13 @@ class Client:
         """
         last_exception = None
         response = None
+        if headers is None:
+            headers = self._generate_headers()
+        payload = Client._payload(query, substitutions)
         for _ in range(retry_attempts):
             try:
-                response = requests.post(
-                    self._base_path(),
-                    json={
-                        "query": (
-                            Template(query).substitute(**substitutions)
-                            if isinstance(query, str)
-                            else query.substitute(**substitutions)
-                        )
-                    },
-                    headers=self._generate_headers(),
-                    timeout=timeout_seconds,
-                )
-                if response.status_code == 200:
+                response = self._send(payload, headers, timeout_seconds)
+                if self._accept_response(response, headers):
                     return response
             except Timeout as e:
                 last_exception = e
@@ -146,8 +435,26 @@ class Client:
             raise QueryFailedException(query=query, response=response)
         raise Timeout("All retry attempts exhausted.")
 
+    def _check_rate_limit(
+        self, query: Union[str, Query], substitutions: Dict[str, Any], headers: Dict[str, str]
+    ) -> None:
+        """
+        Sends a dry-run request to get the exact cost of the upcoming query and waits for the
+        rate limit to reset if the remaining budget cannot afford it.
+
+        Args:
+            query (Union[str, Query]): The GraphQL query to execute.
+            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            headers (Dict[str, str]): The headers the query will be sent with.
+        """
+        probe, probe_substitutions = Client._cost_probe(query, substitutions)
+        rate_limit = self._retry_request(3, 10, probe, probe_substitutions, headers)
+        # if the cost of the upcoming graphql query larger than avaliable ratelimit, wait till ratelimit reset
+        if self._must_wait_for_reset(rate_limit, headers):
+            self._get_rate_limit_tracker(headers).wait_for_reset()
+
     def _execute(
-        self, query: Union[str, Query], substitutions: Dict[str, Any]
+        self, query: Union[str, Query], substitutions: Dict[str, Any], allow_partial: bool = False
     ) -> Dict[str, Any]:
         """
         Executes a query with the given substitutions and handles response processing and error checking.
@@ -155,6 +462,8 @@ class Client:
         Args:
             query (Union[str, Query]): The GraphQL query to execute.
             substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            allow_partial (bool): Whether to return the data of a response that also reports errors,
+                                  as happens when some aliases of a batched query cannot be resolved.
 
         Returns:
             Dict[str, Any]: The parsed JSON response from the server.
@@ -162,62 +471,58 @@ class Client:
         Raises:
             QueryFailedException: If the query execution fails or returns errors.
         """
-        query_string = (
-            Template(query).substitute(**substitutions)
-            if isinstance(query, str)
-            else query.substitute(**substitutions)
-        )
-        match = re.search(r"query\s*{(?P<content>.+)}", query_string)
-        # pre-calculate the cost of the upcoming graphql query
-        rate_query = QueryCost(match.group("content"))
-        rate_limit = self._retry_request(3, 10, rate_query, {"dryrun": True})
-        #print(query_string, rate_query, rate_limit.json())
-        rate_limit = rate_limit.json()["data"]["rateLimit"]
-        cost, remaining, reset_at = (
-            rate_limit["cost"],
-            rate_limit["remaining"],
-            rate_limit["resetAt"],
-        )
-        # if the cost of the upcoming graphql query larger than avaliable ratelimit, wait till ratelimit reset
-        if cost > remaining - 5:
-            current_time = datetime.utcnow()
-            time_format = "%Y-%m-%dT%H:%M:%SZ"
-            reset_at = datetime.strptime(reset_at, time_format)
-            time_diff = reset_at - current_time
-            seconds = time_diff.total_seconds()
-            print(f"stop at {current_time}s.")
-            print(f"waiting for {seconds}s.")
-            print(f"reset at {reset_at}s.")
-            time.sleep(seconds + 5)
-
-        response = self._retry_request(3, 10, query, substitutions)
-        try:
-            json_response = response.json()
-        except RequestException:
-            raise QueryFailedException(query=query, response=response)
+        cache_key, ttl, data = self._cached(query, substitutions)
+        if data is not None:
+            return data
 
-        if response.status_code == 200 and "errors" not in json_response:
-            return json_response["data"]
-        else:
-            raise QueryFailedException(query=query, response=response)
+        headers = self._generate_headers()
+        # only pre-calculate the cost of the upcoming graphql query when the tracked budget is nearly used up
+        if self._get_rate_limit_tracker(headers).is_near_exhaustion():
+            self._check_rate_limit(query, substitutions, headers)
 
-    def execute(
-        self, query: Union[str, Query, PaginatedQuery], substitutions: Dict[str, Any]
-    ) -> Dict[str, Any]:
+        response = self._retry_request(3, 10, query, substitutions, headers)
+        return self._response_data(query, response, headers, allow_partial, cache_key, ttl)
+
+    def _execute_batch(self, query: Query, batch: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
         """
-        Public method to execute a non-paginated or paginated query.
+        Sends one batch of query instances as a single aliased request.
 
         Args:
-            query (Union[str, Query, PaginatedQuery]): The GraphQL query to execute.
-            substitutions (Dict[str, Any]): Substitutions to apply to the query template.
+            query (Query): The query to execute for every substitution.
+            batch (List[Dict[str, Any]]): The substitutions of the instances in the batch.
 
         Returns:
-            Dict[str, Any]: The parsed JSON response from the server.
+            List[Optional[Dict[str, Any]]]: The data of each instance, or None where it could not be resolved.
         """
-        if isinstance(query, PaginatedQuery):
-            return self._execution_generator(query, substitutions)
+        batched_query = BatchedQuery([(query, substitutions) for substitutions in batch])
+        data = self._execute(batched_query, batched_query.variables, allow_partial=True)
+        return batched_query.demultiplex(data)
 
-        return self._execute(query, substitutions)
+    def execute_batch(
+        self,
+        query: Query,
+        substitutions: List[Dict[str, Any]],
+        max_batch_size: int = 50,
+        max_nodes: int = 500000,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Executes a non-paginated query once per substitution, merging the instances into as few
+        aliased requests as the batch size and node ceiling allow.
+
+        Args:
+            query (Query): The query to execute for every substitution.
+            substitutions (List[Dict[str, Any]]): The substitutions of each instance.
+            max_batch_size (int): The maximum number of instances merged into one request.
+            max_nodes (int): The maximum estimated number of nodes requested by one request.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The data of each instance in the order of the substitutions,
+                                            or None where it could not be resolved.
+        """
+        results = []
+        for batch in BatchedQuery.split(query, substitutions, max_batch_size, max_nodes):
+            results.extend(self._execute_batch(query, batch))
+        return results
 
     def _execution_generator(
         self, query: Union[Query, PaginatedQuery], substitutions: Dict[str, Any]
@@ -234,12 +539,5 @@ class Client:
         """
         while query.paginator.has_next():
             response = self._execute(query, substitutions)
-            curr_node = response
-
-            for field_name in query.path:
-                curr_node = curr_node[Template(field_name).substitute(**substitutions)]
-
-            end_cursor = curr_node["pageInfo"]["endCursor"]
-            has_next_page = curr_node["pageInfo"]["hasNextPage"]
-            query.paginator.update_paginator(has_next_page, end_cursor)
+            Client._update_paginator(query, substitutions, response)
             yield response
@@ -1,3 +1,4 @@
+import re
 from string import Template
 from typing import Union, List, Dict, Tuple, Any, Optional
 from datetime import datetime
@@ -66,25 +67,33 @@ class QueryNode:
         if self.args is None:
             return ""
 
-        args_list = []
-        for key, value in self.args.items():
-            if key == "login":
-                args_list.append(f'{key}: "{value}"')
-            elif key == "owner":
-                args_list.append(f'{key}: "{value}"')
-            elif key == "name":
-                args_list.append(f'{key}: "{value}"')
-            elif isinstance(value, list):
-                args_list.append(f'{key}: [{", ".join(value)}]')
-            elif isinstance(value, dict):
-                args_list.append(f'{key}: ' + "{" + ", ".join(f"{key}: {v}" for key, v in value.items()) + "}")
-            elif isinstance(value, bool):
-                args_list.append(f'{key}: {str(value).lower()}')
-            else:
-                args_list.append(f'{key}: {value}')
+        args_list = [QueryNode._format_arg(key, value) for key, value in self.args.items()]
 
         return "(" + ", ".join(args_list) + ")"
 
+    @staticmethod
+    def _format_arg(key: str, value: Any) -> str:
+        """
+        Formats a single argument of a QueryNode into GraphQL query syntax.
+
+        Args:
+            key (str): The name of the argument.
+            value (Any): The value of the argument.
+
+        Returns:
+            str: The argument formatted as 'key: value'.
+        """
+        if key in ("login", "owner", "name"):
+            return f'{key}: "{value}"'
+        elif isinstance(value, list):
+            return f'{key}: [{", ".join(value)}]'
+        elif isinstance(value, dict):
+            return f'{key}: ' + "{" + ", ".join(f"{key}: {v}" for key, v in value.items()) + "}"
+        elif isinstance(value, bool):
+            return f'{key}: {str(value).lower()}'
+        else:
+            return f'{key}: {value}'
+
     def _format_fields(self) -> str:
         """
         Formats the fields of the QueryNode into a string suitable for inclusion in a GraphQL query. 
@@ -123,6 +132,81 @@ class QueryNode:
                self.args == other.args
 
 
+class CompiledQuery:
+    """
+    CompiledQuery is a Query serialized once into a GraphQL document whose placeholders are real GraphQL
+    variables (e.g. $user). Executing it only requires building the variables JSON of the call, so the query
+    tree is not walked and no query text is built per request.
+    """
+
+    def __init__(self, document: str, variable_types: Dict[str, str],
+                 paginator: Optional['QueryNodePaginator'] = None) -> None:
+        """
+        Initializes a CompiledQuery from its serialized document.
+
+        Args:
+            document (str): The GraphQL document, including its variable declarations.
+            variable_types (Dict[str, str]): The GraphQL type of every declared variable, keyed by variable name.
+            paginator (Optional[QueryNodePaginator]): The paginator whose cursor is sent as the $after variable.
+        """
+        self.document = document
+        self.variable_types = variable_types
+        self.paginator = paginator
+        self._cost_probe = None
+
+    def variables(self, substitutions: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the variables of a call from its substitutions.
+
+        Args:
+            substitutions (Dict[str, Any]): The values of the query placeholders.
+
+        Returns:
+            Dict[str, Any]: The value of every declared variable.
+
+        Raises:
+            KeyError: If a declared variable has no substitution.
+        """
+        variables = {}
+        for name in self.variable_types:
+            if name == "after" and self.paginator is not None:
+                variables[name] = self.paginator.end_cursor
+            else:
+                variables[name] = substitutions[name]
+        return variables
+
+    def payload(self, substitutions: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the JSON body of a GraphQL request.
+
+        Args:
+            substitutions (Dict[str, Any]): The values of the query placeholders.
+
+        Returns:
+            Dict[str, Any]: The request body, holding the document and its variables.
+        """
+        return {"query": self.document, "variables": self.variables(substitutions)}
+
+    def cost_probe(self) -> 'CompiledQuery':
+        """
+        Returns the dry-run counterpart of this query, which additionally selects the rateLimit cost
+        of the query without consuming the rate limit.
+
+        Returns:
+            CompiledQuery: The compiled dry-run query, sharing the variables of this query.
+        """
+        if self._cost_probe is None:
+            document = self.document[:self.document.rindex("}")] + "rateLimit(dryRun: true) { cost remaining resetAt } }"
+            self._cost_probe = CompiledQuery(document, self.variable_types, self.paginator)
+        return self._cost_probe
+
+    def __str__(self) -> str:
+        return self.document
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
 class Query(QueryNode):
     """
     Query is a subclass of QueryNode specifically designed to represent a complete, executable GraphQL query. 
@@ -191,6 +275,121 @@ class Query(QueryNode):
         converted_args = Query.convert_dict(kwargs)
         return Template(self.__str__()).substitute(**converted_args)
 
+    # GraphQL type of the variables bound to each argument, used when compiling a query
+    VARIABLE_TYPES = {
+        "login": "String!",
+        "owner": "String!",
+        "name": "String!",
+        "first": "Int",
+        "after": "String",
+        "isFork": "Boolean",
+        "ownerAffiliations": "[RepositoryAffiliation]",
+        "from": "DateTime",
+        "to": "DateTime",
+        "author": "CommitAuthor",
+        "since": "GitTimestamp",
+        "until": "GitTimestamp",
+        "dryRun": "Boolean",
+    }
+
+    # GraphQL type of arguments whose type depends on the field they belong to
+    FIELD_VARIABLE_TYPES = {
+        ("repositories", "orderBy"): "RepositoryOrder",
+    }
+
+    VARIABLE_PATTERN = re.compile(r"\$(\w+)")
+
+    def _variable_type(self, field_name: str, arg_name: str) -> str:
+        """
+        Looks up the GraphQL type of a variable bound to an argument.
+
+        Args:
+            field_name (str): The name of the field the argument belongs to, possibly aliased.
+            arg_name (str): The name of the argument.
+
+        Returns:
+            str: The GraphQL type of the variable.
+
+        Raises:
+            InvalidQueryException: If the type of the argument is unknown.
+        """
+        field_name = field_name.split(":")[-1].strip()
+        variable_type = self.FIELD_VARIABLE_TYPES.get((field_name, arg_name), self.VARIABLE_TYPES.get(arg_name))
+        if variable_type is None:
+            raise InvalidQueryException(f"Cannot infer the type of argument '{arg_name}' of '{field_name}'")
+        return variable_type
+
+    def _compile_node(self, node: QueryNode, variable_types: Dict[str, str], prefix: str = "") -> str:
+        """
+        Serializes a node of the query, binding its placeholder arguments to GraphQL variables.
+
+        Args:
+            node (QueryNode): The node to serialize.
+            variable_types (Dict[str, str]): The variables declared so far, updated in place.
+            prefix (str): Prepended to the variable names, so that several instances of a query
+                          can be merged into one document without their variables clashing.
+
+        Returns:
+            str: The node formatted for a GraphQL document.
+        """
+        args = dict(node.args or {})
+        if node is getattr(self, "paginator", None):
+            # the cursor is a variable too, so every page is sent with the same document
+            args["after"] = "$after"
+        args_list = []
+        for key, value in args.items():
+            match = Query.VARIABLE_PATTERN.fullmatch(value) if isinstance(value, str) else None
+            if match:
+                name = prefix + match.group(1)
+                variable_types.setdefault(name, self._variable_type(node.name, key))
+                args_list.append(f"{key}: ${name}")
+            else:
+                args_list.append(QueryNode._format_arg(key, value))
+        formatted_args = "(" + ", ".join(args_list) + ")" if args_list else ""
+        fields = " ".join(
+            self._compile_node(field, variable_types, prefix) if isinstance(field, QueryNode) else str(field)
+            for field in node.fields
+        )
+        return f"{node.name}{formatted_args} {{ {fields} }}"
+
+    # lifetime in seconds of cached responses that describe the present and may still change
+    SHORT_CACHE_TTL = 60 * 60
+
+    def cache_ttl(self, substitutions: Dict[str, Any]) -> Optional[float]:
+        """
+        Returns how long a response to this query may be kept in a response cache. Queries whose
+        responses cannot change anymore, such as windows that ended in the past, override this.
+
+        Args:
+            substitutions (Dict[str, Any]): The substitutions the query is executed with.
+
+        Returns:
+            Optional[float]: The lifetime of the response in seconds, 0 to not cache it or None to keep it forever.
+        """
+        return 0
+
+    def compile(self) -> CompiledQuery:
+        """
+        Serializes the query into a GraphQL document with real variables. The result is cached,
+        so the query tree is only walked once per query object, however many times it is executed.
+
+        Returns:
+            CompiledQuery: The compiled query.
+
+        Raises:
+            InvalidQueryException: If the type of a placeholder argument cannot be inferred.
+        """
+        compiled = getattr(self, "_compiled", None)
+        if compiled is None:
+            variable_types = {}
+            body = self._compile_node(self, variable_types)
+            declarations = ", ".join(f"${name}: {variable_type}" for name, variable_type in variable_types.items())
+            if declarations:
+                body = f"{self.name}({declarations})" + body[len(self.name):]
+            compiled = CompiledQuery(body, variable_types, getattr(self, "paginator", None))
+            self._compiled = compiled
+        return compiled
+
 
 class QueryNodePaginator(QueryNode):
     """
@@ -209,6 +408,7 @@ class QueryNodePaginator(QueryNode):
         """
         super().__init__(name=name, fields=fields, args=args)
         self.has_next_page = True
+        self.end_cursor = None
 
     def update_paginator(self, has_next_page: bool, end_cursor: Optional[str] = None) -> None:
         """
@@ -219,6 +419,7 @@ class QueryNodePaginator(QueryNode):
             end_cursor (str, optional): The cursor that should be used to fetch the next page. Defaults to None.
         """
         self.has_next_page = has_next_page
+        self.end_cursor = end_cursor
         if end_cursor is None:
             end_cursor = ""
         self.args.update({"after": '"'+end_cursor+'"'})
@@ -238,6 +439,7 @@ class QueryNodePaginator(QueryNode):
         """
         self.args.pop("after")
         self.has_next_page = None
+        self.end_cursor = None
 
     def __eq__(self, other: 'QueryNodePaginator') -> bool:
         """
@@ -302,3 +504,141 @@ class PaginatedQuery(Query):
                     else:
                         paths.append((current_path + [field.name], field, field.fields))
         raise InvalidQueryException("Paginator node not found")
+
+
+class BatchedQuery(Query):
+    """
+    BatchedQuery merges several instances of a non-paginated query into a single GraphQL document.
+    Every top-level field of every instance is sent under its own alias (e.g. q0_user, q1_user), with
+    its placeholders bound to variables prefixed the same way (e.g. $q0_user), and the response is split
+    back into one result per instance.
+    """
+
+    def __init__(self, queries: List[Tuple[Query, Dict[str, Any]]]) -> None:
+        """
+        Initializes a BatchedQuery from the queries to merge and their substitutions.
+
+        Args:
+            queries (List[Tuple[Query, Dict[str, Any]]]): The (query, substitutions) pairs to send together.
+
+        Raises:
+            InvalidQueryException: If a paginated query is batched, since its pagination state is per instance.
+            KeyError: If a placeholder of an instance has no substitution.
+        """
+        fields = []
+        self.aliases = []
+        self.variable_types = {}
+        self.variables = {}
+        for index, (query, substitutions) in enumerate(queries):
+            if isinstance(query, PaginatedQuery):
+                raise InvalidQueryException("Paginated queries cannot be batched")
+            prefix = f"q{index}_"
+            variable_types = {}
+            aliases = {}
+            for field in query.fields:
+                name = field.name if isinstance(field, QueryNode) else str(field)
+                alias = f"{prefix}{name}"
+                aliases[alias] = name
+                if isinstance(field, QueryNode):
+                    fields.append(f"{alias}: " + query._compile_node(field, variable_types, prefix))
+                else:
+                    fields.append(f"{alias}: {field}")
+            for variable in variable_types:
+                self.variables[variable] = substitutions[variable[len(prefix):]]
+            self.variable_types.update(variable_types)
+            self.aliases.append(aliases)
+        super().__init__(fields=fields)
+
+    def compile(self) -> CompiledQuery:
+        """
+        Serializes the merged instances into a single document declaring the variables of every instance.
+        The values of these variables are found in self.variables.
+
+        Returns:
+            CompiledQuery: The compiled query.
+        """
+        compiled = getattr(self, "_compiled", None)
+        if compiled is None:
+            declarations = ", ".join(f"${name}: {variable_type}"
+                                     for name, variable_type in self.variable_types.items())
+            body = str(self)
+            if declarations:
+                body = f"{self.name}({declarations})" + body[len(self.name):]
+            compiled = CompiledQuery(body, self.variable_types)
+            self._compiled = compiled
+        return compiled
+
+    def demultiplex(self, data: Optional[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Splits the data of a batched response back into one result per merged instance.
+
+        Args:
+            data (Optional[Dict[str, Any]]): The data of the batched response.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The data of each instance keyed by its original field names,
+                                            or None for instances the server could not resolve.
+        """
+        data = data or {}
+        results = []
+        for aliases in self.aliases:
+            result = {name: data.get(alias) for alias, name in aliases.items()}
+            results.append(None if any(value is None for value in result.values()) else result)
+        return results
+
+    @staticmethod
+    def estimate_nodes(query: Query, substitutions: Dict[str, Any]) -> int:
+        """
+        Estimates the number of nodes a query may return, following GitHub's node limit calculation:
+        every connection requested with 'first' multiplies the nodes of its children.
+
+        Args:
+            query (Query): The query to estimate.
+            substitutions (Dict[str, Any]): The substitutions the query will be sent with.
+
+        Returns:
+            int: The estimated number of nodes, at least 1.
+        """
+        def count(node: QueryNode, multiplier: int) -> int:
+            total = 0
+            for field in node.get_connected_nodes():
+                first = (field.args or {}).get("first")
+                if isinstance(first, str) and first.startswith("$"):
+                    first = substitutions.get(first[1:])
+                if isinstance(first, int):
+                    total += multiplier * first + count(field, multiplier * first)
+                else:
+                    total += count(field, multiplier)
+            return total
+
+        return max(count(query, 1), 1)
+
+    @staticmethod
+    def split(query: Query, substitutions: List[Dict[str, Any]], max_batch_size: int,
+              max_nodes: int) -> List[List[Dict[str, Any]]]:
+        """
+        Splits the substitutions of a query into batches that stay within the batch size and node ceiling.
+
+        Args:
+            query (Query): The query to execute for every substitution.
+            substitutions (List[Dict[str, Any]]): The substitutions of each instance.
+            max_batch_size (int): The maximum number of instances in one batch.
+            max_nodes (int): The maximum estimated number of nodes in one batch.
+
+        Returns:
+            List[List[Dict[str, Any]]]: The substitutions grouped into batches, in their original order.
+        """
+        batches = []
+        batch = []
+        nodes = 0
+        for instance in substitutions:
+            instance_nodes = BatchedQuery.estimate_nodes(query, instance)
+            if batch and (len(batch) >= max_batch_size or nodes + instance_nodes > max_nodes):
+                batches.append(batch)
+                batch = []
+                nodes = 0
+            batch.append(instance)
+            nodes += instance_nodes
+        if batch:
+            batches.append(batch)
+        return batches
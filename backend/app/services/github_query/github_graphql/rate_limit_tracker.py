@@ -0,0 +1,102 @@
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, Mapping
+
+
+class RateLimitTracker:
+    """
+    RateLimitTracker keeps the latest known rate limit state of a token (remaining points and reset time)
+    from the responses the client already receives, so that the budget only needs to be probed
+    or waited for when it is close to exhaustion.
+    """
+
+    time_format = "%Y-%m-%dT%H:%M:%SZ"
+
+    def __init__(self, threshold: int = 100, buffer_seconds: int = 5) -> None:
+        """
+        Initializes the tracker with an unknown rate limit state.
+
+        Args:
+            threshold (int): The number of remaining points at or below which the budget is considered near exhaustion.
+            buffer_seconds (int): Extra seconds to wait past the reset time before resuming.
+        """
+        self.threshold = threshold
+        self.buffer_seconds = buffer_seconds
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[datetime] = None
+        self.last_cost: Optional[int] = None
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Updates the state from the x-ratelimit-* headers GitHub attaches to every API response.
+
+        Args:
+            headers (Mapping[str, str]): The response headers.
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+        if "x-ratelimit-remaining" in headers:
+            self.remaining = int(headers["x-ratelimit-remaining"])
+        if "x-ratelimit-limit" in headers:
+            self.limit = int(headers["x-ratelimit-limit"])
+        if "x-ratelimit-reset" in headers:
+            self.reset_at = datetime.utcfromtimestamp(int(headers["x-ratelimit-reset"]))
+
+    def update_from_rate_limit(self, rate_limit: Dict[str, Any]) -> None:
+        """
+        Updates the state from a 'rateLimit' block returned in a GraphQL response body.
+
+        Args:
+            rate_limit (Dict[str, Any]): The rateLimit node with any of cost, limit, remaining and resetAt.
+        """
+        if "cost" in rate_limit:
+            self.last_cost = rate_limit["cost"]
+        if "limit" in rate_limit:
+            self.limit = rate_limit["limit"]
+        if "remaining" in rate_limit:
+            self.remaining = rate_limit["remaining"]
+        if "resetAt" in rate_limit:
+            self.reset_at = datetime.strptime(rate_limit["resetAt"], RateLimitTracker.time_format)
+
+    def seconds_until_reset(self) -> float:
+        """
+        Returns:
+            float: The number of seconds until the current window resets, 0 if unknown or already passed.
+        """
+        if self.reset_at is None:
+            return 0
+        return max((self.reset_at - datetime.utcnow()).total_seconds(), 0)
+
+    def is_near_exhaustion(self) -> bool:
+        """
+        Checks whether the last known budget is at or below the threshold in a window that has not reset yet.
+
+        Returns:
+            bool: True if the budget should be checked before the next request, False otherwise.
+        """
+        if self.remaining is None or self.remaining > self.threshold:
+            return False
+        return self.reset_at is None or self.seconds_until_reset() > 0
+
+    def can_afford(self, cost: int) -> bool:
+        """
+        Checks whether a query of the given cost fits in the remaining budget.
+
+        Args:
+            cost (int): The cost of the upcoming query.
+
+        Returns:
+            bool: True if the query can be sent without exceeding the rate limit.
+        """
+        return self.remaining is None or cost <= self.remaining - 5 or self.seconds_until_reset() == 0
+
+    def wait_for_reset(self) -> None:
+        """
+        Sleeps until the current rate limit window resets and forgets the exhausted budget.
+        """
+        seconds = self.seconds_until_reset()
+        print(f"stop at {datetime.utcnow()}s.")
+        print(f"waiting for {seconds}s.")
+        print(f"reset at {self.reset_at}s.")
+        time.sleep(seconds + self.buffer_seconds)
+        self.remaining = None
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """
+    ResponseCache persists the data of GraphQL responses in a SQLite database, keyed by a hash of the
+    normalized query document, its variables and the credentials it was sent with. Every entry carries its own expiry, so responses that
+    can no longer change (e.g. contributions of a window that ended in the past) are kept forever while
+    responses about the present expire quickly.
+    """
+
+    def __init__(self, path: str = "github_query_cache.sqlite3") -> None:
+        """
+        Opens the cache database, creating it if it does not exist yet.
+
+        Args:
+            path (str): The path of the SQLite database file, or ":memory:" for a cache that is not persisted.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL)"
+            )
+
+    @staticmethod
+    def key(payload: Dict[str, Any], namespace: str = "", credential: str = "") -> str:
+        """
+        Computes the cache key of a request. The whitespace of the document is normalized and the
+        variables are serialized with sorted keys, so equivalent requests share the same key.
+
+        Args:
+            payload (Dict[str, Any]): The JSON body of the request, holding the query and its variables.
+            namespace (str): Separates the entries of different GraphQL endpoints.
+            credential (str): Separates the entries of different credentials, e.g. the hash of a token,
+                              as the data a query returns depends on what the credential may see.
+
+        Returns:
+            str: The hex digest identifying the request.
+        """
+        normalized = {
+            "namespace": namespace,
+            "credential": credential,
+            "query": " ".join(payload["query"].split()),
+            "variables": payload.get("variables") or {},
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Looks up the data cached under a key. Expired entries are removed on access.
+
+        Args:
+            key (str): The cache key of the request.
+
+        Returns:
+            Optional[Any]: The cached data, or None if there is no live entry.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            data, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                with self._connection:
+                    self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+        return json.loads(data)
+
+    def set(self, key: str, data: Any, ttl: Optional[float]) -> None:
+        """
+        Stores the data of a response.
+
+        Args:
+            key (str): The cache key of the request.
+            data (Any): The data of the response.
+            ttl (Optional[float]): The number of seconds the entry stays valid, or None to keep it forever.
+        """
+        expires_at = None if ttl is None else time.time() + ttl
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, data, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(data), expires_at),
+            )
+
+    def purge_expired(self) -> None:
+        """
+        Removes every expired entry from the database.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._connection.close()
@@ -1,18 +1,26 @@
 from github import Github, Auth
 from flask import session
+from backend.app.services.github_query.utils.client_registry import ClientRegistry
+
+# number of connections each PyGithub client keeps alive, shared by the threads using it
+POOL_SIZE = 16
+
+
+def _create_github(token: str) -> Github:
+    # with a pool size, PyGithub sends the requests of every thread over one thread-safe connection pool
+    return Github(auth=Auth.Token(token), pool_size=POOL_SIZE)
 
 
 class RESTClient:
     """
-    A singleton class that creates a single instance of the PyGithub REST API client.
+    A class that provides the PyGithub REST API client of the access token in the session.
+    The clients are kept per token, so the requests of a user reuse its connections.
     """
 
-    _instance = None
-
-    def __new__(cls, *args, **kwargs):
-        if not cls._instance:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    _clients = ClientRegistry(_create_github, max_size=256, idle_timeout=60 * 60)
 
     def __init__(self):
-        self.github = Github(auth=Auth.Token(session.get("access_token")))
+        token = session.get("access_token")
+        if not token:
+            raise Exception({"error": "User not authenticated"})
+        self.github = RESTClient._clients.get(token)
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from requests import Response
+
+
+class ConditionalRequestCache:
+    """
+    ConditionalRequestCache keeps the validators (ETag, Last-Modified) and the body of REST responses per URL and
+    token, so that a repeated GET can be sent as a conditional request. GitHub answers an unchanged resource with
+    304 Not Modified, which does not count against the rate limit, and the cached body is served instead.
+    Entries live in an in-memory LRU, optionally backed by a SQLite database that survives restarts.
+    """
+
+    # response headers kept with the body, e.g. the Link header paginated endpoints are followed with
+    KEPT_HEADERS = ("ETag", "Last-Modified", "Link", "Content-Type")
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None) -> None:
+        """
+        Args:
+            max_entries (int): The number of entries kept in memory.
+            path (Optional[str]): The path of the SQLite database of the on-disk tier, or None to keep entries
+                                  in memory only.
+        """
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, headers TEXT NOT NULL, body BLOB NOT NULL)"
+                )
+
+    @staticmethod
+    def key(url: str, authorization: str) -> str:
+        """
+        Computes the cache key of a request. The token is part of the key, as the same URL returns
+        different data to different users, but it is only kept as a hash.
+
+        Args:
+            url (str): The requested URL.
+            authorization (str): The Authorization header of the request.
+
+        Returns:
+            str: The hex digest identifying the request.
+        """
+        return hashlib.sha256(f"{authorization}\n{url}".encode()).hexdigest()
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Looks up the cached response of a request, in memory first, then on disk.
+
+        Args:
+            key (str): The cache key of the request.
+
+        Returns:
+            Optional[Dict[str, Any]]: The kept headers and the body of the response, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            if self._connection is None:
+                return None
+            row = self._connection.execute("SELECT headers, body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = {"headers": json.loads(row[0]), "body": bytes(row[1])}
+            self._remember(key, entry)
+            return entry
+
+    def set(self, key: str, response: Response) -> None:
+        """
+        Stores a response that carries a validator. Responses without ETag or Last-Modified cannot be
+        revalidated and are not stored.
+
+        Args:
+            key (str): The cache key of the request.
+            response (Response): The 200 response.
+        """
+        headers = {name: response.headers[name] for name in self.KEPT_HEADERS if name in response.headers}
+        if "ETag" not in headers and "Last-Modified" not in headers:
+            return
+        entry = {"headers": headers, "body": response.content}
+        with self._lock:
+            self._remember(key, entry)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO responses (key, headers, body) VALUES (?, ?, ?)",
+                        (key, json.dumps(headers), entry["body"]),
+                    )
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Builds the headers turning a request into a conditional one.
+
+        Args:
+            entry (Dict[str, Any]): The cached response.
+
+        Returns:
+            Dict[str, str]: The If-None-Match and If-Modified-Since headers of the cached validators.
+        """
+        headers = {}
+        if "ETag" in entry["headers"]:
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if "Last-Modified" in entry["headers"]:
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    @staticmethod
+    def to_response(entry: Dict[str, Any], url: str) -> Response:
+        """
+        Rebuilds a 200 response from a cached one, for a request answered with 304 Not Modified.
+
+        Args:
+            entry (Dict[str, Any]): The cached response.
+            url (str): The requested URL.
+
+        Returns:
+            Response: A response with the cached headers and body.
+        """
+        response = Response()
+        response.status_code = 200
+        response.headers.update(entry["headers"])
+        response._content = entry["body"]
+        response.url = url
+        response.encoding = "utf-8"
+        return response
+
+    def close(self) -> None:
+        """
+        Closes the database of the on-disk tier.
+        """
+        if self._connection is not None:
+            self._connection.close()
@@ -0,0 +1,186 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Type
+import pandas as pd
+from backend.app.services.github_query.github_graphql.client import Client
+from backend.app.services.github_query.github_graphql.authentication import TokenPoolAuthenticator
+from backend.app.services.github_query.utils.row_buffer import RowBuffer
+from backend.app.services.github_query.utils.checkpoint_store import CheckpointStore
+
+
+def _merge_miner(target: Any, source: Dict[str, Any]) -> None:
+    """
+    Merge the results of a worker's miner into another miner.
+    Row buffers are merged, DataFrames are concatenated, lists are extended and dictionaries are updated.
+    Args:
+        target: miner receiving the results
+        source: results of the worker's miner, as returned by its results method
+    """
+    for name, value in source.items():
+        current = getattr(target, name, None)
+        if isinstance(value, RowBuffer) and isinstance(current, RowBuffer):
+            current.merge(value)
+        elif isinstance(value, pd.DataFrame):
+            frames = [frame for frame in (current, value) if frame is not None and not frame.empty]
+            if frames:
+                setattr(target, name, pd.concat(frames, ignore_index=True))
+        elif isinstance(value, list) and isinstance(current, list):
+            current.extend(value)
+        elif isinstance(value, dict) and isinstance(current, dict):
+            current.update(value)
+
+
+def _create_miner(miner_class: Type, client: Client, checkpoint: Optional[CheckpointStore]) -> Any:
+    if checkpoint is None:
+        return miner_class(client)
+    return miner_class(client, checkpoint=checkpoint)
+
+
+def _mine_in_process(miner_class: Type, tokens: List[str], client_kwargs: Dict[str, Any], entities: List[str],
+                     args: tuple, kwargs: Dict[str, Any], checkpoint_path: Optional[str] = None) -> tuple:
+    """
+    Mine a chunk of the cohort in a worker process, with its own client over the same tokens.
+    The process tracks the rate limit of every token on its own, from the headers of its responses.
+    Args:
+        miner_class: miner to run for every entity
+        tokens: personal access tokens of the pool
+        client_kwargs: additional arguments of the client
+        entities: logins or repository links of the chunk
+        args: additional positional arguments of the miner's run
+        kwargs: additional keyword arguments of the miner's run
+        checkpoint_path: checkpoint database of the run, opened by every process
+    Returns:
+        the results of the miner and the entities that failed
+    """
+    client = Client(authenticator=TokenPoolAuthenticator(tokens), **client_kwargs)
+    checkpoint = CheckpointStore(checkpoint_path) if checkpoint_path else None
+    try:
+        miner = _create_miner(miner_class, client, checkpoint)
+        failures = []
+        for entity in entities:
+            try:
+                miner.run(entity, *args, **kwargs)
+            except Exception:
+                failures.append(entity)
+        return miner.results(), failures
+    finally:
+        client.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+
+class CohortRunner:
+    """
+    Mines a cohort of logins or repository links with any of the miners, distributing the entities
+    over a pool of threads or processes. The miner has to expose its results through a results method.
+    Threads share one client and token pool. Processes cannot share them: every process has its own
+    token pool over the same tokens, which only learns about the other processes' spending from the
+    rate limit headers of its own responses, so the processes may together overdraw a token between two
+    of its responses.
+    """
+
+    def __init__(self, miner_class: Type, tokens: List[str], max_workers: int = 8, use_processes: bool = False,
+                 checkpoint_path: Optional[str] = None, **client_kwargs: Any):
+        """
+        Args:
+            miner_class: miner to run for every entity, e.g. UserMetricStatsMiner
+            tokens: personal access tokens shared by the workers
+            max_workers: number of threads or processes
+            use_processes: whether to mine in worker processes instead of threads, each with its own token pool
+            checkpoint_path: checkpoint database journaling the run, so that running the same cohort again
+                             after a crash resumes it. The miner has to accept a checkpoint.
+            client_kwargs: additional arguments of the client, e.g. response_cache. With processes,
+                           they are sent to every process and have to be picklable.
+        """
+        self._miner_class = miner_class
+        self._tokens = list(tokens)
+        self._max_workers = max_workers
+        self._use_processes = use_processes
+        self._checkpoint_path = checkpoint_path
+        self._client_kwargs = client_kwargs
+        # worker name -> entities whose mining failed in that worker
+        self.failures = {}
+
+    def _record_failures(self, worker: str, failures: List[str]) -> None:
+        if failures:
+            self.failures.setdefault(worker, []).extend(failures)
+
+    def _run_threads(self, client: Client, entities: List[str], args: tuple, kwargs: Dict[str, Any]) -> List[Any]:
+        """
+        Mine the cohort in a thread pool. Every thread keeps its own miner, so the DataFrames are never
+        written concurrently, while the client, its connection pool, the token pool and the connection to
+        the checkpoint database are shared.
+        """
+        checkpoint = CheckpointStore(self._checkpoint_path) if self._checkpoint_path else None
+        try:
+            return self._run_thread_pool(client, checkpoint, entities, args, kwargs)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    def _run_thread_pool(self, client: Client, checkpoint: Optional[CheckpointStore], entities: List[str],
+                         args: tuple, kwargs: Dict[str, Any]) -> List[Any]:
+        local = threading.local()
+        miners = []
+        lock = threading.Lock()
+
+        def work(entity: str) -> None:
+            if not hasattr(local, "miner"):
+                local.miner = _create_miner(self._miner_class, client, checkpoint)
+                with lock:
+                    miners.append((threading.current_thread().name, local.miner))
+            try:
+                local.miner.run(entity, *args, **kwargs)
+            except Exception:
+                with lock:
+                    self._record_failures(threading.current_thread().name, [entity])
+
+        with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="miner") as executor:
+            list(executor.map(work, entities))
+
+        results = []
+        for worker, miner in miners:
+            self._record_failures(worker, getattr(miner, "exceptions", []))
+            results.append(miner.results())
+        return results
+
+    def _run_processes(self, entities: List[str], args: tuple, kwargs: Dict[str, Any]) -> List[Any]:
+        """
+        Mine the cohort in a process pool, one chunk of entities per process. Every process opens its own
+        connection to the checkpoint database, whose writes wait for each other, see CheckpointStore.
+        """
+        chunks = [entities[index::self._max_workers] for index in range(self._max_workers)]
+        results = []
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = [executor.submit(_mine_in_process, self._miner_class, self._tokens, self._client_kwargs,
+                                       chunk, args, kwargs, self._checkpoint_path) for chunk in chunks if chunk]
+            for index, future in enumerate(futures):
+                result, failures = future.result()
+                self._record_failures(f"process-{index}", result.get("exceptions", []) + failures)
+                results.append(result)
+        return results
+
+    def run(self, entities: List[str], *args: Any, **kwargs: Any) -> Any:
+        """
+        Mine every entity of the cohort.
+        Args:
+            entities: logins or repository links
+            args: additional positional arguments of the miner's run, e.g. start and end
+            kwargs: additional keyword arguments of the miner's run
+        Returns:
+            a miner holding the merged results of every worker. Its client is closed once the cohort is mined.
+        """
+        self.failures = {}
+        client_kwargs = {"pool_maxsize": self._max_workers, **self._client_kwargs}
+        client = Client(authenticator=TokenPoolAuthenticator(self._tokens), **client_kwargs)
+        try:
+            merged = self._miner_class(client)
+            if self._use_processes:
+                results = self._run_processes(list(entities), args, kwargs)
+            else:
+                results = self._run_threads(client, list(entities), args, kwargs)
+        finally:
+            client.close()
+        for result in results:
+            _merge_miner(merged, result)
+        return merged
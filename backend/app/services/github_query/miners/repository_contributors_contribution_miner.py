@@ -1,10 +1,14 @@
 import pandas as pd
 import json
-import github_query.util.helper as helper
-from github_query.github_graphql.client import Client, QueryFailedException
-from github_query.queries.profile.user_login import UserLogin
-from github_query.queries.repositories.repository_contributors import RepositoryContributors
-from github_query.queries.repositories.repository_contributors_contribution import \
+import backend.app.services.github_query.utils.helper as helper
+from backend.app.services.github_query.utils.row_buffer import RowBuffer
+from backend.app.services.github_query.utils.checkpoint_store import CheckpointStore
+from backend.app.services.github_query.utils.identity_cache import UserIdentityCache, user_identities
+from backend.app.services.github_query.github_graphql.client import Client, QueryFailedException
+from backend.app.services.github_query.queries.repositories.history_slices import sliced_history
+from backend.app.services.github_query.queries.repositories.repository_commits import RepositoryCommits
+from backend.app.services.github_query.queries.repositories.repository_contributors import RepositoryContributors
+from backend.app.services.github_query.queries.repositories.repository_contributors_contribution import \
     RepositoryContributorsContribution
 
 
@@ -13,53 +17,270 @@ class RepositoryContributorsContributionMiner:
     Helps mining repository data.
     """
 
-    def __init__(self, client: Client):
+    # columns of the rows, named after the keys of the contributions computed by the queries
+    CUMULATED_COLUMNS = ['repo', 'login', 'total_commits', 'total_additions', 'total_deletions']
+    CUMULATED_DTYPES = {'total_commits': "Int64", 'total_additions': "Int64", 'total_deletions': "Int64"}
+    INDIVIDUAL_COLUMNS = ['repo', 'login', 'authoredDate', 'changedFiles', 'additions', 'deletions', 'message']
+    INDIVIDUAL_DTYPES = {'changedFiles': "Int64", 'additions': "Int64", 'deletions': "Int64"}
+
+    def __init__(self, client: Client, checkpoint: CheckpointStore = None, identities: UserIdentityCache = None):
+        """
+        Args:
+            client: client used to send the queries
+            checkpoint: journal of the run, to resume it after a crash
+            identities: cache of the contributor ids, shared by the miners of the process by default
+        """
         self._client = client
-        self.cumulated_contribution = pd.DataFrame(columns=['repo', 'login', 'commits', 'additions', 'deletions'])
-        self.individual_contribution = pd.DataFrame(columns=['repo', 'login', 'authoredDate', 'changedFiles',
-                                                             'additions', 'deletions', 'message'])
+        self._checkpoint = checkpoint
+        self._identities = identities if identities is not None else user_identities
+        self._cumulated_contribution = RowBuffer(RepositoryContributorsContributionMiner.CUMULATED_COLUMNS,
+                                                 RepositoryContributorsContributionMiner.CUMULATED_DTYPES)
+        self._individual_contribution = RowBuffer(RepositoryContributorsContributionMiner.INDIVIDUAL_COLUMNS,
+                                                  RepositoryContributorsContributionMiner.INDIVIDUAL_DTYPES)
 
-    def run(self, link: str):
+    @property
+    def cumulated_contribution(self) -> pd.DataFrame:
+        return self._cumulated_contribution.to_frame()
+
+    @property
+    def individual_contribution(self) -> pd.DataFrame:
+        return self._individual_contribution.to_frame()
+
+    def flush(self, cumulated_sink, individual_sink):
+        """
+        Write the mined rows to sinks, e.g. ParquetSinks built from the columns and dtypes of each kind of row,
+        and release them from memory.
+        Args:
+            cumulated_sink: result sink, or CSV file, of the cumulated contributions
+            individual_sink: result sink, or CSV file, of the individual commits
+        """
+        self._cumulated_contribution.flush(cumulated_sink)
+        self._individual_contribution.flush(individual_sink)
+
+    def results(self) -> dict:
+        """
+        The results of the miner, merged by CohortRunner and sent back by its worker processes.
+        Returns:
+            the result attributes of the miner, by name
+        """
+        return {"_cumulated_contribution": self._cumulated_contribution,
+                "_individual_contribution": self._individual_contribution}
+
+    def _save_progress(self, link: str, stream: str, state) -> None:
+        if self._checkpoint is not None:
+            self._checkpoint.save_progress(link, stream, state)
+
+    def _history(self, query_class, owner: str, repository: str, cursor: str, slices: list):
+        """
+        Page the default branch history, serially from a cursor, or as concurrent time slices.
+        Args:
+            query_class: RepositoryCommits or RepositoryContributors
+            owner: owner of the repository
+            repository: name of the repository
+            cursor: cursor to resume the serial history from
+            slices: (since, until) bounds of the slices, as returned by time_slices, or None to page serially
+        Returns:
+            the paginated query, or None for time slices, and a generator of the pages
+        """
+        substitutions = {"owner": owner, "repo_name": repository, "pg_size": 100}
+        if slices:
+            return None, sliced_history(self._client, query_class, substitutions, slices)
+        query = query_class()
+        if cursor:
+            query.paginator.update_paginator(True, cursor)
+        return query, self._client.execute(query=query, substitutions=substitutions)
+
+    def _contributors(self, link: str, owner: str, repository: str, state: dict, slices: list = None) -> list:
+        """
+        Collect the logins of the authors of the default branch, checkpointing the cursor after every page.
+        Time slices have no single cursor, so a sliced pass is only checkpointed once it is done.
+        Args:
+            link: Link to the repository
+            owner: owner of the repository
+            repository: name of the repository
+            state: checkpointed state of the pass, if any
+            slices: time slices of the history to fetch concurrently, if any
+        Returns:
+            the sorted logins of the authors
+        """
+        contributors = {'name': set(), 'login': set(state['logins'])} if state else None
+        if state and state['done']:
+            return state['logins']
+        query, pages = self._history(RepositoryContributors, owner, repository, state and state['cursor'], slices)
+        for response in pages:
+            contributors = RepositoryContributors.extract_unique_author(response, contributors)
+            if query is not None:
+                self._save_progress(link, "contributors", {"cursor": query.paginator.end_cursor,
+                                                           "logins": sorted(contributors['login']), "done": False})
+        logins = sorted(contributors['login']) if contributors else []
+        self._save_progress(link, "contributors", {"cursor": None, "logins": logins, "done": True})
+        return logins
+
+    def _contribution(self, link: str, owner: str, repository: str, user_id: str, stream: str,
+                      state: dict) -> tuple:
+        """
+        Collect the commits of a contributor, checkpointing the cursor and the commits after every page.
+        Args:
+            link: Link to the repository
+            owner: owner of the repository
+            repository: name of the repository
+            user_id: GitHub id of the contributor
+            stream: name of the contributor's checkpointed stream
+            state: checkpointed state of the contributor, if any
+        Returns:
+            the cumulated contribution and the individual commits of the contributor
+        """
+        cumulated_contribution = state['cumulated'] if state else None
+        individual_contribution = state['individual'] if state else None
+        if state and state['done']:
+            return cumulated_contribution, individual_contribution
+        query = RepositoryContributorsContribution()
+        if state and state['cursor']:
+            query.paginator.update_paginator(True, state['cursor'])
+        for response in self._client.execute(query=query,
+                                             substitutions={"owner": owner,
+                                                            "repo_name": repository,
+                                                            "id": {"id": user_id},
+                                                            "pg_size": 100}):
+            cumulated_contribution = RepositoryContributorsContribution.user_cumulated_contribution(
+                response, cumulated_contribution)
+            individual_contribution = RepositoryContributorsContribution.user_commit_contribution(
+                response, individual_contribution)
+            self._save_progress(link, stream, {"cursor": query.paginator.end_cursor, "done": False,
+                                               "cumulated": cumulated_contribution,
+                                               "individual": individual_contribution})
+        self._save_progress(link, stream, {"cursor": None, "done": True, "cumulated": cumulated_contribution,
+                                           "individual": individual_contribution})
+        return cumulated_contribution, individual_contribution
+
+    @staticmethod
+    def _merge_contributions(contributions: dict, page_contributions: dict) -> None:
+        for login, page_contribution in page_contributions.items():
+            contribution = contributions.setdefault(login, {
+                'cumulated': {'total_additions': 0, 'total_deletions': 0, 'total_commits': 0},
+                'individual': []
+            })
+            for key, value in page_contribution['cumulated'].items():
+                contribution['cumulated'][key] += value
+            contribution['individual'].extend(page_contribution['individual'])
+
+    def _single_pass(self, link: str, owner: str, repository: str, progress: dict, slices: list = None) -> dict:
+        """
+        Collect the contributions of every author from a single pass over the history.
+        The contributions of each page are checkpointed on their own, so checkpoints grow linearly with the history.
+        Time slices have no single cursor, so an interrupted sliced pass starts over.
+        Args:
+            link: Link to the repository
+            owner: owner of the repository
+            repository: name of the repository
+            progress: checkpointed progress of the repository
+            slices: time slices of the history to fetch concurrently, if any
+        Returns:
+            the cumulated contribution and the individual commits of each login
+        """
+        state = progress.get("history", {"cursor": None, "pages": 0, "done": False})
+        contributions = {}
+        for page in range(state["pages"]):
+            RepositoryContributorsContributionMiner._merge_contributions(contributions,
+                                                                         progress[f"history:{page:06d}"])
+        if state["done"]:
+            return contributions
+
+        query, responses = self._history(RepositoryCommits, owner, repository, state["cursor"], slices)
+        pages = state["pages"]
+        for response in responses:
+            page_contributions = RepositoryCommits.contributions_by_login(response)
+            RepositoryContributorsContributionMiner._merge_contributions(contributions, page_contributions)
+            # the page is saved before the cursor moves past it, so a crash in between only fetches it again
+            self._save_progress(link, f"history:{pages:06d}", page_contributions)
+            pages += 1
+            if query is not None:
+                self._save_progress(link, "history", {"cursor": query.paginator.end_cursor, "pages": pages,
+                                                      "done": False})
+        self._save_progress(link, "history", {"cursor": None, "pages": pages, "done": True})
+        return contributions
+
+    def _contributions_per_author(self, link: str, owner: str, repository: str, logins: list, progress: dict) -> list:
+        """
+        Collect the contributions of every author with one history pass per author.
+        Args:
+            link: Link to the repository
+            owner: owner of the repository
+            repository: name of the repository
+            logins: logins of the authors
+            progress: checkpointed progress of the repository
+        Returns:
+            the login, cumulated contribution and individual commits of each author
+        """
+        if "ids" in progress:
+            contributors_ids = progress["ids"]
+        else:
+            # only the ids missing from the cache are resolved, with as few aliased requests as possible
+            users = self._identities.resolve(self._client, logins)
+            contributors_ids = [(users[login]['login'], users[login]['id']) for login in logins if users[login]]
+            self._save_progress(link, "ids", contributors_ids)
+
+        contributions = []
+        for login, user_id in contributors_ids:
+            print(f"querying user: {login}")
+            stream = f"contributor:{login}"
+            cumulated_contribution, individual_contribution = self._contribution(
+                link, owner, repository, user_id, stream, progress.get(stream))
+            contributions.append((login, cumulated_contribution, individual_contribution))
+        return contributions
+
+    def run(self, link: str, single_pass: bool = False, history_slices: list = None):
         """
         Collect data for a repository using a link.
+        With a checkpoint, a repository completed by a previous attempt is not mined again, and an
+        interrupted repository resumes from the last checkpointed page of its contributor pass and of
+        each contributor.
         Args:
             link: Link to the repository
+            single_pass: whether to compute the contributions of every author from a single pass over the
+                         history, instead of finding the authors first and paging the history of each author
+            history_slices: (since, until) bounds, as returned by time_slices, to fetch the history pass
+                            concurrently in time slices, e.g. for monorepos
         """
+        completed = self._checkpoint.completed(link) if self._checkpoint is not None else None
+        if completed is not None:
+            self._cumulated_contribution.extend(completed['cumulated'])
+            self._individual_contribution.extend(completed['individual'])
+            return
+
+        progress = self._checkpoint.progress(link) if self._checkpoint is not None else {}
         try:
             owner, repository = helper.get_owner_and_name(link)
-            response = self._client.execute(query=RepositoryContributors(),
-                                            substitutions={"owner": owner, "repo_name": repository})
+            if single_pass:
+                history = self._single_pass(link, owner, repository, progress, history_slices)
+                contributions = [(login, history[login]['cumulated'], history[login]['individual'])
+                                 for login in sorted(history)]
+            else:
+                logins = self._contributors(link, owner, repository, progress.get("contributors"), history_slices)
         except QueryFailedException as e:
             message = e.response.json()['errors'][0]['message']
             print(message)
-            dne = pd.DataFrame(
-                [{'repo': message, 'login': pd.NA, 'commits': pd.NA, 'additions': pd.NA, 'deletions': pd.NA}])
-            self.cumulated_contribution = pd.concat([self.cumulated_contribution, dne], ignore_index=True)
+            self._cumulated_contribution.append({'repo': message})
             return
 
-        contributors = RepositoryContributors.extract_unique_author(response)
-        contributors_ids = []
-        for contributor in contributors:
-            user = self._client.execute(query=UserLogin(), substitutions={"user": contributor})['user']
-            contributors_ids.append((user['login'], user['id']))
-
-        for login, user_id in contributors_ids:
-            print(f"querying user: {login}")
-            response = self._client.execute(query=RepositoryContributorsContribution(),
-                                            substitutions={"owner": owner,
-                                                           "repo_name": repository,
-                                                           "id": {"id": user_id}})
+        if not single_pass:
+            contributions = self._contributions_per_author(link, owner, repository, logins, progress)
 
+        # the rows of the repository are only added once every contributor is mined, so that a resumed
+        # attempt does not add the rows of the contributors it restores twice
+        cumulated_rows = []
+        individual_rows = []
+        for login, cumulated_contribution, individual_contribution in contributions:
             repo_login_cum = {"repo": repository, "login": login}
-            cumulated_contribution = RepositoryContributorsContribution.user_cumulated_contribution(response)
             repo_login_cum.update(cumulated_contribution)
-            new_row_cum = pd.DataFrame([repo_login_cum])
-            self.cumulated_contribution = pd.concat([self.cumulated_contribution, new_row_cum], ignore_index=True)
+            cumulated_rows.append(repo_login_cum)
 
-            individual_contribution = RepositoryContributorsContribution.user_commit_contribution(response)
-            for i, v in enumerate(individual_contribution):
+            for commit in individual_contribution:
                 repo_login_ind = {"repo": repository, "login": login}
-                repo_login_ind.update(v)
-                individual_contribution[i] = repo_login_ind
-            new_rows_ind = pd.DataFrame(individual_contribution)
-            self.individual_contribution = pd.concat([self.individual_contribution, new_rows_ind], ignore_index=True)
+                repo_login_ind.update(commit)
+                individual_rows.append(repo_login_ind)
+
+        self._cumulated_contribution.extend(cumulated_rows)
+        self._individual_contribution.extend(individual_rows)
+        if self._checkpoint is not None:
+            self._checkpoint.complete(link, {"cumulated": cumulated_rows, "individual": individual_rows})
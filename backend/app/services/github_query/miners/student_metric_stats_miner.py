@@ -1,18 +1,22 @@
+import asyncio
+import copy
 from datetime import datetime
 import pandas as pd
-from collections import Counter
-import github_query.util.helper as helper
-from github_query.github_graphql.client import Client, QueryFailedException
-from github_query.queries.profile.user_login import UserLogin
-from github_query.queries.contributions.user_gists import UserGists
-from github_query.queries.contributions.user_repositories import UserRepositories
-from github_query.queries.contributions.user_repository_discussions import UserRepositoryDiscussions
-from github_query.queries.time_range_contributions.user_contributions_collection import \
-    UserContributionsCollection
-from github_query.queries.comments.user_gist_comments import UserGistComments
-from github_query.queries.comments.user_issue_comments import UserIssueComments
-from github_query.queries.comments.user_commit_comments import UserCommitComments
-from github_query.queries.comments.user_repository_discussion_comments import UserRepositoryDiscussionComments
+import backend.app.services.github_query.utils.helper as helper
+from backend.app.services.github_query.github_graphql.client import Client, QueryFailedException
+from backend.app.services.github_query.queries.contributions.user_gists import UserGists
+from backend.app.services.github_query.queries.contributions.user_repositories import UserRepositories, \
+    UserAffiliatedRepositories
+from backend.app.services.github_query.queries.contributions.user_repository_discussions import UserRepositoryDiscussions
+from backend.app.services.github_query.queries.time_range_contributions.user_contributions_collection import \
+    UserContributionsCollectionMultiWindow
+from backend.app.services.github_query.queries.comments.user_gist_comments import UserGistComments
+from backend.app.services.github_query.queries.comments.user_issue_comments import UserIssueComments
+from backend.app.services.github_query.queries.comments.user_commit_comments import UserCommitComments
+from backend.app.services.github_query.queries.comments.user_repository_discussion_comments import UserRepositoryDiscussionComments
+from backend.app.services.github_query.utils.row_buffer import RowBuffer
+from backend.app.services.github_query.utils.checkpoint_store import CheckpointStore
+from backend.app.services.github_query.utils.identity_cache import UserIdentityCache, user_identities
 
 
 class UserMetricStatsMiner:
@@ -20,228 +24,496 @@ class UserMetricStatsMiner:
     Helps mining repository data.
     """
 
-    def __init__(self, client: Client):
+    # (column, query, extractor) of the paginated streams counted up to the end time
+    CREATED_BEFORE_STREAMS = [
+        ("gists", UserGists, UserGists.user_gists),
+        ("repository_discussions", UserRepositoryDiscussions, UserRepositoryDiscussions.user_repository_discussions),
+        ("commit_comments", UserCommitComments, UserCommitComments.user_commit_comments),
+        ("issue_comments", UserIssueComments, UserIssueComments.user_issue_comments),
+        ("gist_comments", UserGistComments, UserGistComments.user_gist_comments),
+        ("repository_discussion_comments", UserRepositoryDiscussionComments,
+         UserRepositoryDiscussionComments.user_repository_discussion_comments),
+    ]
+
+    REPOSITORY_TYPES = ["A", "B", "C", "D"]
+
+    EMPTY_REPOSITORY_STATS = {"total_count": 0, "fork_count": 0, "stargazer_count": 0, "watchers_count": 0,
+                              "total_size": 0}
+
+    COLUMNS = ['github', 'created_at', 'end_at', 'lifetime', 'res_con',
+               'commit', 'issue', 'pr', 'pr_review', 'repository', 'gists',
+               'repository_discussions',
+               'commit_comments', 'issue_comments',
+               'gist_comments', 'repository_discussion_comments',
+               'Atotal_count', 'Afork_count', 'Astargazer_count',
+               'Awatchers_count', 'Atotal_size', 'type_A_lang',
+               'Btotal_count', 'Bfork_count', 'Bstargazer_count',
+               'Bwatchers_count', 'Btotal_size', 'type_B_lang',
+               'Ctotal_count', 'Cfork_count', 'Cstargazer_count',
+               'Cwatchers_count', 'Ctotal_size', 'type_C_lang',
+               'Dtotal_count', 'Dfork_count', 'Dstargazer_count',
+               'Dwatchers_count', 'Dtotal_size', 'type_D_lang']
+
+    # {language: size} of the repositories of each type
+    MAP_COLUMNS = ['type_A_lang', 'type_B_lang', 'type_C_lang', 'type_D_lang']
+
+    # counts are kept as nullable integers, so rows of users that could not be mined hold pd.NA
+    DTYPES = {column: "Int64" for column in COLUMNS
+              if column not in ('github', 'created_at', 'end_at') and not column.endswith('_lang')}
+
+    def __init__(self, client: Client, checkpoint: CheckpointStore = None, identities: UserIdentityCache = None):
+        """
+        Args:
+            client: client used to send the queries
+            checkpoint: journal of the run, to resume it after a crash
+            identities: cache of the account creation times, shared by the miners of the process by default
+        """
         self._client = client
+        self._checkpoint = checkpoint
+        self._identities = identities if identities is not None else user_identities
         self.exceptions = []
-        self.total_contributions = pd.DataFrame(columns=['github', 'created_at', 'end_at', 'lifetime', 'res_con',
-                                                         'commit', 'issue', 'pr', 'pr_review', 'repository', 'gists',
-                                                         'repository_discussions',
-                                                         'commit_comments', 'issue_comments',
-                                                         'gist_comments', 'repository_discussion_comments',
-                                                         'Atotal_count', 'Afork_count', 'Astargazer_count',
-                                                         'Awatchers_count', 'Atotal_size', 'type_A_lang',
-                                                         'Btotal_count', 'Bfork_count', 'Bstargazer_count',
-                                                         'Bwatchers_count', 'Btotal_size', 'type_B_lang',
-                                                         'Ctotal_count', 'Cfork_count', 'Cstargazer_count',
-                                                         'Cwatchers_count', 'Ctotal_size', 'type_C_lang',
-                                                         'Dtotal_count', 'Dfork_count', 'Dstargazer_count',
-                                                         'Dwatchers_count', 'Dtotal_size', 'type_D_lang'])
+        # login -> {"end_at": end time of the last run, "cursors": {stream: cursor of the last fully counted page},
+        #           "counts": {stream: count up to that cursor}, "type_stats": repository stats up to that cursor}
+        self.watermarks = {}
+        self._total_contributions = RowBuffer(UserMetricStatsMiner.COLUMNS, UserMetricStatsMiner.DTYPES)
 
-    def run(self, login: str, start: str = None, end: str = None):
+    @property
+    def total_contributions(self) -> pd.DataFrame:
+        return self._total_contributions.to_frame()
+
+    def flush(self, sink):
         """
-        Collect GitHub metric data for a user in the give time span.
+        Write the mined rows to a sink, e.g. a ParquetSink built from COLUMNS, DTYPES and MAP_COLUMNS,
+        and release them from memory.
+        Args:
+            sink: result sink, or CSV file to append to
+        """
+        self._total_contributions.flush(sink)
+
+    def results(self) -> dict:
+        """
+        The results of the miner, merged by CohortRunner and sent back by its worker processes.
+        Returns:
+            the result attributes of the miner, by name
+        """
+        return {"exceptions": self.exceptions, "watermarks": self.watermarks,
+                "_total_contributions": self._total_contributions}
+
+    @staticmethod
+    def _repository_substitutions(login: str) -> dict:
+        return {"user": login, "pg_size": 100,
+                "order_by": {
+                    "field": "CREATED_AT",
+                    "direction": "ASC"}}
+
+    @staticmethod
+    def _empty_type_stats() -> dict:
+        return {repo_type: (dict(UserMetricStatsMiner.EMPTY_REPOSITORY_STATS), {})
+                for repo_type in UserMetricStatsMiner.REPOSITORY_TYPES}
+
+    @staticmethod
+    def _type_stats_from_json(type_stats: dict) -> dict:
+        # JSON turned the (stats, languages) pairs into lists
+        return {repo_type: tuple(copy.deepcopy(stats)) for repo_type, stats in type_stats.items()}
+
+    @staticmethod
+    def _add_repository_stats(collection: dict, type_stats: dict) -> None:
+        for repo_type, (repo_stats, lang_stats) in type_stats.items():
+            collection.update({repo_type + key: value for key, value in repo_stats.items()})
+            collection[f"type_{repo_type}_lang"] = lang_stats
+
+    @staticmethod
+    def _basic_stats(login: str, start: str, end: str) -> dict:
+        datetime_start = datetime.strptime(start, "%Y-%m-%dT%H:%M:%SZ")
+        datetime_end = datetime.strptime(end, "%Y-%m-%dT%H:%M:%SZ")
+        # Calculate the difference
+        difference = datetime_end - datetime_start
+        return {'github': login, 'created_at': start, 'end_at': end, 'lifetime': difference.days}
+
+    def _record_failure(self, login: str, end_at) -> None:
+        self._total_contributions.append({'github': login, 'created_at': "Do Not Exist", 'end_at': end_at})
+        self.exceptions.append(login)
+
+    @staticmethod
+    def _merge(previous: dict, collection: dict) -> dict:
+        """
+        Adds the contributions of the windows since a watermark to the aggregates of the previous run.
+        Args:
+            previous: row of the previous run
+            collection: contributions mined since the previous run
+        Returns:
+            the merged aggregates
+        """
+        merged = dict(collection)
+        for key, value in collection.items():
+            # a row read back from a DataFrame holds pd.NA or NaN where the previous run had no value
+            old = previous.get(key)
+            missing = not isinstance(old, dict) and pd.isna(old)
+            if isinstance(value, dict):
+                languages = {} if missing else dict(old)
+                for name, size in value.items():
+                    languages[name] = languages.get(name, 0) + size
+                merged[key] = languages
+            else:
+                merged[key] = value if missing else old + value
+        return merged
+
+    def _save_progress(self, login: str, stream: str, state) -> None:
+        if self._checkpoint is not None:
+            self._checkpoint.save_progress(login, stream, state)
+
+    def _resume_completed(self, login: str) -> bool:
+        """
+        Restore the row and watermark of a user completed by a previous attempt of the run.
+        Args:
+            login: user GitHub account
+        Returns:
+            whether the user was already completed
+        """
+        completed = self._checkpoint.completed(login) if self._checkpoint is not None else None
+        if completed is None:
+            return False
+        self._total_contributions.append(completed["row"])
+        self.watermarks[login] = completed["watermark"]
+        return True
+
+    @staticmethod
+    def _resumed(query, cursor: str):
+        if cursor:
+            query.paginator.update_paginator(True, cursor)
+        return query
+
+    @staticmethod
+    def _stream_state(progress: dict, key: str, watermark: dict = None) -> dict:
+        """
+        The state a stream is counted from: its checkpointed progress, or the cursor of the watermark with
+        the count up to that cursor.
+        Returns:
+            the cursor and count of the last page fully counted, the count so far, and whether the stream is done
+        """
+        state = progress.get(key)
+        if state is None:
+            cursor = watermark["cursors"].get(key) if watermark else None
+            count = watermark["counts"].get(key, 0) if watermark else 0
+            return {"cursor": cursor, "count": count, "cursor_count": count, "done": False}
+        # a stream in flight is checkpointed after a page it fully counted
+        return {"cursor_count": state["count"], **state}
+
+    @staticmethod
+    def _repository_state(progress: dict, watermark: dict = None) -> dict:
+        """
+        The state the repositories are aggregated from: their checkpointed progress, or the cursor of the
+        watermark with the stats up to that cursor.
+        Returns:
+            the cursor and stats of the last page fully aggregated, the stats so far, and whether the pass is done
+        """
+        state = progress.get("repositories")
+        if state is None:
+            cursor = watermark["cursors"].get("repositories") if watermark else None
+            type_stats = UserMetricStatsMiner._type_stats_from_json(watermark["type_stats"]) if watermark \
+                else UserMetricStatsMiner._empty_type_stats()
+            return {"cursor": cursor, "type_stats": type_stats, "cursor_type_stats": copy.deepcopy(type_stats),
+                    "done": False}
+        return {"cursor": state["cursor"], "done": state["done"],
+                "type_stats": UserMetricStatsMiner._type_stats_from_json(state["type_stats"]),
+                "cursor_type_stats": UserMetricStatsMiner._type_stats_from_json(
+                    state.get("cursor_type_stats", state["type_stats"]))}
+
+    def _count_page(self, login: str, key: str, query, end: str, state: dict, paginated_query, items: list) -> bool:
+        """
+        Count the items of a page of a stream created before the end time. The state is checkpointed after every
+        page that was fully counted; the items counted from the page the count stops in are not covered by its
+        cursor, so the count up to the cursor is kept too, for a later refresh to resume from.
+        Returns:
+            whether the next page has to be counted
+        """
+        counted = query.created_before_time(items, end)
+        state["count"] += counted
+        if counted < len(items):
+            # the stream is ordered by creation time, so every later page is past the end time
+            return False
+        if items:
+            state["cursor"], state["cursor_count"] = paginated_query.paginator.end_cursor, state["count"]
+            self._save_progress(login, key, state)
+        return True
+
+    def _repository_page(self, login: str, end: str, state: dict, query, repositories: list) -> bool:
+        """
+        Aggregate the stats of the repositories of a page created before the end time. The state is checkpointed
+        after every page that was fully aggregated, with the stats up to its cursor.
+        Returns:
+            whether the next page has to be aggregated
+        """
+        UserRepositories.cumulated_repository_stats_by_type(repositories, login, state["type_stats"], end, None,
+                                                            'before')
+        if not all(helper.created_before(repo["createdAt"], end) for repo in repositories):
+            return False
+        if repositories:
+            state["cursor"] = query.paginator.end_cursor
+            state["cursor_type_stats"] = copy.deepcopy(state["type_stats"])
+            self._save_progress(login, "repositories", state)
+        return True
+
+    def _finish(self, login: str, key: str, state: dict) -> dict:
+        state["done"] = True
+        self._save_progress(login, key, state)
+        return state
+
+    def _count_created_before(self, login: str, key: str, query, extractor, end: str, state: dict) -> dict:
+        """
+        Count the items of a stream created before the end time, resuming after the cursor of the state.
+        Args:
+            login: user GitHub account
+            key: column of the stream
+            query: paginated query class of the stream
+            extractor: extracts the items of a page
+            end: end time
+            state: state of the stream, see _stream_state
+        Returns:
+            the state of the counted stream
+        """
+        if state["done"]:
+            return state
+        paginated_query = UserMetricStatsMiner._resumed(query(), state["cursor"])
+        for response in self._client.execute(query=paginated_query, substitutions={"user": login, "pg_size": 100}):
+            if not self._count_page(login, key, query, end, state, paginated_query, extractor(response)):
+                break
+        return self._finish(login, key, state)
+
+    def _repository_stats(self, login: str, end: str, state: dict) -> dict:
+        """
+        Aggregate the stats of the repositories created before the end time, resuming after the cursor of the state.
+        Owned/collaborated and fork/non-fork repositories are bucketed from a single pass.
+        Args:
+            login: user GitHub account
+            end: end time
+            state: state of the pass, see _repository_state
+        Returns:
+            the state of the aggregated pass
+        """
+        if state["done"]:
+            return state
+        query = UserMetricStatsMiner._resumed(UserAffiliatedRepositories(), state["cursor"])
+        for response in self._client.execute(query=query,
+                                             substitutions=UserMetricStatsMiner._repository_substitutions(login)):
+            if not self._repository_page(login, end, state, query, UserRepositories.user_repositories(response)):
+                break
+        return self._finish(login, "repositories", state)
+
+    async def _count_created_before_async(self, login: str, key: str, query, extractor, end: str,
+                                          state: dict) -> dict:
+        """
+        The asyncio counterpart of _count_created_before.
+        """
+        if state["done"]:
+            return state
+        paginated_query = UserMetricStatsMiner._resumed(query(), state["cursor"])
+        async for response in self._client.execute(query=paginated_query,
+                                                   substitutions={"user": login, "pg_size": 100}):
+            if not self._count_page(login, key, query, end, state, paginated_query, extractor(response)):
+                break
+        return self._finish(login, key, state)
+
+    async def _repository_stats_async(self, login: str, end: str, state: dict) -> dict:
+        """
+        The asyncio counterpart of _repository_stats.
+        """
+        if state["done"]:
+            return state
+        query = UserMetricStatsMiner._resumed(UserAffiliatedRepositories(), state["cursor"])
+        async for response in self._client.execute(
+                query=query, substitutions=UserMetricStatsMiner._repository_substitutions(login)):
+            if not self._repository_page(login, end, state, query, UserRepositories.user_repositories(response)):
+                break
+        return self._finish(login, "repositories", state)
+
+    def _checkpointed_span(self, login: str, end: str = None) -> tuple:
+        """
+        The checkpointed progress of a user, if it belongs to an interrupted attempt over the same time span.
+        Args:
+            login: user GitHub account
+            end: end time of this attempt
+        Returns:
+            the progress, and the (start, end) span of the interrupted attempt, or None to start a new attempt
+        """
+        progress = self._checkpoint.progress(login) if self._checkpoint is not None else {}
+        span = progress.get("span")
+        if span is not None and end in (None, span["end"]):
+            return progress, (span["start"], span["end"])
+        return {}, None
+
+    def _start_span(self, login: str, start: str, end: str = None) -> tuple:
+        if end is None:
+            end = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+        self._save_progress(login, "span", {"start": start, "end": end})
+        return start, end
+
+    @staticmethod
+    def _window_batches(start: str, end: str, watermark: dict = None) -> list:
+        # the yearly windows since the watermark that ended are fetched in one cached request,
+        # and the open window in another
+        windows = UserContributionsCollectionMultiWindow.yearly_windows(watermark["end_at"] if watermark else start,
+                                                                        end)
+        return UserContributionsCollectionMultiWindow.batches(windows)
+
+    def _save_contributions(self, login: str, responses: list) -> dict:
+        contributions = dict(UserContributionsCollectionMultiWindow.user_contributions_collection(*responses))
+        self._save_progress(login, "contributions", contributions)
+        return contributions
+
+    def _complete(self, login: str, start: str, end: str, previous: dict, contributions: dict, streams: dict,
+                  repositories: dict) -> None:
+        """
+        Add the row of a mined user, and record its watermark.
+        The streams and repositories resume from the counts and stats up to the cursors of a watermark, so they
+        are counted again in full, while only the contributions are merged into the previous row.
         Args:
             login: user GitHub account
             start: start time
             end: end time
+            previous: row of the previous run, for a refresh
+            contributions: contributions of the windows since the watermark, or since the start time
+            streams: state of each counted stream
+            repositories: state of the repository pass
         """
+        collection = dict(contributions)
+        if previous is not None:
+            collection = UserMetricStatsMiner._merge(previous, collection)
+        for key, state in streams.items():
+            collection[key] = state["count"]
+        UserMetricStatsMiner._add_repository_stats(collection, repositories["type_stats"])
+        collection.update(UserMetricStatsMiner._basic_stats(login, start, end))
+        self._total_contributions.append(collection)
+
+        cursors = {key: state["cursor"] for key, state in streams.items()}
+        cursors["repositories"] = repositories["cursor"]
+        self.watermarks[login] = {"end_at": end, "cursors": cursors,
+                                  "counts": {key: state["cursor_count"] for key, state in streams.items()},
+                                  "type_stats": repositories["cursor_type_stats"]}
+        if self._checkpoint is not None:
+            self._checkpoint.complete(login, {"row": collection, "watermark": self.watermarks[login]})
+
+    def _mine(self, login: str, start: str = None, end: str = None, previous: dict = None, watermark: dict = None):
+        if self._resume_completed(login):
+            return
         try:
-            if not start:
-                start = self._client.execute(query=UserLogin(), substitutions={"user": login})["user"]["createdAt"]
-            if end is None:
-                end = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
-
-            datetime_start = datetime.strptime(start, "%Y-%m-%dT%H:%M:%SZ")
-            datetime_end = datetime.strptime(end, "%Y-%m-%dT%H:%M:%SZ")
-            # Calculate the difference
-            difference = datetime_end - datetime_start
-
-            basic_stats = {'github': login, 'created_at': start, 'end_at': end, 'lifetime': difference.days}
-
-            period_end = helper.add_a_year(start)
-            cumulated_contributions_collection = Counter({"res_con": 0, "commit": 0, "issue": 0,
-                                                          "pr": 0, "pr_review": 0, "repository": 0})
-
-            temp = Counter({"res_con": 0, "commit": 0, "issue": 0, "pr": 0, "pr_review": 0, "repository": 0})
-
-            type_A_repo = {"total_count": 0, "fork_count": 0, "stargazer_count": 0, "watchers_count": 0,
-                           "total_size": 0}
-            type_A_lang = {}
-
-            type_B_repo = {"total_count": 0, "fork_count": 0, "stargazer_count": 0, "watchers_count": 0,
-                           "total_size": 0}
-            type_B_lang = {}
-
-            type_C_repo = {"total_count": 0, "fork_count": 0, "stargazer_count": 0, "watchers_count": 0,
-                           "total_size": 0}
-            type_C_lang = {}
-
-            type_D_repo = {"total_count": 0, "fork_count": 0, "stargazer_count": 0, "watchers_count": 0,
-                           "total_size": 0}
-            type_D_lang = {}
-
-            while start < end:
-                if period_end > end:
-                    period_end = end
-                response = self._client.execute(query=UserContributionsCollection(),
-                                                substitutions={"user": login,
-                                                               "start": start,
-                                                               "end": period_end})
-
-                cumulated_contributions_collection += UserContributionsCollection.user_contributions_collection(
-                    response)
-                start = period_end
-                period_end = helper.add_a_year(start)
-
-
-            cumulated_contributions_collection = Counter(
-                {key: cumulated_contributions_collection[key] + temp[key] for key in
-                 set(cumulated_contributions_collection) | set(temp)})
-            cumulated_contributions_collection = dict(cumulated_contributions_collection)
-
-            # gists
-            counter = 0
-            for response in self._client.execute(query=UserGists(),
-                                                 substitutions={"user": login, "pg_size": 100}):
-                counter += UserGists.created_before_time(UserGists.user_gists(response), end)
-            cumulated_contributions_collection["gists"] = counter
-
-            # repositoryDiscussions
-            counter = 0
-            for response in self._client.execute(query=UserRepositoryDiscussions(),
-                                                 substitutions={"user": login, "pg_size": 100}):
-                counter += UserRepositoryDiscussions.created_before_time(
-                    UserRepositoryDiscussions.user_repository_discussions(response), end)
-            cumulated_contributions_collection["repository_discussions"] = counter
-
-            # commitComments
-            counter = 0
-            for response in self._client.execute(query=UserCommitComments(),
-                                                 substitutions={"user": login, "pg_size": 100}):
-                counter += UserCommitComments.created_before_time(UserCommitComments.user_commit_comments(response),
-                                                                  end)
-            cumulated_contributions_collection["commit_comments"] = counter
-
-            # issueComments
-            counter = 0
-            for response in self._client.execute(query=UserIssueComments(),
-                                                 substitutions={"user": login, "pg_size": 100}):
-                counter += UserIssueComments.created_before_time(UserIssueComments.user_issue_comments(response),
-                                                                 end)
-            cumulated_contributions_collection["issue_comments"] = counter
-
-            # gistComments
-            counter = 0
-            for response in self._client.execute(query=UserGistComments(),
-                                                 substitutions={"user": login, "pg_size": 100}):
-                counter += UserGistComments.created_before_time(UserGistComments.user_gist_comments(response), end)
-            cumulated_contributions_collection["gist_comments"] = counter
-
-            # repositoryDiscussionComments
-            counter = 0
-            for response in self._client.execute(query=UserRepositoryDiscussionComments(),
-                                                 substitutions={"user": login, "pg_size": 100}):
-                counter += UserRepositoryDiscussionComments.created_before_time(
-                    UserRepositoryDiscussionComments.user_repository_discussion_comments(response), end)
-            cumulated_contributions_collection["repository_discussion_comments"] = counter
-
-            # TypeA
-            for response in self._client.execute(query=UserRepositories(),
-                                                 substitutions={"user": login, "pg_size": 100,
-                                                                "is_fork": False,
-                                                                "ownership": "OWNER",
-                                                                "order_by": {
-                                                                    "field": "CREATED_AT",
-                                                                    "direction": "ASC"}}):
-                UserRepositories.cumulated_repository_stats(UserRepositories.user_repositories(response),
-                                                            type_A_repo, type_A_lang, end)
-            type_A_repo = {'A' + key: value for key, value in type_A_repo.items()}
-            cumulated_contributions_collection.update(type_A_repo)
-            cumulated_contributions_collection["type_A_lang"] = type_A_lang
-
-            # TypeB
-            for response in self._client.execute(query=UserRepositories(),
-                                                 substitutions={"user": login, "pg_size": 100,
-                                                                "is_fork": True,
-                                                                "ownership": "OWNER",
-                                                                "order_by": {
-                                                                    "field": "CREATED_AT",
-                                                                    "direction": "ASC"}}):
-                UserRepositories.cumulated_repository_stats(UserRepositories.user_repositories(response),
-                                                            type_B_repo, type_B_lang, end)
-            type_B_repo = {'B' + key: value for key, value in type_B_repo.items()}
-            cumulated_contributions_collection.update(type_B_repo)
-            cumulated_contributions_collection["type_B_lang"] = type_B_lang
-
-            # TypeC
-            for response in self._client.execute(query=UserRepositories(),
-                                                 substitutions={"user": login, "pg_size": 100,
-                                                                "is_fork": False,
-                                                                "ownership": "COLLABORATOR",
-                                                                "order_by": {
-                                                                    "field": "CREATED_AT",
-                                                                    "direction": "ASC"}}):
-                UserRepositories.cumulated_repository_stats(UserRepositories.user_repositories(response),
-                                                            type_C_repo, type_C_lang, end)
-            type_C_repo = {'C' + key: value for key, value in type_C_repo.items()}
-            cumulated_contributions_collection.update(type_C_repo)
-            cumulated_contributions_collection["type_C_lang"] = type_C_lang
-
-            # TypeD
-            for response in self._client.execute(query=UserRepositories(),
-                                                 substitutions={"user": login, "pg_size": 100,
-                                                                "is_fork": True,
-                                                                "ownership": "COLLABORATOR",
-                                                                "order_by": {
-                                                                    "field": "CREATED_AT",
-                                                                    "direction": "ASC"}}):
-                UserRepositories.cumulated_repository_stats(UserRepositories.user_repositories(response),
-                                                            type_D_repo, type_D_lang, end)
-            type_D_repo = {'D' + key: value for key, value in type_D_repo.items()}
-            cumulated_contributions_collection.update(type_D_repo)
-            cumulated_contributions_collection["type_D_lang"] = type_D_lang
-
-            cumulated_contributions_collection.update(basic_stats)
-            self.total_contributions = pd.concat(
-                [self.total_contributions, pd.DataFrame([cumulated_contributions_collection])], ignore_index=True)
+            progress, span = self._checkpointed_span(login, end)
+            if span is None:
+                if not start:
+                    identity = self._identities.get(self._client, login)
+                    if identity is None:
+                        self._record_failure(login, pd.NA)
+                        return
+                    start = identity["createdAt"]
+                span = self._start_span(login, start, end)
+            start, end = span
+
+            contributions = progress.get("contributions")
+            if contributions is None:
+                contributions = self._save_contributions(login, [
+                    self._client.execute(query=UserContributionsCollectionMultiWindow(batch),
+                                         substitutions={"user": login})
+                    for batch in UserMetricStatsMiner._window_batches(start, end, watermark)])
+            streams = {key: self._count_created_before(login, key, query, extractor, end,
+                                                       UserMetricStatsMiner._stream_state(progress, key, watermark))
+                       for key, query, extractor in UserMetricStatsMiner.CREATED_BEFORE_STREAMS}
+            repositories = self._repository_stats(login, end,
+                                                  UserMetricStatsMiner._repository_state(progress, watermark))
+            self._complete(login, start, end, previous, contributions, streams, repositories)
 
         except QueryFailedException:
-            dne = pd.DataFrame([{'github': login, 'created_at': "Do Not Exist", 'end_at': pd.NA, 'lifetime': pd.NA,
-                                 'res_con': pd.NA, 'commit': pd.NA, 'issue': pd.NA, 'pr': pd.NA, 'pr_review': pd.NA,
-                                 'repository': pd.NA, 'gists': pd.NA, 'repository_discussions': pd.NA,
-                                 'commit_comments': pd.NA, 'issue_comments': pd.NA, 'gist_comments': pd.NA,
-                                 'repository_discussion_comments': pd.NA,
-                                 'Atotal_count': pd.NA, 'Afork_count': pd.NA, 'Astargazer_count': pd.NA,
-                                 'Awatchers_count': pd.NA, 'Atotal_size': pd.NA, 'type_A_lang': pd.NA,
-                                 'Btotal_count': pd.NA, 'Bfork_count': pd.NA, 'Bstargazer_count': pd.NA,
-                                 'Bwatchers_count': pd.NA, 'Btotal_size': pd.NA, 'type_B_lang': pd.NA,
-                                 'Ctotal_count': pd.NA, 'Cfork_count': pd.NA, 'Cstargazer_count': pd.NA,
-                                 'Cwatchers_count': pd.NA, 'Ctotal_size': pd.NA, 'type_C_lang': pd.NA,
-                                 'Dtotal_count': pd.NA, 'Dfork_count': pd.NA, 'Dstargazer_count': pd.NA,
-                                 'Dwatchers_count': pd.NA, 'Dtotal_size': pd.NA, 'type_D_lang': pd.NA}])
-
-            self.total_contributions = pd.concat(
-                [self.total_contributions, dne], ignore_index=True)
-            self.exceptions.append(login)
-
-        except Exception as e:
-            dne = pd.DataFrame([{'github': login, 'created_at': "Do Not Exist", 'end_at': "Unknown exception", 'lifetime': pd.NA,
-                                 'res_con': pd.NA, 'commit': pd.NA, 'issue': pd.NA, 'pr': pd.NA, 'pr_review': pd.NA,
-                                 'repository': pd.NA, 'gists': pd.NA, 'repository_discussions': pd.NA,
-                                 'commit_comments': pd.NA, 'issue_comments': pd.NA, 'gist_comments': pd.NA,
-                                 'repository_discussion_comments': pd.NA,
-                                 'Atotal_count': pd.NA, 'Afork_count': pd.NA, 'Astargazer_count': pd.NA,
-                                 'Awatchers_count': pd.NA, 'Atotal_size': pd.NA, 'type_A_lang': pd.NA,
-                                 'Btotal_count': pd.NA, 'Bfork_count': pd.NA, 'Bstargazer_count': pd.NA,
-                                 'Bwatchers_count': pd.NA, 'Btotal_size': pd.NA, 'type_B_lang': pd.NA,
-                                 'Ctotal_count': pd.NA, 'Cfork_count': pd.NA, 'Cstargazer_count': pd.NA,
-                                 'Cwatchers_count': pd.NA, 'Ctotal_size': pd.NA, 'type_C_lang': pd.NA,
-                                 'Dtotal_count': pd.NA, 'Dfork_count': pd.NA, 'Dstargazer_count': pd.NA,
-                                 'Dwatchers_count': pd.NA, 'Dtotal_size': pd.NA, 'type_D_lang': pd.NA}])
-            self.total_contributions = pd.concat(
-                [self.total_contributions, dne], ignore_index=True)
-            self.exceptions.append(login)
+            self._record_failure(login, pd.NA)
 
+        except Exception:
+            self._record_failure(login, "Unknown exception")
 
+    async def _mine_async(self, login: str, start: str = None, end: str = None, previous: dict = None,
+                          watermark: dict = None):
+        if self._resume_completed(login):
+            return
+        try:
+            progress, span = self._checkpointed_span(login, end)
+            if span is None:
+                if not start:
+                    identity = await self._identities.get_async(self._client, login)
+                    if identity is None:
+                        self._record_failure(login, pd.NA)
+                        return
+                    start = identity["createdAt"]
+                span = self._start_span(login, start, end)
+            start, end = span
+
+            async def contributions_collection():
+                if "contributions" in progress:
+                    return progress["contributions"]
+                responses = [await self._client.execute(query=UserContributionsCollectionMultiWindow(batch),
+                                                        substitutions={"user": login})
+                             for batch in UserMetricStatsMiner._window_batches(start, end, watermark)]
+                return self._save_contributions(login, responses)
+
+            streams = [self._count_created_before_async(login, key, query, extractor, end,
+                                                        UserMetricStatsMiner._stream_state(progress, key, watermark))
+                       for key, query, extractor in UserMetricStatsMiner.CREATED_BEFORE_STREAMS]
+            repositories = self._repository_stats_async(login, end,
+                                                        UserMetricStatsMiner._repository_state(progress, watermark))
+            results = await asyncio.gather(contributions_collection(), *streams, repositories)
+            streams = {key: state for (key, _, _), state in
+                       zip(UserMetricStatsMiner.CREATED_BEFORE_STREAMS, results[1:-1])}
+            self._complete(login, start, end, previous, results[0], streams, results[-1])
+
+        except QueryFailedException:
+            self._record_failure(login, pd.NA)
 
+        except Exception:
+            self._record_failure(login, "Unknown exception")
+
+    def run(self, login: str, start: str = None, end: str = None):
+        """
+        Collect GitHub metric data for a user in the give time span.
+        The watermark of the run is recorded in self.watermarks.
+        With a checkpoint, a user completed by a previous attempt is not mined again,
+        and an interrupted user resumes from the last checkpointed page of each stream.
+        Args:
+            login: user GitHub account
+            start: start time
+            end: end time
+        """
+        self._mine(login, start, end)
 
+    def refresh(self, login: str, previous: dict, watermark: dict, end: str = None):
+        """
+        Incrementally re-mine a user: only the contributions, comments, gists, discussions and repositories
+        past the watermark of a previous run are fetched. The new contributions are added to that run's
+        aggregates, and the other streams resume from the counts and stats recorded up to their cursors.
+        Args:
+            login: user GitHub account
+            previous: row of the previous run, as found in total_contributions
+            watermark: watermark recorded by the previous run, as found in watermarks. Watermarks are plain
+                       JSON data, for the caller to store next to the row they belong to.
+            end: end time
+        """
+        self._mine(login, previous["created_at"], end, previous, watermark)
+
+    async def run_async(self, login: str, start: str = None, end: str = None):
+        """
+        The asyncio counterpart of run, sending the yearly contribution windows, the comment/gist/discussion
+        streams and the repository pass concurrently. Requires the miner to be created with an AsyncClient.
+        Identities, checkpoints and watermarks are handled as by run, and responses are cached if the
+        AsyncClient has a response cache.
+        Args:
+            login: user GitHub account
+            start: start time
+            end: end time
+        """
+        await self._mine_async(login, start, end)
+
+    async def refresh_async(self, login: str, previous: dict, watermark: dict, end: str = None):
+        """
+        The asyncio counterpart of refresh. Requires the miner to be created with an AsyncClient.
+        Args:
+            login: user GitHub account
+            previous: row of the previous run, as found in total_contributions
+            watermark: watermark recorded by the previous run, as found in watermarks
+            end: end time
+        """
+        await self._mine_async(login, previous["created_at"], end, previous, watermark)
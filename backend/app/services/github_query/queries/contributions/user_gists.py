@@ -18,7 +18,9 @@ class UserGists(PaginatedQuery):
                         "login",
                         QueryNodePaginator(
                             "gists",
-                            args={"first": "$pg_size"},
+                            # oldest first, so counting up to a cutoff can stop at the first later item
+                            args={"first": "$pg_size",
+                                  "orderBy": {"field": "CREATED_AT", "direction": "ASC"}},
                             fields=[
                                 "totalCount",
                                 QueryNode(
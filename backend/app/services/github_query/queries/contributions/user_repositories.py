@@ -1,4 +1,4 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from backend.app.services.github_query.github_graphql.query import QueryNode, PaginatedQuery, QueryNodePaginator
 import backend.app.services.github_query.utils.helper as helper
 
@@ -7,6 +7,14 @@ class UserRepositories(PaginatedQuery):
     UserRepositories is a class for querying a user's repositories including details like language statistics,
     fork count, stargazer count, etc. It extends PaginatedQuery to handle potentially large numbers of repositories.
     """
+
+    # repository type of each (ownership, is_fork) combination
+    REPOSITORY_TYPES = {
+        ("OWNER", False): "A",
+        ("OWNER", True): "B",
+        ("COLLABORATOR", False): "C",
+        ("COLLABORATOR", True): "D",
+    }
     
     def __init__(self) -> None:
         """
@@ -121,6 +129,109 @@ class UserRepositories(PaginatedQuery):
                     else:
                         lang_stats[name] += int(size)
 
+    @staticmethod
+    def repository_type(repo: Dict[str, Any], login: str) -> str:
+        """
+        Classifies a repository returned by UserAffiliatedRepositories into one of the four repository types.
+
+        Args:
+            repo: The repository, including its isFork flag and owner login.
+            login: The login of the user whose repositories are mined.
+
+        Returns:
+            The repository type: A (owned), B (owned fork), C (collaborated) or D (collaborated fork).
+        """
+        ownership = "OWNER" if repo["owner"]["login"].lower() == login.lower() else "COLLABORATOR"
+        return UserRepositories.REPOSITORY_TYPES[(ownership, repo["isFork"])]
+
+    @staticmethod
+    def cumulated_repository_stats_by_type(repo_list: List[Dict[str, Any]], login: str, type_stats: Dict[str, Tuple[Dict[str, int], Dict[str, int]]], start: str, end: str, direction: str) -> None:
+        """
+        Buckets the repositories of a single UserAffiliatedRepositories pass into the four repository types
+        and aggregates the statistics of each type.
+
+        Args:
+            repo_list: List of repositories to be analyzed.
+            login: The login of the user whose repositories are mined.
+            type_stats: Dictionary mapping each repository type to its (repo_stats, lang_stats) accumulators.
+            start: String representing the start time for consideration of repositories.
+            end: String representing the end time for consideration of repositories.
+            direction: Specify whether to aggregates statistics for repositories created before, after a certain time or in between a time range.
 
-            
-                
\ No newline at end of file
+        Returns:
+            None: Modifies the accumulators in type_stats in place.
+        """
+        buckets = {repo_type: [] for repo_type in type_stats}
+        for repo in repo_list:
+            buckets[UserRepositories.repository_type(repo, login)].append(repo)
+        for repo_type, repos in buckets.items():
+            repo_stats, lang_stats = type_stats[repo_type]
+            UserRepositories.cumulated_repository_stats(repos, repo_stats, lang_stats, start, end, direction)
+
+
+class UserAffiliatedRepositories(UserRepositories):
+    """
+    UserAffiliatedRepositories queries the repositories a user owns or collaborates on, forks included, in a single
+    paginated pass. Each repository carries its isFork flag and owner, so that it can be classified client-side
+    with UserRepositories.repository_type instead of paging once per repository type.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes a query for all of a user's owned and collaborated repositories.
+        """
+        PaginatedQuery.__init__(
+            self,
+            fields=[
+                QueryNode(
+                    "user",
+                    args={"login": "$user"},
+                    fields=[
+                        QueryNodePaginator(
+                            "repositories",
+                            args={"first": "$pg_size",
+                                  "ownerAffiliations": ["OWNER", "COLLABORATOR"],
+                                  "orderBy": "$order_by"},
+                            fields=[
+                                "totalCount",
+                                QueryNode(
+                                    "nodes",
+                                    fields=[
+                                        "name",
+                                        "isEmpty",
+                                        "isFork",
+                                        "createdAt",
+                                        "updatedAt",
+                                        "forkCount",
+                                        "stargazerCount",
+                                        QueryNode("owner", fields=["login"]),
+                                        QueryNode("watchers", fields=["totalCount"]),
+                                        QueryNode("primaryLanguage", fields=["name"]),
+                                        QueryNode(
+                                            "languages",
+                                            args={"first": 100,
+                                                  "orderBy": {"field": "SIZE",
+                                                              "direction": "DESC"}},
+                                            fields=[
+                                                "totalSize",
+                                                QueryNode(
+                                                    "edges",
+                                                    fields=[
+                                                        "size",
+                                                        QueryNode("node", fields=["name"])
+                                                    ]
+                                                )
+                                            ]
+                                        )
+                                    ]
+                                ),
+                                QueryNode(
+                                    "pageInfo",
+                                    fields=["endCursor", "hasNextPage"]
+                                )
+                            ]
+                        ),
+                    ]
+                )
+            ]
+        )
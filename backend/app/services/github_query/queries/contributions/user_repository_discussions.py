@@ -14,7 +14,9 @@ class UserRepositoryDiscussions(PaginatedQuery):
                         "login",
                         QueryNodePaginator(
                             "repositoryDiscussions",
-                            args={"first": "$pg_size"},
+                            # oldest first, so counting up to a cutoff can stop at the first later item
+                            args={"first": "$pg_size",
+                                  "orderBy": {"field": "CREATED_AT", "direction": "ASC"}},
                             fields=[
                                 "totalCount",
                                 QueryNode(
@@ -0,0 +1,110 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+from backend.app.services.github_query.github_graphql.client import Client
+from backend.app.services.github_query.github_graphql.query import PaginatedQuery
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def time_slices(start: str, end: str, count: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Splits the history of a branch into contiguous slices of time, newest first, as the history is paged.
+    The oldest slice has no lower bound and the newest no upper bound, so commits dated before the start
+    (e.g. imported history) or after the end are not lost.
+
+    Args:
+        start: Beginning of the history to split, e.g. the creation time of the repository.
+        end: End of the history to split, e.g. now.
+        count: Number of slices.
+
+    Returns:
+        The (since, until) bounds of every slice, newest first.
+    """
+    datetime_start = datetime.strptime(start, TIME_FORMAT)
+    step = (datetime.strptime(end, TIME_FORMAT) - datetime_start) / max(count, 1)
+    boundaries = [(datetime_start + step * index).strftime(TIME_FORMAT) for index in range(1, count)]
+    bounds = [None] + boundaries + [None]
+    return [(bounds[index], bounds[index + 1]) for index in reversed(range(len(bounds) - 1))]
+
+
+# marks the end of the pages of a slice in its queue
+_END = object()
+
+
+def _put(pages: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    # waits for room in the queue, unless the consumer stopped reading the history
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _fetch_slice(client: Client, query_class: Callable[..., PaginatedQuery], substitutions: Dict[str, Any],
+                 since: Optional[str], until: Optional[str], pages: queue.Queue, stop: threading.Event) -> None:
+    if stop.is_set():
+        return
+    try:
+        query = query_class(time_sliced=True)
+        for response in client.execute(query=query, substitutions={**substitutions, "since": since, "until": until}):
+            if not _put(pages, response, stop):
+                return
+        _put(pages, _END, stop)
+    except Exception as e:
+        # raised again by the consumer when it reaches the slice
+        _put(pages, e, stop)
+
+
+def sliced_history(client: Client, query_class: Callable[..., PaginatedQuery], substitutions: Dict[str, Any],
+                   slices: List[Tuple[Optional[str], Optional[str]]], max_workers: int = 8,
+                   lookahead: int = 2) -> Generator[Dict[str, Any], None, None]:
+    """
+    Fetches the slices of a default branch history concurrently, each slice paging on its own cursor,
+    and yields their pages in history order. The pages are streamed: every slice being fetched buffers
+    at most lookahead pages ahead of the consumer, so at most max_workers * (lookahead + 1) pages are held
+    in memory, however long the history. The bounds of adjacent slices are both inclusive, so the commits
+    repeated at a boundary are removed from the later page.
+
+    Args:
+        client: Client shared by the workers.
+        query_class: RepositoryCommits or RepositoryContributors.
+        substitutions: Substitutions of the query, without since and until.
+        slices: (since, until) bounds of the slices, newest first, as returned by time_slices.
+        max_workers: Number of slices fetched at the same time.
+        lookahead: Number of pages each slice fetches ahead of the consumer.
+
+    Returns:
+        A generator yielding every page of every slice, which the extractors of the query class accept.
+
+    Raises:
+        Exception: The exception raised while fetching a slice, once the pages before it were yielded.
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=lookahead) for _ in slices]
+    # the slices are started in history order, so the slice being read always has a worker
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for (since, until), pages in zip(slices, queues):
+                executor.submit(_fetch_slice, client, query_class, substitutions, since, until, pages, stop)
+            # duplicates only occur at the boundary of adjacent slices, so the ids of the previous slice are enough
+            previous_oids = set()
+            for pages in queues:
+                oids = set()
+                while True:
+                    response = pages.get()
+                    if response is _END:
+                        break
+                    if isinstance(response, Exception):
+                        raise response
+                    history = response['repository']['defaultBranchRef']['target']['history']
+                    history['nodes'] = [node for node in history['nodes'] if node['oid'] not in previous_oids]
+                    oids.update(node['oid'] for node in history['nodes'])
+                    yield response
+                previous_oids = oids
+        finally:
+            stop.set()
@@ -1,9 +1,19 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Any
 from backend.app.services.github_query.github_graphql.query import QueryNode, PaginatedQuery, QueryNodePaginator
 
 class RepositoryCommits(PaginatedQuery):
-    def __init__(self) -> None:
-        """Initializes a paginated query for repository commits with specific fields and pagination controls."""
+    def __init__(self, time_sliced: bool = False) -> None:
+        """
+        Initializes a paginated query for repository commits with specific fields and pagination controls.
+
+        Args:
+            time_sliced: Whether the history is restricted to the $since/$until slice of time, see history_slices.
+        """
+        history_args = {"first": "$pg_size"}  # Pagination control arguments
+        node_fields = []
+        if time_sliced:
+            history_args.update({"since": "$since", "until": "$until"})
+            node_fields.append("oid")  # Identifies the commits repeated at the boundary of two slices
         super().__init__(
             fields=[
                 QueryNode(
@@ -21,12 +31,12 @@ class RepositoryCommits(PaginatedQuery):
                                             fields=[
                                                 QueryNodePaginator(
                                                     "history",  # Paginated history of commits
-                                                    args={"first": "$pg_size"},  # Pagination control arguments
+                                                    args=history_args,
                                                     fields=[
                                                         'totalCount',  # Total number of commits in the history
                                                         QueryNode(
                                                             "nodes",  # List of commit nodes
-                                                            fields=[
+                                                            fields=node_fields + [
                                                                 "authoredDate",  # Date when the commit was authored
                                                                 "changedFilesIfAvailable",  # Number of files changed, if available
                                                                 "additions",  # Number of additions made in the commit
@@ -70,6 +80,21 @@ class RepositoryCommits(PaginatedQuery):
             ]
         )
 
+    def cache_ttl(self, substitutions: Dict[str, Any]) -> Optional[float]:
+        """
+        History cursors are anchored to the commit the first page was read from, so every page after
+        the first one cannot change and is cached forever. The first page follows the branch head.
+
+        Args:
+            substitutions (Dict[str, Any]): The substitutions the query is executed with.
+
+        Returns:
+            Optional[float]: None for pages after a cursor, otherwise a short lifetime.
+        """
+        if self.paginator.end_cursor:
+            return None
+        return PaginatedQuery.SHORT_CACHE_TTL
+
     @staticmethod
     def commits_list(raw_data: Dict[str, Dict], cumulative_commits: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
         """
@@ -85,58 +110,84 @@ class RepositoryCommits(PaginatedQuery):
         nodes = raw_data['repository']['defaultBranchRef']['target']['history']['nodes']
         if cumulative_commits is None:
             cumulative_commits = {}
-        
-        # Process each commit node to accumulate data
+
+        # Process each commit node to accumulate data, with a single lookup per author and login
         for node in nodes:
             # Consider only commits with less than 2 parents (usually mainline commits)
-            if node['parents'] and node['parents']['totalCount'] < 2:
-                name = node['author']['name']
-                login = node['author']['user']
-                if login:
-                    login = login['login']
-                additions = node['additions']
-                deletions = node['deletions']
-                files = node['changedFilesIfAvailable']
-                if name not in cumulative_commits:
-                    if login:
-                        cumulative_commits[name] = {
-                            login: {
-                                'total_additions': additions,
-                                'total_deletions': deletions,
-                                'total_files': files,
-                                'total_commits': 1
-                            }
-                        }
-                    else:
-                        cumulative_commits[name] = {
-                            'total_additions': additions,
-                            'total_deletions': deletions,
-                            'total_files': files,
-                            'total_commits': 1
-                        }
-                else:  # name in cumulative_commits
-                    if login:
-                        if login in cumulative_commits[name]:
-                            cumulative_commits[name][login]['total_additions'] += additions
-                            cumulative_commits[name][login]['total_deletions'] += deletions
-                            cumulative_commits[name][login]['total_files'] += files
-                            cumulative_commits[name][login]['total_commits'] += 1
-                        else:  # login not in cumulative
-                            cumulative_commits[name][login] = {
-                                'total_additions': additions,
-                                'total_deletions': deletions,
-                                'total_files': files,
-                                'total_commits': 1
-                            }
-                    else: # no login
-                        if 'total_additions' in cumulative_commits[name]:
-                            cumulative_commits[name]['total_additions'] += additions
-                            cumulative_commits[name]['total_deletions'] += deletions
-                            cumulative_commits[name]['total_files'] += files
-                            cumulative_commits[name]['total_commits'] += 1
-                        else:
-                            cumulative_commits[name]['total_additions'] = additions
-                            cumulative_commits[name]['total_deletions'] = deletions
-                            cumulative_commits[name]['total_files'] = files
-                            cumulative_commits[name]['total_commits'] = 1
+            parents = node['parents']
+            if not parents or parents['totalCount'] >= 2:
+                continue
+            author = node['author']
+            name = author['name']
+            login = author['user']
+            if login:
+                login = login['login']
+            additions = node['additions']
+            deletions = node['deletions']
+            files = node['changedFilesIfAvailable']
+
+            author_commits = cumulative_commits.get(name)
+            if author_commits is None:
+                author_commits = cumulative_commits[name] = {}
+            if login:
+                stats = author_commits.get(login)
+                if stats is None:
+                    author_commits[login] = {'total_additions': additions, 'total_deletions': deletions,
+                                             'total_files': files, 'total_commits': 1}
+                    continue
+            else:
+                # commits without a login are accumulated directly under the author name
+                stats = author_commits
+                if 'total_additions' not in stats:
+                    stats.update(total_additions=additions, total_deletions=deletions,
+                                 total_files=files, total_commits=1)
+                    continue
+            stats['total_additions'] += additions
+            stats['total_deletions'] += deletions
+            stats['total_files'] += files
+            stats['total_commits'] += 1
         return cumulative_commits
+
+    @staticmethod
+    def contributions_by_login(raw_data: Dict[str, Dict], contributions: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Splits the commits of a history page by the login of their author, so that the contributions of
+        every contributor are computed from a single pass over the history instead of one pass per author.
+
+        Args:
+            raw_data: The raw data returned from the GraphQL query.
+            contributions: Optional contributions dictionary to accumulate results.
+
+        Returns:
+            A dictionary keyed by login holding the 'cumulated' statistics of the author, as computed by
+            RepositoryContributorsContribution.user_cumulated_contribution, and its 'individual' commits, as
+            listed by RepositoryContributorsContribution.user_commit_contribution. Authors of merge commits
+            only are listed with empty contributions, as they are contributors of the repository too.
+        """
+        nodes = raw_data['repository']['defaultBranchRef']['target']['history']['nodes']
+        if contributions is None:
+            contributions = {}
+
+        for node in nodes:
+            user = node['author']['user']
+            if not user or not user['login']:
+                continue
+            contribution = contributions.get(user['login'])
+            if contribution is None:
+                contribution = contributions[user['login']] = {
+                    'cumulated': {'total_additions': 0, 'total_deletions': 0, 'total_commits': 0},
+                    'individual': []
+                }
+            if node['parents'] and node['parents']['totalCount'] < 2:
+                cumulated = contribution['cumulated']
+                cumulated['total_additions'] += node['additions']
+                cumulated['total_deletions'] += node['deletions']
+                cumulated['total_commits'] += 1
+                contribution['individual'].append({
+                    'authoredDate': node['authoredDate'],
+                    'changedFiles': node['changedFilesIfAvailable'],
+                    'additions': node['additions'],
+                    'deletions': node['deletions'],
+                    'message': node['message']
+                })
+        return contributions
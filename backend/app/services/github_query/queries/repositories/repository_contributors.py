@@ -1,8 +1,19 @@
-from typing import Dict, Set, Optional
+from typing import Dict, Set, Optional, Any
 from backend.app.services.github_query.github_graphql.query import QueryNode, PaginatedQuery, QueryNodePaginator
 
 class RepositoryContributors(PaginatedQuery):
-    def __init__(self):
+    def __init__(self, time_sliced: bool = False):
+        """
+        Initializes a paginated query for the authors of the repository's commits.
+
+        Args:
+            time_sliced: Whether the history is restricted to the $since/$until slice of time, see history_slices.
+        """
+        history_args = {"first": "$pg_size"}  # Pagination control arguments
+        node_fields = []
+        if time_sliced:
+            history_args.update({"since": "$since", "until": "$until"})
+            node_fields.append("oid")  # Identifies the commits repeated at the boundary of two slices
         super().__init__(
             fields=[
                 QueryNode(
@@ -20,12 +31,12 @@ class RepositoryContributors(PaginatedQuery):
                                             fields=[
                                                 QueryNodePaginator(
                                                     "history",  # Paginated history of commits
-                                                    args={"first": "$pg_size"},  # Pagination control arguments
+                                                    args=history_args,
                                                     fields=[
                                                         'totalCount',  # Total number of commits in the history
                                                         QueryNode(
                                                             "nodes",  # List of commit nodes
-                                                            fields=[
+                                                            fields=node_fields + [
                                                                 QueryNode(
                                                                     "author",  # Author of the commit
                                                                     fields=[
@@ -58,6 +69,20 @@ class RepositoryContributors(PaginatedQuery):
             ]
         )
     
+    def cache_ttl(self, substitutions: Dict[str, Any]) -> Optional[float]:
+        """
+        Pages read after a history cursor are cached forever, see RepositoryCommits.cache_ttl.
+
+        Args:
+            substitutions (Dict[str, Any]): The substitutions the query is executed with.
+
+        Returns:
+            Optional[float]: None for pages after a cursor, otherwise a short lifetime.
+        """
+        if self.paginator.end_cursor:
+            return None
+        return PaginatedQuery.SHORT_CACHE_TTL
+
     @staticmethod
     def extract_unique_author(raw_data: Dict[str, Dict], unique_authors: Optional[Dict[str, Set[str]]] = None) -> Dict[str, Set[str]]:
         """
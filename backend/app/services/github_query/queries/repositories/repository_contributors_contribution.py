@@ -58,6 +58,21 @@ class RepositoryContributorsContribution(PaginatedQuery):
             ]
         )
 
+    def cache_ttl(self, substitutions: Dict[str, Any]) -> Optional[float]:
+        """
+        Caches the author's history pages after the first one forever, as their cursor pins the
+        starting commit (see RepositoryCommits.cache_ttl).
+
+        Args:
+            substitutions (Dict[str, Any]): The substitutions the query is executed with.
+
+        Returns:
+            Optional[float]: None for pages after a cursor, otherwise a short lifetime.
+        """
+        if self.paginator.end_cursor:
+            return None
+        return PaginatedQuery.SHORT_CACHE_TTL
+
     @staticmethod
     def user_cumulated_contribution(raw_data: Dict[str, Any], cumulative_contribution: Optional[Dict[str, int]] = None) -> Dict[str, int]:
         """
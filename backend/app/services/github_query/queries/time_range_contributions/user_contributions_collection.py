@@ -1,6 +1,19 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Optional
 from collections import Counter
+from datetime import datetime
 from backend.app.services.github_query.github_graphql.query import QueryNode, Query
+import backend.app.services.github_query.utils.helper as helper
+
+CONTRIBUTION_FIELDS = [
+    "startedAt",  # The date and time at which the collection period starts.
+    "endedAt",    # The date and time at which the collection period ends.
+    "restrictedContributionsCount",  # Count of contributions to private repos the viewer does not have access to.
+    "totalCommitContributions",  # The total number of commits authored by the user.
+    "totalIssueContributions",  # The total number of issues opened by the user.
+    "totalPullRequestContributions",  # The total number of pull requests opened by the user.
+    "totalPullRequestReviewContributions",  # The total number of pull request reviews by the user.
+    "totalRepositoryContributions"  # The total number of repositories the user contributed to.
+]
 
 class UserContributionsCollection(Query):
     """
@@ -21,24 +34,27 @@ class UserContributionsCollection(Query):
                         QueryNode(
                             "contributionsCollection",
                             args={"from": "$start", "to": "$end"},  # Time period for the contributions.
-                            fields=[
-                                "startedAt",  # The date and time at which the collection period starts.
-                                "endedAt",    # The date and time at which the collection period ends.
-                                "restrictedContributionsCount",  # Count of contributions to private repos the viewer does not have access to.
-                                "totalCommitContributions",  # The total number of commits authored by the user.
-                                "totalIssueContributions",  # The total number of issues opened by the user.
-                                "totalPullRequestContributions",  # The total number of pull requests opened by the user.
-                                "totalPullRequestReviewContributions",  # The total number of pull request reviews by the user.
-                                "totalRepositoryContributions"  # The total number of repositories the user contributed to.
-                                # Each of these fields provides a count related to different types of contributions.
-                                # User can extend this to include fields they interested. 
-                            ]
+                            fields=list(CONTRIBUTION_FIELDS)  # User can extend this to include fields they interested.
                         ),
                     ]
                 )
             ]
         )
 
+    def cache_ttl(self, substitutions: Dict[str, Any]) -> Optional[float]:
+        """
+        Contributions of a window that ended in the past cannot change anymore and are cached forever.
+
+        Args:
+            substitutions (Dict[str, Any]): The substitutions the query is executed with.
+
+        Returns:
+            Optional[float]: None for a window that has ended, otherwise a short lifetime.
+        """
+        if substitutions["end"] < datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"):
+            return None
+        return Query.SHORT_CACHE_TTL
+
     @staticmethod
     def user_contributions_collection(raw_data: Dict[str, Any]) -> Counter:
         """
@@ -62,3 +78,117 @@ class UserContributionsCollection(Query):
             "repository": raw_data["totalRepositoryContributions"]  # Total repository contributions.
         })
         return contribution_collection
+
+
+class UserContributionsCollectionMultiWindow(Query):
+    """
+    UserContributionsCollectionMultiWindow fetches several contributionsCollection windows of a user in a
+    single request, aliasing each window (w0, w1, ...). GitHub limits a contributionsCollection to one year,
+    so an account's whole lifetime is covered by one window per year.
+    """
+
+    def __init__(self, windows: List[Tuple[str, str]]) -> None:
+        """
+        Initializes a UserContributionsCollectionMultiWindow query object for the given time windows.
+
+        Args:
+            windows (List[Tuple[str, str]]): The (start, end) time strings of each window, at most one year apart.
+        """
+        super().__init__(
+            fields=[
+                QueryNode(
+                    "user",
+                    args={"login": "$user"},  # The GitHub username for which to fetch contribution data.
+                    fields=[
+                        QueryNode(
+                            f"w{index}: contributionsCollection",
+                            args={"from": f'"{start}"', "to": f'"{end}"'},  # Time period of the window.
+                            fields=list(CONTRIBUTION_FIELDS)
+                        )
+                        for index, (start, end) in enumerate(windows)
+                    ]
+                )
+            ]
+        )
+        self.windows = windows
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def cache_ttl(self, substitutions: Dict[str, Any]) -> Optional[float]:
+        """
+        The windows are cached forever once all of them ended in the past.
+
+        Args:
+            substitutions (Dict[str, Any]): The substitutions the query is executed with.
+
+        Returns:
+            Optional[float]: None if every window has ended, otherwise a short lifetime.
+        """
+        now = UserContributionsCollectionMultiWindow._now()
+        if all(end < now for _, end in self.windows):
+            return None
+        return Query.SHORT_CACHE_TTL
+
+    @staticmethod
+    def batches(windows: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Groups windows into the requests they are sent with. The windows that ended in the past are sent apart
+        from the window still open, which changes with every run, so that their request is cached forever.
+
+        Args:
+            windows (List[Tuple[str, str]]): The (start, end) time strings of each window.
+
+        Returns:
+            List[List[Tuple[str, str]]]: The closed windows and the open ones, leaving out an empty group.
+        """
+        now = UserContributionsCollectionMultiWindow._now()
+        closed = [window for window in windows if window[1] < now]
+        still_open = [window for window in windows if window[1] >= now]
+        return [batch for batch in (closed, still_open) if batch]
+
+    @staticmethod
+    def yearly_windows(start: str, end: str) -> List[Tuple[str, str]]:
+        """
+        Splits a time span into consecutive windows of at most one year.
+
+        Args:
+            start (str): The start of the time span, formatted as "%Y-%m-%dT%H:%M:%SZ".
+            end (str): The end of the time span, formatted as "%Y-%m-%dT%H:%M:%SZ".
+
+        Returns:
+            List[Tuple[str, str]]: The (start, end) time strings of each window.
+        """
+        windows = []
+        period_end = helper.add_by_days(start, 365)
+        while start < end:
+            if period_end > end:
+                period_end = end
+            windows.append((start, period_end))
+            start = period_end
+            period_end = helper.add_by_days(start, 365)
+        return windows
+
+    @staticmethod
+    def user_contributions_collection(*raw_data: Dict[str, Any]) -> Counter:
+        """
+        Sums the contribution counts of every window of every response into a single countable collection.
+        Unlike adding Counters, counts that stay at zero are kept.
+
+        Args:
+            *raw_data (dict): The raw data returned by the queries of each batch, with one aliased
+                              contributionsCollection per window.
+
+        Returns:
+            Counter: A collection counter aggregating the various types of contributions made by the user.
+        """
+        contribution_collection = Counter({
+            "res_con": 0, "commit": 0, "issue": 0, "pr": 0, "pr_review": 0, "repository": 0
+        })
+        windows = [window for response in raw_data for window in response["user"].values()]
+        for window in windows:
+            contribution_collection.update(
+                UserContributionsCollection.user_contributions_collection({"user": {"contributionsCollection": window}})
+            )
+        return contribution_collection
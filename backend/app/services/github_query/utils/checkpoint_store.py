@@ -0,0 +1,113 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+
+def _to_json(value: Any) -> Any:
+    # numpy scalars, e.g. counts read back from a DataFrame, are stored as their python value
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class CheckpointStore:
+    """
+    CheckpointStore journals the progress of a mining run in a SQLite database, so that a run that dies
+    (e.g. once the client gives up retrying, or on a process restart) can be restarted without mining again
+    what was already mined. It keeps the results of every completed entity (login or repository link) and,
+    for the entity in flight, the state of each of its streams: the cursor of the last page that was fully
+    processed and the aggregates up to that page.
+    """
+
+    # seconds a write waits for the connections of other processes to release the database
+    BUSY_TIMEOUT = 60
+
+    def __init__(self, path: str = "github_query_checkpoint.sqlite3") -> None:
+        """
+        Opens the checkpoint database, creating it if it does not exist yet. The worker processes of a run
+        write to the same file, so the database is journaled in WAL mode, where writers do not block readers,
+        and a write waits up to BUSY_TIMEOUT seconds for another process's write instead of failing.
+
+        Args:
+            path (str): The path of the SQLite database file. Every run should use its own file.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=CheckpointStore.BUSY_TIMEOUT, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS completed (entity TEXT PRIMARY KEY, results TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS progress "
+                "(entity TEXT NOT NULL, stream TEXT NOT NULL, state TEXT NOT NULL, PRIMARY KEY (entity, stream))"
+            )
+
+    def completed(self, entity: str) -> Optional[Dict[str, Any]]:
+        """
+        Looks up the results journaled for a completed entity.
+
+        Args:
+            entity (str): The login or repository link.
+
+        Returns:
+            Optional[Dict[str, Any]]: The results of the entity, or None if it was not completed yet.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT results FROM completed WHERE entity = ?", (entity,)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def complete(self, entity: str, results: Dict[str, Any]) -> None:
+        """
+        Journals the results of an entity and drops the progress of its streams, in a single transaction.
+
+        Args:
+            entity (str): The login or repository link.
+            results (Dict[str, Any]): The results of the entity, e.g. the rows it added to each buffer.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completed (entity, results) VALUES (?, ?)",
+                (entity, json.dumps(results, default=_to_json)),
+            )
+            self._connection.execute("DELETE FROM progress WHERE entity = ?", (entity,))
+
+    def progress(self, entity: str) -> Dict[str, Any]:
+        """
+        Looks up the state of the streams of an entity in flight.
+
+        Args:
+            entity (str): The login or repository link.
+
+        Returns:
+            Dict[str, Any]: The state of each stream, keyed by stream, empty if nothing was checkpointed.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT stream, state FROM progress WHERE entity = ?", (entity,)
+            ).fetchall()
+        return {stream: json.loads(state) for stream, state in rows}
+
+    def save_progress(self, entity: str, stream: str, state: Any) -> None:
+        """
+        Checkpoints the state of a stream of an entity in flight, replacing its previous state.
+
+        Args:
+            entity (str): The login or repository link.
+            stream (str): The stream of the entity, e.g. a paginated query.
+            state (Any): The JSON serializable state of the stream, e.g. a cursor and the aggregates so far.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO progress (entity, stream, state) VALUES (?, ?, ?)",
+                (entity, stream, json.dumps(state, default=_to_json)),
+            )
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._connection.close()
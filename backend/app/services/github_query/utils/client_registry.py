@@ -0,0 +1,89 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class ClientRegistry:
+    """
+    ClientRegistry keeps one client per token, so that the requests of the same user reuse the connection
+    pool, rate limit state, etc. of a single client instead of building a new one every time. The registry
+    is bounded: the least recently used client is dropped once it is full, and clients unused for longer
+    than the idle timeout are dropped on the next lookup. Tokens are only kept as hashes.
+    """
+
+    def __init__(self, factory: Callable[[str], Any], max_size: int = 128, idle_timeout: Optional[float] = None,
+                 on_evict: Optional[Callable[[Any], None]] = None) -> None:
+        """
+        Args:
+            factory (Callable[[str], Any]): Builds the client of a token.
+            max_size (int): The maximum number of clients kept.
+            idle_timeout (Optional[float]): The number of seconds after which an unused client is dropped,
+                                            or None to only drop clients when the registry is full.
+            on_evict (Optional[Callable[[Any], None]]): Called with every dropped client, e.g. to close it.
+                                                       It must not break requests the client is still sending.
+        """
+        self._factory = factory
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        # hash of a token -> [client, time of its last lookup], least recently used first
+        self._clients = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _evict(self, now: float) -> list:
+        evicted = []
+        if self._idle_timeout is not None:
+            while self._clients:
+                key, (client, last_used) = next(iter(self._clients.items()))
+                if now - last_used <= self._idle_timeout:
+                    break
+                del self._clients[key]
+                evicted.append(client)
+        while len(self._clients) > self._max_size:
+            evicted.append(self._clients.popitem(last=False)[1][0])
+        return evicted
+
+    def get(self, token: str) -> Any:
+        """
+        Returns the client of a token, building it on the first lookup.
+
+        Args:
+            token (str): The token the client authenticates with.
+
+        Returns:
+            Any: The client of the token.
+        """
+        key = ClientRegistry._key(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                entry = self._clients[key] = [self._factory(token), now]
+            else:
+                entry[1] = now
+                self._clients.move_to_end(key)
+            evicted = self._evict(now)
+        for client in evicted:
+            if self._on_evict is not None:
+                self._on_evict(client)
+        return entry[0]
+
+    def clear(self) -> None:
+        """
+        Drops every client.
+        """
+        with self._lock:
+            evicted = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        for client in evicted:
+            if self._on_evict is not None:
+                self._on_evict(client)
+
+    def __len__(self) -> int:
+        return len(self._clients)
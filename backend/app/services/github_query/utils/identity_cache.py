@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+from backend.app.services.github_query.github_graphql.client import Client
+from backend.app.services.github_query.github_graphql.async_client import AsyncClient
+from backend.app.services.github_query.queries.profiles.user_login import UserLogin, UserLoginViewer
+
+# marks logins without a live cache entry, as None marks logins that do not exist
+_MISSING = object()
+
+
+class UserIdentityCache:
+    """
+    UserIdentityCache keeps the identity of GitHub users (login, id, creation time, ...) for a while, so that
+    miners and services resolving the same logins again and again do not send a request every time.
+    Cache misses are resolved in bulk, merged into aliased UserLogin requests, and logins already being
+    resolved by another thread are waited for instead of being requested twice.
+    """
+
+    def __init__(self, ttl: float = 24 * 60 * 60) -> None:
+        """
+        Args:
+            ttl (float): The number of seconds an identity is kept, including the fact that a login does not exist.
+        """
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # login (lower case) -> (expiry, identity or None for logins that do not exist)
+        self._identities = {}
+        # login (lower case) -> event set once the thread resolving it is done
+        self._pending = {}
+        # hash of a token -> (expiry, login of the token's user)
+        self._viewers = {}
+
+    def _lookup(self, key: str) -> Any:
+        entry = self._identities.get(key)
+        if entry is None or entry[0] <= time.time():
+            return _MISSING
+        return entry[1]
+
+    def resolve(self, client: Client, logins: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Looks up the identity of several users, resolving the misses with as few aliased requests as possible.
+
+        Args:
+            client (Client): The client sending the requests of the misses.
+            logins (Iterable[str]): The logins to look up. Logins are case-insensitive.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: The UserLogin fields of each login, or None for logins that
+                                                 do not exist, keyed by the logins as given.
+        """
+        logins = list(logins)
+        keys = {login.lower() for login in logins}
+        owned = []
+        waiting = []
+        with self._lock:
+            for key in keys:
+                if self._lookup(key) is not _MISSING:
+                    continue
+                if key in self._pending:
+                    waiting.append(self._pending[key])
+                else:
+                    self._pending[key] = threading.Event()
+                    owned.append(key)
+
+        if owned:
+            try:
+                users = client.execute_batch(query=UserLogin(), substitutions=[{"user": key} for key in owned])
+            except Exception:
+                with self._lock:
+                    for key in owned:
+                        self._pending.pop(key).set()
+                raise
+            expiry = time.time() + self._ttl
+            with self._lock:
+                for key, user in zip(owned, users):
+                    self._identities[key] = (expiry, user["user"] if user else None)
+                    self._pending.pop(key).set()
+        for event in waiting:
+            event.wait()
+
+        identities = {}
+        with self._lock:
+            for login in logins:
+                identity = self._lookup(login.lower())
+                # a login another thread failed to resolve is left unresolved
+                identities[login] = None if identity is _MISSING else identity
+        return identities
+
+    def get(self, client: Client, login: str) -> Optional[Dict[str, Any]]:
+        """
+        Looks up the identity of a user.
+
+        Args:
+            client (Client): The client sending the request on a miss.
+            login (str): The login of the user.
+
+        Returns:
+            Optional[Dict[str, Any]]: The UserLogin fields of the user, or None if the login does not exist.
+        """
+        return self.resolve(client, [login])[login]
+
+    async def get_async(self, client: AsyncClient, login: str) -> Optional[Dict[str, Any]]:
+        """
+        Looks up the identity of a user with an AsyncClient. A miss does not wait for threads resolving
+        the same login, as that would block the event loop, so concurrent misses may be requested twice.
+
+        Args:
+            client (AsyncClient): The client sending the request on a miss.
+            login (str): The login of the user.
+
+        Returns:
+            Optional[Dict[str, Any]]: The UserLogin fields of the user, or None if the login does not exist.
+        """
+        key = login.lower()
+        with self._lock:
+            identity = self._lookup(key)
+        if identity is not _MISSING:
+            return identity
+        user = (await client.execute_batch(query=UserLogin(), substitutions=[{"user": key}]))[0]
+        with self._lock:
+            self._identities[key] = (time.time() + self._ttl, user["user"] if user else None)
+        return user["user"] if user else None
+
+    def viewer(self, client: Client, token: str) -> str:
+        """
+        Looks up the login of the user a token belongs to.
+
+        Args:
+            client (Client): The client authenticated with the token, sending the request on a miss.
+            token (str): The token, only kept as a hash.
+
+        Returns:
+            str: The login of the token's user.
+
+        Raises:
+            QueryFailedException: If the viewer cannot be queried, e.g. because the token was revoked.
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        with self._lock:
+            entry = self._viewers.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+        login = client.execute(query=UserLoginViewer(), substitutions={})["viewer"]["login"]
+        with self._lock:
+            self._viewers[key] = (time.time() + self._ttl, login)
+        return login
+
+    def clear(self) -> None:
+        """
+        Forgets every cached identity.
+        """
+        with self._lock:
+            self._identities.clear()
+            self._viewers.clear()
+
+
+# shared by the miners and the services of a process
+user_identities = UserIdentityCache()
@@ -0,0 +1,111 @@
+import os
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from backend.app.services.github_query.utils.result_sink import ResultSink
+
+
+class ParquetSink(ResultSink):
+    """
+    ParquetSink streams the flushed chunks into Parquet files with a fixed schema, one row group per chunk,
+    and rotates to a new file once the current one reaches a size limit. Files are named
+    <prefix>-00000.parquet, <prefix>-00001.parquet, ... so a directory can be scanned as a single dataset.
+    """
+
+    def __init__(self, directory: str, prefix: str, schema: pa.Schema, max_file_bytes: int = 128 * 1024 * 1024,
+                 compression: str = "snappy") -> None:
+        """
+        Args:
+            directory (str): The directory the files are written to. It is created if it does not exist yet.
+            prefix (str): The prefix of the file names.
+            schema (pa.Schema): The schema of every file. Columns of the schema missing from a chunk are
+                                written as nulls, while chunks holding columns outside the schema are refused.
+            max_file_bytes (int): The size after which the next chunk goes to a new file.
+            compression (str): The Parquet compression codec.
+        """
+        self._directory = directory
+        self._prefix = prefix
+        self._schema = schema
+        self._max_file_bytes = max_file_bytes
+        self._compression = compression
+        self._file = None
+        self._writer = None
+        self.files = []
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def schema(columns: List[str], dtypes: Optional[Dict[str, str]] = None,
+               map_columns: Iterable[str] = ()) -> pa.Schema:
+        """
+        Builds the schema of a miner's rows from the columns and dtypes of its row buffer.
+
+        Args:
+            columns (List[str]): The columns of the rows, in order.
+            dtypes (Optional[Dict[str, str]]): The pandas dtype of the columns, "Int64" columns become int64.
+            map_columns (Iterable[str]): The columns holding {name: count} dictionaries, e.g. the languages
+                                         of each repository type, which become map<string, int64>.
+
+        Returns:
+            pa.Schema: The schema of the files. The other columns are strings.
+        """
+        dtypes = dtypes or {}
+        map_columns = set(map_columns)
+        fields = []
+        for column in columns:
+            if column in map_columns:
+                fields.append(pa.field(column, pa.map_(pa.string(), pa.int64())))
+            elif dtypes.get(column) == "Int64":
+                fields.append(pa.field(column, pa.int64()))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        return pa.schema(fields)
+
+    def _open(self) -> None:
+        path = os.path.join(self._directory, f"{self._prefix}-{len(self.files):05d}.parquet")
+        self._file = pa.OSFile(path, "wb")
+        self._writer = pq.ParquetWriter(self._file, self._schema, compression=self._compression)
+        self.files.append(path)
+
+    def _close_file(self) -> None:
+        self._writer.close()
+        self._file.close()
+        self._writer = None
+        self._file = None
+
+    def _table(self, frame: pd.DataFrame) -> pa.Table:
+        unknown = [column for column in frame.columns if column not in self._schema.names]
+        if unknown:
+            raise ValueError(f"Columns {unknown} are not part of the schema of {self._prefix}")
+        arrays = []
+        for field in self._schema:
+            if field.name in frame:
+                arrays.append(pa.array(frame[field.name], type=field.type, from_pandas=True))
+            else:
+                arrays.append(pa.nulls(len(frame), type=field.type))
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        """
+        Writes a chunk as a row group of the current file, then rotates the file if it reached the size limit.
+
+        Args:
+            frame (pd.DataFrame): The rows flushed by a miner.
+
+        Raises:
+            ValueError: If the chunk holds columns outside the schema, which would otherwise be lost.
+        """
+        if frame.empty:
+            return
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(self._table(frame))
+        if self._file.tell() >= self._max_file_bytes:
+            self._close_file()
+
+    def close(self) -> None:
+        """
+        Closes the current file, writing its footer.
+        """
+        if self._writer is not None:
+            self._close_file()
@@ -0,0 +1,39 @@
+import os
+import pandas as pd
+
+
+class ResultSink:
+    """
+    ResultSink is the destination of the rows flushed by the miners. Each flush hands the sink a chunk of
+    rows as a DataFrame, so a long run only keeps the rows mined since its last flush in memory.
+    """
+
+    def write(self, frame: pd.DataFrame) -> None:
+        """
+        Writes a chunk of rows.
+
+        Args:
+            frame (pd.DataFrame): The rows flushed by a miner.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Finalizes the written output. Sinks that keep no file open do nothing.
+        """
+
+
+class CsvSink(ResultSink):
+    """
+    CsvSink appends every chunk to a single CSV file, writing the header only when it creates the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): The CSV file to append to.
+        """
+        self.path = path
+
+    def write(self, frame: pd.DataFrame) -> None:
+        frame.to_csv(self.path, mode="a", header=not os.path.exists(self.path), index=False)
@@ -0,0 +1,116 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+import pandas as pd
+from backend.app.services.github_query.utils.result_sink import ResultSink, CsvSink
+
+
+class RowBuffer:
+    """
+    RowBuffer is an append-only, column-oriented accumulator of result rows. Appending a row only
+    appends its values to one list per column; the DataFrame is built once, when it is requested,
+    instead of copying the whole frame on every appended row as repeated pd.concat calls do.
+    """
+
+    def __init__(self, columns: List[str], dtypes: Optional[Dict[str, str]] = None) -> None:
+        """
+        Initializes an empty buffer.
+
+        Args:
+            columns (List[str]): The columns of the rows, in order.
+            dtypes (Optional[Dict[str, str]]): The pandas dtype of the columns that should not be kept as objects,
+                                               e.g. "Int64" for nullable counts.
+        """
+        self._columns = {column: [] for column in columns}
+        self._dtypes = dict(dtypes or {})
+        self._length = 0
+        self._frame = None
+        self.flushed_rows = 0
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """
+        Appends a row. Columns missing from the row are filled with pd.NA, and columns the buffer
+        does not know yet are added, filled with pd.NA for the previous rows.
+
+        Args:
+            row (Dict[str, Any]): The values of the row, keyed by column.
+        """
+        for column in row:
+            if column not in self._columns:
+                self._columns[column] = [pd.NA] * self._length
+        for column, values in self._columns.items():
+            values.append(row.get(column, pd.NA))
+        self._length += 1
+        self._frame = None
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Appends several rows.
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): The rows to append.
+        """
+        for row in rows:
+            self.append(row)
+
+    def merge(self, other: 'RowBuffer') -> None:
+        """
+        Appends the buffered rows of another buffer, e.g. the one of another worker.
+
+        Args:
+            other (RowBuffer): The buffer whose rows are appended.
+        """
+        self.extend(other.rows())
+        self.flushed_rows += other.flushed_rows
+
+    def rows(self) -> Iterable[Dict[str, Any]]:
+        """
+        Iterates over the buffered rows.
+
+        Returns:
+            Iterable[Dict[str, Any]]: The buffered rows, keyed by column.
+        """
+        columns = list(self._columns)
+        for values in zip(*self._columns.values()):
+            yield dict(zip(columns, values))
+
+    def _column(self, column: str, values: List[Any]) -> Any:
+        dtype = self._dtypes.get(column)
+        if dtype is None:
+            return values
+        try:
+            return pd.array(values, dtype=dtype)
+        except (TypeError, ValueError):
+            # a value that does not fit the dtype, e.g. an error message, keeps the column as objects
+            return pd.array(values, dtype=object)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Materializes the buffered rows as a DataFrame. The frame is cached until the next append.
+
+        Returns:
+            pd.DataFrame: The buffered rows.
+        """
+        if self._frame is None:
+            self._frame = pd.DataFrame({column: self._column(column, values)
+                                        for column, values in self._columns.items()},
+                                       columns=list(self._columns))
+        return self._frame
+
+    def flush(self, target: Union[str, ResultSink]) -> None:
+        """
+        Writes the buffered rows to a sink and empties the buffer, so that long runs
+        do not keep every row in memory.
+
+        Args:
+            target (Union[str, ResultSink]): The sink to write to, or the path of a CSV file to append to.
+        """
+        if self._length == 0:
+            return
+        sink = CsvSink(target) if isinstance(target, str) else target
+        sink.write(self.to_frame())
+        self.flushed_rows += self._length
+        self._columns = {column: [] for column in self._columns}
+        self._length = 0
+        self._frame = None
+
+    def __len__(self) -> int:
+        return self._length
@@ -1,8 +1,13 @@
+import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from flask import jsonify, session
-from functools import reduce
 from datetime import datetime
+from typing import Any, Callable, Iterator, List, Tuple
+from urllib.parse import parse_qs, urlparse
+from requests.adapters import HTTPAdapter
 from backend.app.services.github_query.github_rest.client import RESTClient
+from backend.app.services.github_query.github_rest.conditional_cache import ConditionalRequestCache
 
 
 def slice_dict(dictionary, keys):
@@ -204,33 +209,146 @@ class Http:
 
     BASE_URL = "https://api.github.com"
 
-    @staticmethod
-    def fetch(endpoint: str = None):
-        """
-        This method is used to fetch details using GitHub API. The request headers contain a auth token.
+    # number of endpoints aggregate_all reads at the same time
+    MAX_CONCURRENT_REQUESTS = 16
 
-        Args:
-            endpoint (str): The GitHub API endpoint to which the request has to be made
+    # pooled session shared by every request, so connections are kept alive across calls and threads.
+    # Every worker of aggregate_all reads a stream whose pages are requested by its own prefetching thread,
+    # so the pool keeps a connection for both
+    _session = requests.Session()
+    _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=2 * MAX_CONCURRENT_REQUESTS))
 
-        Returns:
-            A response object if the request is successfull. Throws error otherwise.
-        """
+    # responses revalidated with conditional requests, persisted to REST_CACHE_PATH when it is set
+    _cache = ConditionalRequestCache(path=os.environ.get("REST_CACHE_PATH"))
+
+    @staticmethod
+    def _headers():
         token = session.get("access_token")
         if not token:
             raise Exception({"error": "User not authenticated"})
-
-        url = Http.BASE_URL + endpoint
-        headers = {
+        return {
             "Authorization": f"Bearer {token}",
             "Accept": "application/vnd.github+json",
         }
 
-        res = requests.get(url, headers=headers)
+    @staticmethod
+    def _get(url, headers):
+        key = ConditionalRequestCache.key(url, headers["Authorization"])
+        cached = Http._cache.get(key)
+        if cached is not None:
+            headers = {**headers, **ConditionalRequestCache.conditional_headers(cached)}
+        res = Http._session.get(url, headers=headers)
+        if res.status_code == 304 and cached is not None:
+            return ConditionalRequestCache.to_response(cached, url)
         if res.status_code == 200:
+            Http._cache.set(key, res)
             return res
         else:
             raise Exception({"error": res.json()["message"]})
 
+    @staticmethod
+    def fetch(endpoint: str = None):
+        """
+        This method is used to fetch details using GitHub API. The request headers contain a auth token.
+
+        Args:
+            endpoint (str): The GitHub API endpoint to which the request has to be made
+
+        Returns:
+            A response object if the request is successfull. Throws error otherwise.
+        """
+        return Http._get(Http.BASE_URL + endpoint, Http._headers())
+
+    @staticmethod
+    def _paginated_url(endpoint, per_page):
+        url = endpoint if endpoint.startswith("http") else Http.BASE_URL + endpoint
+        return url + ("&" if "?" in url else "?") + f"per_page={per_page}"
+
+    @staticmethod
+    def paginate(endpoint: str, per_page: int = 100, headers=None) -> Iterator[Any]:
+        """
+        This method is used to iterate over every item of a paginated GitHub API endpoint, following the
+        rel="next" links of the responses. The next page is requested while the items of the current one are processed.
+
+        Args:
+            endpoint (str): The GitHub API endpoint, or the URL, of the first page
+            per_page (int): The number of items per page, at most 100
+            headers (dict): The request headers, read from the session when omitted
+
+        Returns:
+            A generator of the items of every page. Throws error if a page cannot be fetched.
+        """
+        if headers is None:
+            headers = Http._headers()
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            page = prefetcher.submit(Http._get, Http._paginated_url(endpoint, per_page), headers)
+            while page is not None:
+                res = page.result()
+                next_page = res.links.get("next")
+                page = prefetcher.submit(Http._get, next_page["url"], headers) if next_page else None
+                yield from res.json()
+
+    @staticmethod
+    def aggregate_all(streams: List[Tuple[str, Callable[[Iterator[Any]], Any]]],
+                      max_workers: int = MAX_CONCURRENT_REQUESTS) -> List[Any]:
+        """
+        This method is used to read several paginated GitHub API endpoints concurrently, over the shared session,
+        aggregating the items of each endpoint as they are streamed instead of keeping them.
+        The token is read from the session of the calling request, as the worker threads have no request context.
+
+        Args:
+            streams (List[Tuple[str, Callable]]): The endpoints, each with the function aggregating its items
+            max_workers (int): The number of endpoints read at the same time
+
+        Returns:
+            The aggregate of every endpoint, in order. Throws the error of the first failed request otherwise.
+        """
+        headers = Http._headers()
+        if not streams:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(streams))) as executor:
+            return list(executor.map(lambda stream: stream[1](Http.paginate(stream[0], headers=headers)), streams))
+
+    @staticmethod
+    def count(endpoint: str, headers=None) -> int:
+        """
+        This method is used to count the items of a paginated GitHub API endpoint without listing them. A single item
+        is requested per page, so the number of the rel="last" page of the Link header is the number of items.
+
+        Args:
+            endpoint (str): The GitHub API endpoint, or the URL, to count the items of
+            headers (dict): The request headers, read from the session when omitted
+
+        Returns:
+            The number of items of the endpoint. Throws error if the request fails.
+        """
+        if headers is None:
+            headers = Http._headers()
+        res = Http._get(Http._paginated_url(endpoint, 1), headers)
+        last_page = res.links.get("last")
+        if last_page is None:
+            # a single page, holding the only item if any
+            return len(res.json())
+        return int(parse_qs(urlparse(last_page["url"]).query)["page"][0])
+
+    @staticmethod
+    def count_all(endpoints: List[str], max_workers: int = MAX_CONCURRENT_REQUESTS) -> List[int]:
+        """
+        This method is used to count the items of several paginated GitHub API endpoints concurrently.
+
+        Args:
+            endpoints (List[str]): The endpoints to count the items of
+            max_workers (int): The number of endpoints counted at the same time
+
+        Returns:
+            The number of items of every endpoint, in order. Throws the error of the first failed request otherwise.
+        """
+        headers = Http._headers()
+        if not endpoints:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(endpoints))) as executor:
+            return list(executor.map(lambda endpoint: Http.count(endpoint, headers), endpoints))
+
     @staticmethod
     def get(url=None):
         """
@@ -242,20 +360,19 @@ class Http:
         Returns:
             A response object if the request is successfull. Throws error otherwise.
         """
-        token = session.get("access_token")
-        if not token:
-            raise Exception({"error": "User not authenticated"})
+        return Http._get(url, Http._headers())
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/vnd.github+json",
-        }
 
-        res = requests.get(url, headers=headers)
-        if res.status_code == 200:
-            return res
-        else:
-            raise Exception({"error": res.json()["message"]})
+def count_with_comments(items):
+    """
+    Counts the items streamed from a paginated endpoint, and the comments of these items.
+    """
+    count = 0
+    comments = 0
+    for item in items:
+        count += 1
+        comments += item["comments"]
+    return count, comments
 
 
 def get_user_profile_stats(username: str):
@@ -272,23 +389,21 @@ def get_user_profile_stats(username: str):
     """
     try:
         user = Http.fetch(f"/users/{username}").json()
-        gists = Http.fetch(f"/users/{username}/gists").json()
-        gist_comments = reduce(lambda acc, x: acc + x["comments"], gists, 0)
-        issues = Http.fetch("/issues").json()
-        print(issues)
-        issue_comments = reduce(lambda acc, x: acc + x["comments"], issues, 0)
-        projects = Http.fetch(f"/users/{username}/projects").json()
-        repos = Http.get(user["repos_url"]).json()
-        pull_requests = 0
-        commit_comments = 0
-        for repo in repos:
-            ele = Http.fetch(f'/repos/{username}/{repo["name"]}/pulls').json()
-            comments = Http.fetch(
-                f'/repos/{username}/{repo["name"]}/comments').json()
-            pull_requests += len(ele)
-            commit_comments += len(comments)
-        starred = Http.fetch(f"/users/{username}/starred").json()
-        watching = Http.fetch(f"/users/{username}/subscriptions").json()
+        repos = [repo["name"] for repo in Http.paginate(user["repos_url"])]
+        # the comments of gists and issues are only known by listing them, every other metric is a count
+        (gists, gist_comments), (issues, issue_comments) = Http.aggregate_all([
+            (f"/users/{username}/gists", count_with_comments),
+            ("/issues", count_with_comments),
+        ])
+        per_repo = [f"/repos/{username}/{repo}/{resource}" for repo in repos for resource in ("pulls", "comments")]
+        counts = Http.count_all([
+            f"/users/{username}/projects",
+            f"/users/{username}/starred",
+            f"/users/{username}/subscriptions",
+        ] + per_repo)
+        projects, starred, watching = counts[:3]
+        pull_requests = sum(counts[3::2])
+        commit_comments = sum(counts[4::2])
 
         res = {
             "commit_comments": commit_comments,
@@ -297,17 +412,17 @@ def get_user_profile_stats(username: str):
             "followers": user["followers"],
             "following": user["following"],
             "gist_comments": gist_comments,
-            "gists": len(gists),
+            "gists": gists,
             "github": user["login"],
             "issue_comments": issue_comments,
-            "issues": len(issues),
-            "projects": len(projects),
+            "issues": issues,
+            "projects": projects,
             "pull_requests": pull_requests,
             "repositories": user["public_repos"],
             # "repository_discussion_comments": 0,
             # "repository_discussions": 0,
-            "starred_repositories": len(starred),
-            "watching": len(watching),
+            "starred_repositories": starred,
+            "watching": watching,
         }
         return jsonify(res)
     except Exception as e:
@@ -325,85 +440,62 @@ def get_user_contributions(username, start, end):
         dict: A dictionary containing the specified user's contributions.
     """
 
-    def count_commits():
-        for repo in repos:
-            commits = Http.fetch(
-                f"/repos/{username}/{repo['name']}/commits?author={user['login']}&since={start}&until={end}"
-            ).json()
-            if commits:
-                return len(commits)
-            return 0
-
-    def count_issues():
-        for repo in repos:
-            issues = Http.fetch(
-                f"/repos/{username}/{repo['name']}/issues?state=open&creator={username}&since={start}"
-            ).json()
-            if issues:
-                return len(issues)
-            return 0
-
-    def count_pull_requests():
-        count = 0
-        for repo in repos:
-            prs = Http.fetch(
-                f"/repos/{username}/{repo['name']}/pulls?state=open"
-            ).json()
-            for pr in prs:
-                start_date = datetime.strptime(
-                    start.split("+")[0][1:] + "Z", r"%Y-%m-%dT%H:%M:%S%z"
-                )
-                end_date = datetime.strptime(
-                    end.split("+")[0][1:] + "Z", r"%Y-%m-%dT%H:%M:%S%z"
-                )
-                created_at = datetime.strptime(
-                    pr["created_at"], r"%Y-%m-%dT%H:%M:%S%z")
-                if (
-                    pr["head"]["user"]["login"].lower() == username.lower()
-                    and created_at > start_date
-                    and created_at < end_date
-                ):
-                    count += 1
-        return count
+    def parse_date(date):
+        return datetime.strptime(date.strip('"').split("+")[0].rstrip("Z") + "Z", r"%Y-%m-%dT%H:%M:%S%z")
 
-    def count_pull_request_reviews():
-        count = 0
-        for repo in repos:
-            prs = Http.fetch(
-                f"/repos/{username}/{repo['name']}/pulls?state=closed"
-            ).json()
+    def pull_request_counter(date_field):
+        start_date = parse_date(start)
+        end_date = parse_date(end)
+
+        def count_pull_requests(prs):
+            count = 0
             for pr in prs:
-                start_date = datetime.strptime(
-                    start.split("+")[0][1:] + "Z", r"%Y-%m-%dT%H:%M:%S%z"
-                )
-                end_date = datetime.strptime(
-                    end.split("+")[0][1:] + "Z", r"%Y-%m-%dT%H:%M:%S%z"
-                )
-                closed_at = datetime.strptime(
-                    pr["closed_at"], r"%Y-%m-%dT%H:%M:%S%z")
+                date = datetime.strptime(pr[date_field], r"%Y-%m-%dT%H:%M:%S%z")
                 if (
                     pr["head"]["user"]["login"].lower() == username.lower()
-                    and closed_at > start_date
-                    and closed_at < end_date
+                    and date > start_date
+                    and date < end_date
                 ):
                     count += 1
-        return count
+            return count
+        return count_pull_requests
 
-    def count_restricted_contributions():
-        repositories = Http.fetch(f"/users/{username}/repos?type=all").json()
-        private_repos = list(filter(lambda x: x["private"], repositories))
-        return len(private_repos)
+    def count_private(repositories):
+        return sum(1 for repository in repositories if repository["private"])
 
     try:
         user = Http.fetch(f"/users/{username}").json()
-        repos = Http.get(user["repos_url"]).json()
-        commit_count = count_commits()
-        issues = count_issues()
-        pr = count_pull_requests()
-        pr_reviews = count_pull_request_reviews()
-        repo_contributions = len(Http.fetch(
-            f"/users/{username}/repos?type=all").json())
-        res_con = count_restricted_contributions()
+        repos = [repo["name"] for repo in Http.paginate(user["repos_url"])]
+        # pull requests are filtered by author and date, so they are listed, while commits and issues are counted
+        count_opened = pull_request_counter("created_at")
+        count_closed = pull_request_counter("closed_at")
+        streams = []
+        counted = []
+        for repo in repos:
+            streams.extend([
+                (f"/repos/{username}/{repo}/pulls?state=open", count_opened),
+                (f"/repos/{username}/{repo}/pulls?state=closed", count_closed),
+            ])
+            counted.extend([
+                f"/repos/{username}/{repo}/commits?author={user['login']}&since={start}&until={end}",
+                f"/repos/{username}/{repo}/issues?state=open&creator={username}&since={start}",
+            ])
+        viewer = Http.fetch("/user").json()
+        own_token = viewer["login"].lower() == username.lower()
+        if own_token:
+            # the user's own token sees its private repositories, which can then be counted
+            counted.append("/user/repos?visibility=private")
+        else:
+            # keep the private repositories another token is allowed to list
+            streams.append((f"/users/{username}/repos?type=all", count_private))
+        results = Http.aggregate_all(streams)
+        counts = Http.count_all(counted + [f"/users/{username}/repos?type=all"])
+        repo_contributions = counts.pop()
+        res_con = counts.pop() if own_token else results.pop()
+        commit_count = sum(counts[0::2])
+        issues = sum(counts[1::2])
+        pr = sum(results[0::2])
+        pr_reviews = sum(results[1::2])
 
         res = {
             "commit": commit_count,
@@ -0,0 +1,31 @@
+import json
+import pytest
+from flask import Flask
+from backend.app.api.github_routes import github_bp
+from backend.app.services.github_graphql_services import graphql_clients
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.register_blueprint(github_bp, url_prefix="/api")
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["access_token"] = "route_token"
+    yield client
+    graphql_clients.clear()
+
+
+class TestUserContributions:
+    def test_graphql_variables(self, client, requests_mock):
+        """Test that the time span is sent as unquoted DateTime variables."""
+        requests_mock.post("https://api.github.com/graphql", json={"data": {"user": {"contributionsCollection": {
+            "restrictedContributionsCount": 1, "totalCommitContributions": 2, "totalIssueContributions": 3,
+            "totalPullRequestContributions": 4, "totalPullRequestReviewContributions": 5,
+            "totalRepositoryContributions": 6}}}})
+        response = client.get("/api/graphql/user-contributions/alice/2020-01-01T00:00/2021-01-01T00:00")
+        assert response.status_code == 200
+        assert response.get_json()["commit"] == 2
+        variables = json.loads(requests_mock.last_request.text)["variables"]
+        assert variables == {"user": "alice", "start": "2020-01-01T00:00:00Z", "end": "2021-01-01T00:00:00Z"}
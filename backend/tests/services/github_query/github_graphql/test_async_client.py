@@ -0,0 +1,105 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock
+from backend.app.services.github_query.github_graphql.async_client import AsyncClient
+from backend.app.services.github_query.github_graphql.client import InvalidAuthenticationError, QueryFailedException
+from backend.app.services.github_query.github_graphql.authentication import PersonalAccessTokenAuthenticator
+from backend.app.services.github_query.github_graphql.query import Query, PaginatedQuery, QueryNode, QueryNodePaginator
+from backend.app.services.github_query.github_graphql.response_cache import ResponseCache
+
+
+def make_response(body, status=200, headers=None):
+    return AsyncClient._to_response(status, headers or {}, json.dumps(body).encode(), "https://api.github.com/graphql")
+
+
+async def run(client, awaitable):
+    async with client:
+        return await awaitable
+
+
+@pytest.fixture
+def async_client():
+    return AsyncClient(authenticator=PersonalAccessTokenAuthenticator(token="valid_token_123"), max_concurrency=2)
+
+
+class TestAsyncClient:
+    def test_client_without_authenticator(self):
+        """Test that client raises error when no authenticator is provided"""
+        with pytest.raises(InvalidAuthenticationError):
+            AsyncClient()
+
+    def test_execute_success(self, async_client):
+        """Test successful execution of a query."""
+        async_client._send = AsyncMock(return_value=make_response({"data": "query success"}))
+        response = asyncio.run(run(async_client, async_client.execute(Query(fields=[QueryNode("viewer", fields=["login"])]), {})))
+        assert response == "query success", "Execute should return success on valid response."
+        assert async_client._send.call_count == 1, "No cost probe should be sent while the budget is unknown."
+
+    def test_execute_query_failed(self, async_client):
+        """Test that a failed query raises QueryFailedException with an inspectable response."""
+        async_client._send = AsyncMock(return_value=make_response({"errors": [{"message": "bad"}]}))
+        with pytest.raises(QueryFailedException) as excinfo:
+            asyncio.run(run(async_client, async_client.execute("query { viewer { login }}", {})))
+        assert excinfo.value.response.json()["errors"][0]["message"] == "bad"
+
+    def test_execution_generator(self, async_client):
+        """Test that paginated queries are yielded page by page."""
+        query = PaginatedQuery(fields=[QueryNode("user", args={"login": "$user"}, fields=[
+            QueryNodePaginator("gists", args={"first": "$pg_size"}, fields=[
+                QueryNode("nodes", fields=["createdAt"]),
+                QueryNode("pageInfo", fields=["endCursor", "hasNextPage"]),
+            ])
+        ])])
+        async_client._send = AsyncMock(side_effect=[
+            make_response({"data": {"user": {"gists": {"nodes": [1], "pageInfo": {"endCursor": "c1", "hasNextPage": True}}}}}),
+            make_response({"data": {"user": {"gists": {"nodes": [2], "pageInfo": {"endCursor": "c2", "hasNextPage": False}}}}}),
+        ])
+
+        async def collect():
+            async with async_client:
+                return [page async for page in async_client.execute(query, {"user": "octocat", "pg_size": 1})]
+
+        pages = asyncio.run(collect())
+        assert [page["user"]["gists"]["nodes"] for page in pages] == [[1], [2]]
+        assert query.paginator.args["after"] == '"c2"'
+
+    def test_concurrency_is_bounded(self, async_client):
+        """Test that no more than max_concurrency requests are in flight."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_send(session, payload, headers, timeout_seconds):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return make_response({"data": "ok"})
+
+        async_client._send = fake_send
+
+        async def run_all():
+            async with async_client:
+                return await asyncio.gather(*[async_client.execute("query { viewer { login }}", {}) for _ in range(6)])
+
+        assert asyncio.run(run_all()) == ["ok"] * 6
+        assert peak == 2, "Requests should run concurrently up to the configured limit."
+
+    def test_response_cache(self):
+        """Test that the responses of cacheable queries are served from the response cache."""
+        class CachedQuery(Query):
+            def cache_ttl(self, substitutions):
+                return None
+
+        client = AsyncClient(authenticator=PersonalAccessTokenAuthenticator(token="valid_token_123"),
+                             response_cache=ResponseCache(":memory:"))
+        client._send = AsyncMock(return_value=make_response({"data": {"user": {"id": "A"}}}))
+        query = CachedQuery(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])])
+
+        async def execute_twice():
+            async with client:
+                return [await client.execute(query, {"user": "octocat"}) for _ in range(2)]
+
+        assert asyncio.run(execute_twice()) == [{"user": {"id": "A"}}] * 2
+        assert client._send.call_count == 1, "The second execution should be served from the cache."
@@ -1,5 +1,6 @@
+import time
 import pytest
-from backend.app.services.github_query.github_graphql.authentication import Authenticator, PersonalAccessTokenAuthenticator 
+from backend.app.services.github_query.github_graphql.authentication import Authenticator, PersonalAccessTokenAuthenticator, TokenPoolAuthenticator
 
 def test_authenticator_raises():
     """
@@ -24,3 +25,45 @@ def test_personal_access_token_authenticator():
     expected_header = {"Authorization": f"token {token}"}
     assert authenticator.get_authorization_header() == expected_header, "The authorization header should be formatted correctly."
 
+
+def test_token_pool_authenticator_requires_tokens():
+    """
+    Test that an empty token pool is rejected.
+    """
+    with pytest.raises(ValueError):
+        TokenPoolAuthenticator(tokens=[])
+
+def test_token_pool_authenticator_picks_most_headroom():
+    """
+    Test that requests are signed with the token that has the most remaining points.
+    """
+    authenticator = TokenPoolAuthenticator(tokens=["token_a", "token_b"])
+    authenticator.get_rate_limit_tracker({"Authorization": "token token_a"}).update_from_headers(
+        {"x-ratelimit-remaining": "200", "x-ratelimit-reset": str(int(time.time()) + 600)})
+    authenticator.get_rate_limit_tracker({"Authorization": "token token_b"}).update_from_headers(
+        {"x-ratelimit-remaining": "4000", "x-ratelimit-reset": str(int(time.time()) + 600)})
+
+    assert authenticator.get_authorization_header() == {"Authorization": "token token_b"}, \
+        "The token with the most headroom should be selected."
+
+def test_token_pool_authenticator_all_exhausted():
+    """
+    Test that the token resetting first is selected once every token is exhausted.
+    """
+    authenticator = TokenPoolAuthenticator(tokens=["token_a", "token_b"], threshold=10)
+    authenticator.get_rate_limit_tracker({"Authorization": "token token_a"}).update_from_headers(
+        {"x-ratelimit-remaining": "5", "x-ratelimit-reset": str(int(time.time()) + 600)})
+    authenticator.get_rate_limit_tracker({"Authorization": "token token_b"}).update_from_headers(
+        {"x-ratelimit-remaining": "8", "x-ratelimit-reset": str(int(time.time()) + 60)})
+
+    header = authenticator.get_authorization_header()
+    assert header == {"Authorization": "token token_b"}, "The token resetting first should be selected."
+    assert authenticator.get_rate_limit_tracker(header).is_near_exhaustion() is True
+
+def test_token_pool_authenticator_unknown_header():
+    """
+    Test that headers not signed by the pool have no tracker.
+    """
+    authenticator = TokenPoolAuthenticator(tokens=["token_a"])
+    assert authenticator.get_rate_limit_tracker({"Authorization": "token other"}) is None
+    assert PersonalAccessTokenAuthenticator(token="token_a").get_rate_limit_tracker({}) is None
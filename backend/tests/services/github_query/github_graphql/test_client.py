@@ -1,11 +1,12 @@
 import pytest
 import requests_mock
 from unittest.mock import MagicMock
-from datetime import datetime
+from datetime import datetime, timedelta
 from requests.exceptions import Timeout
-from backend.app.services.github_query.github_graphql.client import Client, InvalidAuthenticationError, QueryFailedException, RESTClient
-from backend.app.services.github_query.github_graphql.authentication import PersonalAccessTokenAuthenticator 
-from backend.app.services.github_query.github_graphql.query import Query, PaginatedQuery
+from backend.app.services.github_query.github_graphql.client import Client, InvalidAuthenticationError, QueryFailedException
+from backend.app.services.github_query.github_graphql.authentication import PersonalAccessTokenAuthenticator, TokenPoolAuthenticator
+from backend.app.services.github_query.github_graphql.response_cache import ResponseCache
+from backend.app.services.github_query.github_graphql.query import Query, PaginatedQuery, QueryNode, QueryNodePaginator
 
 @pytest.fixture
 def valid_token():
@@ -33,6 +34,34 @@ class TestClient:
         """Test that the base path is correctly constructed"""
         assert "api.github.com" in github_client._base_path(), "Base path should include the host."
     
+    def test_client_owns_pooled_session(self, authenticator):
+        """Test that the client mounts a pooled adapter with the configured size."""
+        client = Client(authenticator=authenticator, pool_connections=4, pool_maxsize=32)
+        adapter = client._session.get_adapter(client._base_path())
+        assert adapter._pool_connections == 4, "Pool connections should be configurable."
+        assert adapter._pool_maxsize == 32, "Pool size should be configurable."
+
+    def test_client_reuses_session(self, github_client, requests_mock):
+        """Test that every request goes through the same session."""
+        requests_mock.post(github_client._base_path(), json={'data': 'success'}, status_code=200)
+        session = github_client._session
+        github_client._retry_request(1, 1, "query { viewer { login }}", {})
+        github_client._retry_request(1, 1, "query { viewer { login }}", {})
+        assert github_client._session is session, "The session should not be recreated between requests."
+        assert requests_mock.call_count == 2
+
+    def test_client_shared_session_not_closed(self, authenticator):
+        """Test that a session passed in by the caller is not closed with the client."""
+        session = MagicMock()
+        with Client(authenticator=authenticator, session=session) as client:
+            assert client._session is session
+        session.close.assert_not_called()
+
+    def test_client_without_keep_alive(self, authenticator):
+        """Test that disabling keep-alive asks the server to close the connection."""
+        client = Client(authenticator=authenticator, keep_alive=False)
+        assert client._generate_headers()["Connection"] == "close"
+
     def test_generate_headers(self, github_client, authenticator):
         """Test that headers are correctly generated including authorization and additional headers."""
         additional_headers = {"Custom-Header": "CustomValue"}
@@ -67,18 +96,30 @@ class TestClient:
         """Test successful execution of a query."""
         # Mock the rate limit pre-check and the actual query execution
         requests_mock.post(github_client._base_path(), [
-            {'json': {"data": {"rateLimit": {"cost": 1, "remaining": 5000, "resetAt": "2021-01-01T00:00:00Z"}}}, 'status_code': 200},
             {'json': {"data": "query success"}, 'status_code': 200}
         ])
         response = github_client._execute("query { viewer { login }}", {})
         assert response == "query success", "Execute should return success on valid response."
 
-    def test_execute_rate_limit_exceeded(self, github_client, requests_mock):
+    def test_execute_skips_cost_probe(self, github_client, requests_mock):
+        """Test that no dry-run request is sent while the tracked budget is healthy."""
+        requests_mock.post(github_client._base_path(), [
+            {'json': {"data": "query success"}, 'status_code': 200,
+             'headers': {'x-ratelimit-remaining': '4999', 'x-ratelimit-reset': '1609459200'}},
+            {'json': {"data": "query success"}, 'status_code': 200},
+        ])
+        github_client._execute("query { viewer { login }}", {})
+        github_client._execute("query { viewer { login }}", {})
+        assert requests_mock.call_count == 2, "Each query should be sent exactly once."
+        assert github_client._rate_limit_tracker.remaining == 4999, "Remaining budget should be read from the headers."
+
+    def test_execute_rate_limit_exceeded(self, github_client, requests_mock, monkeypatch):
         """Test execution of a query leading to waiting for rate limit reset."""
         # Set specific values for cost, remaining, and resetAt
         mock_cost = 10
         mock_remaining = 14  # Ensure remaining - 5 < mock_cost
-        mock_reset_at = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        mock_reset_at = (datetime.utcnow() + timedelta(minutes=10)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        github_client._rate_limit_tracker.update_from_rate_limit({"remaining": mock_remaining, "resetAt": mock_reset_at})
 
         # Mock rate limit response
         mock_rate_limit_response = {
@@ -91,6 +132,9 @@ class TestClient:
             }
         }
 
+        sleep = MagicMock()
+        monkeypatch.setattr("backend.app.services.github_query.github_graphql.rate_limit_tracker.time.sleep", sleep)
+
         # Setup requests_mock to simulate the rate limit response and any subsequent requests
         base_path = github_client._base_path()
         requests_mock.post(base_path, [
@@ -99,12 +143,31 @@ class TestClient:
         ])
         response = github_client._execute("query { viewer { login }}", {})
         assert response == "query success", "Execute should return success on valid response."
+        assert requests_mock.call_count == 2, "A cost probe should be sent when the budget is nearly exhausted."
+        sleep.assert_called_once()
+
+    def test_execute_with_token_pool(self, requests_mock):
+        """Test that the response headers update the tracker of the token that signed the request."""
+        authenticator = TokenPoolAuthenticator(tokens=["token_a", "token_b"])
+        client = Client(authenticator=authenticator)
+        requests_mock.post(client._base_path(), [
+            {'json': {"data": "query success"}, 'status_code': 200,
+             'headers': {'x-ratelimit-remaining': '10', 'x-ratelimit-reset': '4102444800'}},
+            {'json': {"data": "query success"}, 'status_code': 200},
+        ])
+        client._execute("query { viewer { login }}", {})
+        first_token = requests_mock.request_history[0].headers["Authorization"]
+        assert authenticator.get_rate_limit_tracker({"Authorization": first_token}).remaining == 10
+        assert client._rate_limit_tracker.remaining is None, "The client tracker should not be used with a pool."
+
+        client._execute("query { viewer { login }}", {})
+        assert requests_mock.request_history[1].headers["Authorization"] != first_token, \
+            "The next request should move to the token with more headroom."
 
     def test_execute_query_failed(self, github_client, requests_mock):
         """Test execution of a query leading to QueryFailedException with retries."""
         # Mock a failed query response for each retry attempt
         requests_mock.post(github_client._base_path(), [
-            {'json': {"data": {"rateLimit": {"cost": 1, "remaining": 5000, "resetAt": "2021-01-01T00:00:00Z"}}}, 'status_code': 200},
             {"json": {"error": "bad request"}, "status_code": 400}
         ])
         # Expecting QueryFailedException after all retries have been exhausted
@@ -143,7 +206,6 @@ class TestClient:
     def test_client_execute_success(self, github_client, requests_mock):
         """Test successful execution of a query"""
         requests_mock.post(github_client._base_path(), [
-            {'json': {"data": {"rateLimit": {"cost": 1, "remaining": 5000, "resetAt": "2021-01-01T00:00:00Z"}}}, 'status_code': 200},
             {'json': {"data": "query success"}, 'status_code': 200}
         ])
         response = github_client.execute(Query("query { viewer { login }}"), {})
@@ -152,9 +214,76 @@ class TestClient:
     def test_client_execute_failed(self, github_client, requests_mock):
         """Test that a failed query raises QueryFailedException"""
         requests_mock.post(github_client._base_path(), [
-            {'json': {"data": {"rateLimit": {"cost": 1, "remaining": 5000, "resetAt": "2021-01-01T00:00:00Z"}}}, 'status_code': 200},
             {"json": {"error": "bad request"}, "status_code": 400}
         ])
         with pytest.raises(QueryFailedException) as excinfo:
             github_client.execute(Query("query { viewer { login }}"), {})
-        assert "Query failed with code" in str(excinfo.value), "QueryFailedException should contain the right error message."
\ No newline at end of file
+        assert "Query failed with code" in str(excinfo.value), "QueryFailedException should contain the right error message."
+
+    def test_client_sends_variables(self, github_client, requests_mock):
+        """Test that query objects are sent as one compiled document with per-page variables."""
+        requests_mock.post(github_client._base_path(), [
+            {'json': {"data": {"user": {"gists": {"pageInfo": {"endCursor": "c1", "hasNextPage": True}}}}}, 'status_code': 200},
+            {'json': {"data": {"user": {"gists": {"pageInfo": {"endCursor": "c2", "hasNextPage": False}}}}}, 'status_code': 200},
+        ])
+        query = PaginatedQuery(fields=[QueryNode("user", args={"login": "$user"}, fields=[
+            QueryNodePaginator("gists", args={"first": "$pg_size"}, fields=[
+                QueryNode("pageInfo", fields=["endCursor", "hasNextPage"])
+            ])
+        ])])
+        list(github_client.execute(query, {"user": "octocat", "pg_size": 100}))
+        first, second = [request.json() for request in requests_mock.request_history]
+        assert first["query"] == second["query"], "Every page should be sent with the same document."
+        assert first["variables"] == {"user": "octocat", "pg_size": 100, "after": None}
+        assert second["variables"] == {"user": "octocat", "pg_size": 100, "after": "c1"}
+
+    def test_client_response_cache(self, authenticator, requests_mock):
+        """Test that cacheable responses are served from the cache on later runs."""
+        requests_mock.post("https://api.github.com/graphql", json={"data": {"user": {"id": "A"}}}, status_code=200)
+
+        class CachedQuery(Query):
+            def cache_ttl(self, substitutions):
+                return None
+
+        client = Client(authenticator=authenticator, response_cache=ResponseCache(":memory:"))
+        query = CachedQuery(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])])
+        assert client.execute(query, {"user": "octocat"}) == {"user": {"id": "A"}}
+        assert client.execute(query, {"user": "octocat"}) == {"user": {"id": "A"}}
+        assert requests_mock.call_count == 1, "The second execution should be served from the cache."
+        client.execute(query, {"user": "hubot"})
+        client.execute(Query(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])]), {"user": "octocat"})
+        assert requests_mock.call_count == 3, "Other variables and uncacheable queries should reach the API."
+
+    def test_client_response_cache_per_credential(self, requests_mock):
+        """Test that the responses cached for a token are not served to another token."""
+        requests_mock.post("https://api.github.com/graphql", json={"data": {"user": {"id": "A"}}}, status_code=200)
+
+        class CachedQuery(Query):
+            def cache_ttl(self, substitutions):
+                return None
+
+        cache = ResponseCache(":memory:")
+        query = CachedQuery(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])])
+        for token in ("token_a", "token_b", "token_a"):
+            Client(authenticator=PersonalAccessTokenAuthenticator(token), response_cache=cache).execute(
+                query, {"user": "octocat"})
+        assert requests_mock.call_count == 2, "Only the second token should miss the cache."
+        pool = Client(authenticator=TokenPoolAuthenticator(["token_b", "token_a"]), response_cache=cache)
+        pool.execute(query, {"user": "octocat"})
+        pool.execute(query, {"user": "octocat"})
+        assert requests_mock.call_count == 3, "A token pool should have its own entries."
+
+    def test_client_execute_batch(self, github_client, requests_mock):
+        """Test that instances are merged into aliased requests and split back in order."""
+        requests_mock.post(github_client._base_path(), [
+            {'json': {"data": {"q0_user": {"id": "A"}, "q1_user": {"id": "B"}}}, 'status_code': 200},
+            {'json': {"data": {"q0_user": None}, "errors": [{"path": ["q0_user"]}]}, 'status_code': 200},
+        ])
+        query = Query(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])])
+        results = github_client.execute_batch(query, [{"user": "alice"}, {"user": "bob"}, {"user": "ghost"}],
+                                              max_batch_size=2)
+        assert results == [{"user": {"id": "A"}}, {"user": {"id": "B"}}, None]
+        assert requests_mock.call_count == 2, "Three instances with a batch size of two should take two requests."
+        first = requests_mock.request_history[0].json()
+        assert "q1_user: user(login: $q1_user)" in first["query"]
+        assert first["variables"] == {"q0_user": "alice", "q1_user": "bob"}
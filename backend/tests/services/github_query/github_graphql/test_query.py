@@ -1,4 +1,5 @@
-from backend.app.services.github_query.github_graphql.query import QueryNode, Query, QueryNodePaginator, PaginatedQuery
+import pytest
+from backend.app.services.github_query.github_graphql.query import QueryNode, Query, QueryNodePaginator, PaginatedQuery, BatchedQuery, CompiledQuery, InvalidQueryException
 
 class TestQueryNode:
     def test_initialization(self):
@@ -173,3 +174,103 @@ class TestPaginatedQuery:
         path, paginator = paginated_query.extract_path_to_pageinfo_node(paginated_query)
         assert path == ["nestedNode"], "The path should lead to the nestedNode containing pageInfo."
         assert paginator == nested_node, "The paginator should be the nested node containing pageInfo."
+
+
+class TestBatchedQuery:
+    def test_batched_query_aliases(self):
+        """Test that every instance is sent under its own alias, with its own prefixed variables."""
+        query = Query(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])])
+        batched_query = BatchedQuery([(query, {"user": "alice"}), (query, {"user": 'bob") { id } viewer { login'})])
+        expected = 'query($q0_user: String!, $q1_user: String!) { q0_user: user(login: $q0_user) { id } ' \
+                   'q1_user: user(login: $q1_user) { id } }'
+        assert batched_query.compile().document == expected, "Instances should be merged under distinct aliases."
+        assert batched_query.compile().variables(batched_query.variables) == \
+               {"q0_user": "alice", "q1_user": 'bob") { id } viewer { login'}, "Values should only be sent as variables."
+
+    def test_batched_query_rejects_paginated(self):
+        """Test that paginated queries cannot be batched."""
+        page_info_node = QueryNode(name="pageInfo", fields=["endCursor", "hasNextPage"])
+        paginated_query = PaginatedQuery(fields=[QueryNode(name="nestedNode", fields=[page_info_node])])
+        with pytest.raises(InvalidQueryException):
+            BatchedQuery([(paginated_query, {})])
+
+    def test_demultiplex(self):
+        """Test that the batched data is split back per instance, with None for unresolved instances."""
+        query = Query(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])])
+        batched_query = BatchedQuery([(query, {"user": "alice"}), (query, {"user": "ghost"})])
+        results = batched_query.demultiplex({"q0_user": {"id": "A"}, "q1_user": None})
+        assert results == [{"user": {"id": "A"}}, None]
+
+    def test_estimate_nodes(self):
+        """Test that nested connections multiply the estimated nodes."""
+        query = Query(fields=[QueryNode("user", args={"login": "$user"}, fields=[
+            QueryNode("repositories", args={"first": "$pg_size"}, fields=[
+                QueryNode("nodes", fields=[QueryNode("languages", args={"first": 10}, fields=["totalSize"])])
+            ])
+        ])])
+        assert BatchedQuery.estimate_nodes(query, {"pg_size": 100}) == 100 + 100 * 10
+        assert BatchedQuery.estimate_nodes(Query(fields=[QueryNode("viewer", fields=["login"])]), {}) == 1
+
+    def test_split(self):
+        """Test that batches respect both the batch size and the node ceiling."""
+        query = Query(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])])
+        substitutions = [{"user": str(i)} for i in range(5)]
+        assert [len(batch) for batch in BatchedQuery.split(query, substitutions, 2, 100)] == [2, 2, 1]
+        assert [len(batch) for batch in BatchedQuery.split(query, substitutions, 50, 3)] == [3, 2]
+
+
+class TestCompiledQuery:
+    @staticmethod
+    def make_paginated_query():
+        return PaginatedQuery(fields=[QueryNode("user", args={"login": "$user"}, fields=[
+            QueryNodePaginator("repositories", args={"first": "$pg_size", "orderBy": "$order_by"}, fields=[
+                QueryNode("nodes", fields=[QueryNode("languages", args={"first": 10}, fields=["totalSize"])]),
+                QueryNode("pageInfo", fields=["endCursor", "hasNextPage"]),
+            ])
+        ])])
+
+    def test_compile_declares_variables(self):
+        """Test that placeholders become typed GraphQL variables and literals stay inline."""
+        compiled = self.make_paginated_query().compile()
+        expected = ('query($user: String!, $pg_size: Int, $order_by: RepositoryOrder, $after: String) '
+                    '{ user(login: $user) { repositories(first: $pg_size, orderBy: $order_by, after: $after) '
+                    '{ nodes { languages(first: 10) { totalSize } } pageInfo { endCursor hasNextPage } } } }')
+        assert compiled.document == expected, "The document should declare one variable per placeholder."
+
+    def test_compile_is_cached(self):
+        """Test that a query is only serialized once."""
+        query = self.make_paginated_query()
+        assert query.compile() is query.compile(), "The compiled query should be reused."
+
+    def test_variables_follow_paginator(self):
+        """Test that the cursor is sent as a variable while the document stays the same."""
+        query = self.make_paginated_query()
+        compiled = query.compile()
+        document = compiled.document
+        substitutions = {"user": "octocat", "pg_size": 100, "order_by": {"field": "CREATED_AT", "direction": "ASC"}}
+        assert compiled.variables(substitutions)["after"] is None, "The first page should be requested without a cursor."
+        query.paginator.update_paginator(True, "cursor1")
+        payload = query.compile().payload(substitutions)
+        assert payload["query"] == document, "Every page should be sent with the same document."
+        assert payload["variables"] == {"user": "octocat", "pg_size": 100,
+                                        "order_by": {"field": "CREATED_AT", "direction": "ASC"}, "after": "cursor1"}
+
+    def test_cost_probe(self):
+        """Test that the dry run selects the rate limit alongside the query."""
+        compiled = Query(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])]).compile()
+        probe = compiled.cost_probe()
+        assert probe.document == 'query($user: String!) { user(login: $user) { id } rateLimit(dryRun: true) { cost remaining resetAt } }'
+        assert probe.variables({"user": "octocat"}) == {"user": "octocat"}
+
+    def test_compile_unknown_argument(self):
+        """Test that a placeholder of unknown type cannot be compiled."""
+        query = Query(fields=[QueryNode("user", args={"mystery": "$value"}, fields=["id"])])
+        with pytest.raises(InvalidQueryException):
+            query.compile()
+
+    def test_missing_variable(self):
+        """Test that a missing substitution is reported like a missing template placeholder."""
+        compiled = Query(fields=[QueryNode("user", args={"login": "$user"}, fields=["id"])]).compile()
+        assert isinstance(compiled, CompiledQuery)
+        with pytest.raises(KeyError):
+            compiled.variables({})
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from backend.app.services.github_query.github_graphql.rate_limit_tracker import RateLimitTracker
+
+
+class TestRateLimitTracker:
+    def test_initial_state_is_not_exhausted(self):
+        """Test that an unknown budget never triggers a probe."""
+        tracker = RateLimitTracker()
+        assert tracker.remaining is None
+        assert tracker.is_near_exhaustion() is False, "Unknown budget should not be considered exhausted."
+
+    def test_update_from_headers(self):
+        """Test that the x-ratelimit-* headers are parsed case-insensitively."""
+        tracker = RateLimitTracker()
+        tracker.update_from_headers({"X-RateLimit-Remaining": "42", "X-RateLimit-Limit": "5000",
+                                     "X-RateLimit-Reset": "1609459200"})
+        assert tracker.remaining == 42
+        assert tracker.limit == 5000
+        assert tracker.reset_at == datetime(2021, 1, 1)
+
+    def test_update_from_rate_limit(self):
+        """Test that a rateLimit block from a response body updates the state."""
+        tracker = RateLimitTracker()
+        tracker.update_from_rate_limit({"cost": 3, "remaining": 100, "resetAt": "2021-01-01T00:00:00Z"})
+        assert tracker.last_cost == 3
+        assert tracker.remaining == 100
+        assert tracker.reset_at == datetime(2021, 1, 1)
+
+    def test_is_near_exhaustion(self):
+        """Test that the threshold only applies to a window that has not reset yet."""
+        tracker = RateLimitTracker(threshold=10)
+        future = (datetime.utcnow() + timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        tracker.update_from_rate_limit({"remaining": 11, "resetAt": future})
+        assert tracker.is_near_exhaustion() is False
+        tracker.update_from_rate_limit({"remaining": 10})
+        assert tracker.is_near_exhaustion() is True
+        tracker.update_from_rate_limit({"resetAt": "2021-01-01T00:00:00Z"})
+        assert tracker.is_near_exhaustion() is False, "A window that already reset should not be exhausted."
+
+    def test_wait_for_reset(self):
+        """Test that waiting sleeps past the reset time and clears the known budget."""
+        tracker = RateLimitTracker(buffer_seconds=5)
+        tracker.update_from_rate_limit({"remaining": 0, "resetAt": "2021-01-01T00:00:00Z"})
+        with patch("backend.app.services.github_query.github_graphql.rate_limit_tracker.time.sleep") as sleep:
+            tracker.wait_for_reset()
+        sleep.assert_called_once_with(5)
+        assert tracker.remaining is None
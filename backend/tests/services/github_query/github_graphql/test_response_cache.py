@@ -0,0 +1,38 @@
+from unittest.mock import patch
+from backend.app.services.github_query.github_graphql.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    def test_key_is_normalized(self):
+        """Test that whitespace and variable order do not change the key."""
+        key = ResponseCache.key({"query": "query { viewer { login } }", "variables": {"a": 1, "b": 2}})
+        assert key == ResponseCache.key({"query": "query {\n  viewer { login }\n}", "variables": {"b": 2, "a": 1}})
+        assert key != ResponseCache.key({"query": "query { viewer { login } }", "variables": {"a": 1, "b": 3}})
+        assert key != ResponseCache.key({"query": "query { viewer { login } }", "variables": {"a": 1, "b": 2}},
+                                        namespace="https://github.example.com/api/graphql")
+        assert key != ResponseCache.key({"query": "query { viewer { login } }", "variables": {"a": 1, "b": 2}},
+                                        credential="token hash")
+
+    def test_set_and_get(self):
+        """Test that entries without a lifetime never expire."""
+        cache = ResponseCache(":memory:")
+        cache.set("key", {"user": {"id": "A"}}, None)
+        assert cache.get("key") == {"user": {"id": "A"}}
+        assert cache.get("missing") is None
+
+    def test_expired_entry(self):
+        """Test that entries are not returned after their lifetime."""
+        cache = ResponseCache(":memory:")
+        with patch("backend.app.services.github_query.github_graphql.response_cache.time.time", return_value=1000):
+            cache.set("key", "data", 60)
+            assert cache.get("key") == "data"
+        with patch("backend.app.services.github_query.github_graphql.response_cache.time.time", return_value=1061):
+            assert cache.get("key") is None, "Expired entries should be dropped."
+
+    def test_persistence(self, tmp_path):
+        """Test that entries survive reopening the database."""
+        path = str(tmp_path / "cache.sqlite3")
+        cache = ResponseCache(path)
+        cache.set("key", [1, 2, 3], None)
+        cache.close()
+        assert ResponseCache(path).get("key") == [1, 2, 3]
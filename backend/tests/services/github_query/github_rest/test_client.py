@@ -0,0 +1,30 @@
+import pytest
+from flask import Flask, session
+from backend.app.services.github_query.github_rest import client
+from backend.app.services.github_query.github_rest.client import RESTClient
+from backend.app.services.github_query.utils.client_registry import ClientRegistry
+
+
+@pytest.fixture
+def request_context(monkeypatch):
+    monkeypatch.setattr(RESTClient, "_clients", ClientRegistry(client._create_github))
+    app = Flask(__name__)
+    app.secret_key = "test"
+    with app.test_request_context():
+        yield
+
+
+class TestRESTClient:
+    def test_client_per_token(self, request_context):
+        """Test that the requests of a token reuse the same PyGithub client."""
+        session["access_token"] = "token_a"
+        github = RESTClient().github
+        assert RESTClient().github is github
+        session["access_token"] = "token_b"
+        assert RESTClient().github is not github
+        assert len(RESTClient._clients) == 2
+
+    def test_missing_token(self, request_context):
+        """Test that a session without a token is refused."""
+        with pytest.raises(Exception, match="User not authenticated"):
+            RESTClient()
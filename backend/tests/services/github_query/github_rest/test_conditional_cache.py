@@ -0,0 +1,65 @@
+from requests import Response
+from backend.app.services.github_query.github_rest.conditional_cache import ConditionalRequestCache
+
+
+def make_response(body, headers):
+    response = Response()
+    response.status_code = 200
+    response.headers.update(headers)
+    response._content = body
+    return response
+
+
+class TestConditionalRequestCache:
+    def test_key_depends_on_token(self):
+        """Test that the same URL is cached separately for every token."""
+        url = "https://api.github.com/user/repos"
+        assert ConditionalRequestCache.key(url, "Bearer a") == ConditionalRequestCache.key(url, "Bearer a")
+        assert ConditionalRequestCache.key(url, "Bearer a") != ConditionalRequestCache.key(url, "Bearer b")
+        assert "Bearer" not in ConditionalRequestCache.key(url, "Bearer a")
+
+    def test_revalidation(self):
+        """Test that a stored response yields its validators and is rebuilt with its headers and body."""
+        cache = ConditionalRequestCache()
+        link = '<https://api.github.com/user/repos?page=2>; rel="next"'
+        cache.set("key", make_response(b'[{"name": "repo"}]', {"ETag": 'W/"abc"', "Link": link, "Server": "GitHub"}))
+
+        entry = cache.get("key")
+        assert ConditionalRequestCache.conditional_headers(entry) == {"If-None-Match": 'W/"abc"'}
+        response = ConditionalRequestCache.to_response(entry, "https://api.github.com/user/repos")
+        assert response.status_code == 200
+        assert response.json() == [{"name": "repo"}]
+        assert response.links["next"]["url"] == "https://api.github.com/user/repos?page=2"
+        assert "Server" not in response.headers
+
+    def test_responses_without_validators_are_not_stored(self):
+        """Test that responses that cannot be revalidated are skipped."""
+        cache = ConditionalRequestCache()
+        cache.set("key", make_response(b"{}", {"Content-Type": "application/json"}))
+        assert cache.get("key") is None
+
+    def test_least_recently_used_eviction(self):
+        """Test that the least recently used entry is dropped from memory once the cache is full."""
+        cache = ConditionalRequestCache(max_entries=2)
+        for key in ("a", "b"):
+            cache.set(key, make_response(b"{}", {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+        cache.get("a")
+        cache.set("c", make_response(b"{}", {"ETag": '"c"'}))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert ConditionalRequestCache.conditional_headers(cache.get("a")) == {
+            "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"
+        }
+
+    def test_disk_tier(self, tmp_path):
+        """Test that entries persisted on disk are found by a new cache, even after leaving memory."""
+        path = str(tmp_path / "rest.sqlite")
+        cache = ConditionalRequestCache(max_entries=1, path=path)
+        cache.set("a", make_response(b'{"a": 1}', {"ETag": '"a"'}))
+        cache.set("b", make_response(b'{"b": 2}', {"ETag": '"b"'}))
+        assert cache.get("a")["body"] == b'{"a": 1}'
+        cache.close()
+
+        reopened = ConditionalRequestCache(path=path)
+        assert reopened.get("b") == {"headers": {"ETag": '"b"'}, "body": b'{"b": 2}'}
+        reopened.close()
@@ -0,0 +1,107 @@
+import threading
+import pytest
+from backend.app.services.github_query.github_graphql.client import Client
+from backend.app.services.github_query.miners.cohort_runner import CohortRunner
+from backend.app.services.github_query.miners.student_metric_stats_miner import UserMetricStatsMiner
+from backend.app.services.github_query.miners.repository_contributors_contribution_miner import \
+    RepositoryContributorsContributionMiner
+from backend.app.services.github_query.utils.checkpoint_store import CheckpointStore
+from backend.app.services.github_query.utils.row_buffer import RowBuffer
+
+
+class FakeMiner:
+    def __init__(self, client):
+        self._client = client
+        self.exceptions = []
+        self.watermarks = {}
+        self._total_contributions = RowBuffer(['github', 'end_at', 'worker'])
+
+    @property
+    def total_contributions(self):
+        return self._total_contributions.to_frame()
+
+    def results(self):
+        return {"exceptions": self.exceptions, "watermarks": self.watermarks,
+                "_total_contributions": self._total_contributions}
+
+    def run(self, login, end=None):
+        if login == "boom":
+            raise RuntimeError("unexpected")
+        if login == "ghost":
+            self.exceptions.append(login)
+            return
+        self._total_contributions.append({'github': login, 'end_at': end, 'worker': threading.current_thread().name})
+        self.watermarks[login] = end
+
+
+class TestCohortRunner:
+    def test_run_threads(self):
+        """Test that the cohort is spread over threads sharing one client and merged back."""
+        clients = set()
+
+        class RecordingMiner(FakeMiner):
+            def __init__(self, client):
+                super().__init__(client)
+                clients.add(id(client))
+
+        runner = CohortRunner(RecordingMiner, tokens=["token_a", "token_b"], max_workers=3)
+        logins = [f"user{i}" for i in range(20)] + ["ghost", "boom"]
+        merged = runner.run(logins, end="2024-01-01T00:00:00Z")
+
+        assert sorted(merged.total_contributions['github']) == sorted(f"user{i}" for i in range(20))
+        assert set(merged.total_contributions['end_at']) == {"2024-01-01T00:00:00Z"}
+        assert len(merged.watermarks) == 20
+        assert merged.exceptions == ["ghost"]
+        assert sorted(login for failures in runner.failures.values() for login in failures) == ["boom", "ghost"]
+        assert all(worker.startswith("miner") for worker in runner.failures)
+        assert len(clients) == 1, "Every worker should share the same client."
+
+    def test_run_closes_client(self, monkeypatch):
+        """Test that the shared client is closed even when the miner cannot be created."""
+        closed = []
+        monkeypatch.setattr(Client, "close", lambda client: closed.append(client))
+        CohortRunner(FakeMiner, tokens=["token_a"], max_workers=2).run(["alice"])
+        assert len(closed) == 1
+
+        class BrokenMiner(FakeMiner):
+            def __init__(self, client):
+                raise RuntimeError("unexpected")
+
+        with pytest.raises(RuntimeError):
+            CohortRunner(BrokenMiner, tokens=["token_a"], max_workers=2).run(["alice"])
+        assert len(closed) == 2
+
+    def test_run_processes(self):
+        """Test that the cohort is spread over processes and merged back."""
+        runner = CohortRunner(FakeMiner, tokens=["token_a"], max_workers=2, use_processes=True)
+        merged = runner.run(["alice", "bob", "ghost", "boom"])
+
+        assert sorted(merged.total_contributions['github']) == ["alice", "bob"]
+        assert merged.exceptions == ["ghost"]
+        assert sorted(login for failures in runner.failures.values() for login in failures) == ["boom", "ghost"]
+        assert set(runner.failures) <= {"process-0", "process-1"}
+
+    def test_run_processes_with_real_miners(self, tmp_path):
+        """Test that the results of the real miners are sent back from the worker processes."""
+        path = str(tmp_path / "checkpoint.sqlite3")
+        checkpoint = CheckpointStore(path)
+        # completed entities are restored from the checkpoint, so the miners send no request
+        for login in ("alice", "bob"):
+            checkpoint.complete(login, {"row": {"github": login, "commit": 1},
+                                        "watermark": {"end_at": "2024-01-01T00:00:00Z", "cursors": {}}})
+        checkpoint.complete("https://github.com/owner/repo", {
+            "cumulated": [{"repo": "repo", "login": "alice", "total_commits": 2}], "individual": []})
+        checkpoint.close()
+
+        runner = CohortRunner(UserMetricStatsMiner, tokens=["token_a"], max_workers=2, use_processes=True,
+                              checkpoint_path=path)
+        merged = runner.run(["alice", "bob"])
+        assert sorted(merged.total_contributions['github']) == ["alice", "bob"]
+        assert sorted(merged.watermarks) == ["alice", "bob"]
+        assert runner.failures == {}
+
+        runner = CohortRunner(RepositoryContributorsContributionMiner, tokens=["token_a"], max_workers=1,
+                              use_processes=True, checkpoint_path=path)
+        merged = runner.run(["https://github.com/owner/repo"])
+        assert list(merged.cumulated_contribution['login']) == ["alice"]
+        assert runner.failures == {}
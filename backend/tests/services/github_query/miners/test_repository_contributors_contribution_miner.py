@@ -0,0 +1,138 @@
+import pytest
+from backend.app.services.github_query.miners.repository_contributors_contribution_miner import \
+    RepositoryContributorsContributionMiner
+from backend.app.services.github_query.queries.repositories.history_slices import time_slices
+from backend.app.services.github_query.queries.repositories.repository_commits import RepositoryCommits
+from backend.app.services.github_query.queries.repositories.repository_contributors import RepositoryContributors
+from backend.app.services.github_query.utils.checkpoint_store import CheckpointStore
+
+
+def history_page(nodes, end_cursor, has_next_page):
+    return {"repository": {"defaultBranchRef": {"target": {"history": {
+        "nodes": nodes, "pageInfo": {"endCursor": end_cursor, "hasNextPage": has_next_page}}}}}}
+
+
+def commit(login, additions):
+    return {"author": {"name": login, "user": {"login": login}}, "parents": {"totalCount": 1},
+            "authoredDate": "2024-01-01T00:00:00Z", "changedFilesIfAvailable": 1,
+            "additions": additions, "deletions": 0, "message": "commit"}
+
+
+class FakeClient:
+    """Serves the pages of the commit history, keyed by query and contributor, after the cursor of the query."""
+
+    def __init__(self, pages, fail_on=None):
+        self.pages = pages
+        self.fail_on = fail_on
+        self.requests = []
+
+    def execute(self, query, substitutions):
+        if isinstance(query, RepositoryContributors):
+            key = "contributors"
+        elif isinstance(query, RepositoryCommits):
+            key = "history"
+        else:
+            key = substitutions["id"]["id"]
+        if "since" in substitutions:
+            key = (key, substitutions["since"], substitutions["until"])
+        pages = self.pages[key]
+        index = 0 if query.paginator.end_cursor is None else int(query.paginator.end_cursor) + 1
+        while query.paginator.has_next():
+            self.requests.append((key, index))
+            if (key, index) == self.fail_on:
+                raise RuntimeError("connection lost")
+            page = pages[index]
+            query.paginator.update_paginator(index + 1 < len(pages), str(index))
+            index += 1
+            yield page
+
+    def execute_batch(self, query, substitutions):
+        self.requests.append(("ids", len(substitutions)))
+        return [{"user": {"login": s["user"], "id": s["user"] + "_id"}} for s in substitutions]
+
+
+@pytest.fixture
+def pages():
+    return {
+        "contributors": [history_page([commit("alice", 1)], "0", True),
+                         history_page([commit("bob", 2)], "1", False)],
+        "alice_id": [history_page([commit("alice", 1)], "0", False)],
+        "bob_id": [history_page([commit("bob", 2)], "0", True),
+                   history_page([commit("bob", 3)], "1", False)],
+        "history": [history_page([commit("alice", 1), commit("bob", 2)], "0", True),
+                    history_page([commit("bob", 3)], "1", False)],
+    }
+
+
+class TestRepositoryContributorsContributionMiner:
+    def test_resume(self, pages):
+        """Test that a restarted run resumes from the checkpointed cursors and skips completed repositories."""
+        store = CheckpointStore(":memory:")
+        client = FakeClient(pages, fail_on=("bob_id", 1))
+        with pytest.raises(RuntimeError):
+            RepositoryContributorsContributionMiner(client, checkpoint=store).run("https://github.com/owner/repo")
+
+        client = FakeClient(pages)
+        miner = RepositoryContributorsContributionMiner(client, checkpoint=store)
+        miner.run("https://github.com/owner/repo")
+        assert client.requests == [("bob_id", 1)], "Only the page that failed should be fetched again."
+        assert miner.cumulated_contribution.set_index('login')['total_additions'].to_dict() == {'alice': 1, 'bob': 5}
+        assert len(miner.individual_contribution) == 3
+
+        client = FakeClient(pages)
+        miner = RepositoryContributorsContributionMiner(client, checkpoint=store)
+        miner.run("https://github.com/owner/repo")
+        assert client.requests == []
+        assert len(miner.cumulated_contribution) == 2
+        assert len(miner.individual_contribution) == 3
+
+    def test_single_pass(self, pages):
+        """Test that a single history pass yields the same rows as one pass per author."""
+        per_author = RepositoryContributorsContributionMiner(FakeClient(pages))
+        per_author.run("https://github.com/owner/repo")
+
+        client = FakeClient(pages)
+        single_pass = RepositoryContributorsContributionMiner(client)
+        single_pass.run("https://github.com/owner/repo", single_pass=True)
+        assert client.requests == [("history", 0), ("history", 1)]
+        assert single_pass.cumulated_contribution.equals(per_author.cumulated_contribution)
+        assert single_pass.individual_contribution.equals(per_author.individual_contribution)
+
+    def test_single_pass_resume(self, pages):
+        """Test that an interrupted single pass resumes after the last checkpointed page."""
+        store = CheckpointStore(":memory:")
+        with pytest.raises(RuntimeError):
+            RepositoryContributorsContributionMiner(FakeClient(pages, fail_on=("history", 1)), checkpoint=store) \
+                .run("https://github.com/owner/repo", single_pass=True)
+
+        client = FakeClient(pages)
+        miner = RepositoryContributorsContributionMiner(client, checkpoint=store)
+        miner.run("https://github.com/owner/repo", single_pass=True)
+        assert client.requests == [("history", 1)]
+        assert miner.cumulated_contribution.set_index('login')['total_commits'].to_dict() == {'alice': 1, 'bob': 2}
+
+    def test_history_slices(self, pages):
+        """Test that a history fetched in time slices yields the same rows as a serial one."""
+        slices = time_slices("2020-01-01T00:00:00Z", "2024-01-01T00:00:00Z", 2)
+        oids = iter(range(100))
+
+        def sliced(*commits):
+            return [{**commit_node, "oid": str(next(oids))} for commit_node in commits]
+
+        first, second, third = sliced(commit("alice", 1), commit("bob", 2), commit("bob", 3))
+        for key in ("contributors", "history"):
+            # the commit at the boundary of the slices is served by both
+            pages[(key, *slices[0])] = [history_page([first, second], "0", False)]
+            pages[(key, *slices[1])] = [history_page([second], "0", True), history_page([third], "1", False)]
+
+        for single_pass in (False, True):
+            serial = RepositoryContributorsContributionMiner(FakeClient(pages))
+            serial.run("https://github.com/owner/repo", single_pass=single_pass)
+            client = FakeClient(pages)
+            miner = RepositoryContributorsContributionMiner(client, checkpoint=CheckpointStore(":memory:"))
+            miner.run("https://github.com/owner/repo", single_pass=single_pass, history_slices=slices)
+            key = "history" if single_pass else "contributors"
+            assert set(client.requests[:3]) == {((key, *slices[0]), 0), ((key, *slices[1]), 0),
+                                                ((key, *slices[1]), 1)}
+            assert miner.cumulated_contribution.equals(serial.cumulated_contribution)
+            assert miner.individual_contribution.equals(serial.individual_contribution)
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import re
+import numpy as np
+import pandas as pd
+from backend.app.services.github_query.github_graphql.authentication import PersonalAccessTokenAuthenticator
+from backend.app.services.github_query.github_graphql.client import Client
+from backend.app.services.github_query.github_graphql.response_cache import ResponseCache
+from backend.app.services.github_query.miners.student_metric_stats_miner import UserMetricStatsMiner
+from backend.app.services.github_query.queries.time_range_contributions.user_contributions_collection import \
+    UserContributionsCollectionMultiWindow
+from backend.app.services.github_query.queries.comments.user_commit_comments import UserCommitComments
+from backend.app.services.github_query.queries.comments.user_gist_comments import UserGistComments
+from backend.app.services.github_query.queries.comments.user_issue_comments import UserIssueComments
+from backend.app.services.github_query.queries.comments.user_repository_discussion_comments import \
+    UserRepositoryDiscussionComments
+from backend.app.services.github_query.queries.contributions.user_gists import UserGists
+from backend.app.services.github_query.utils.checkpoint_store import CheckpointStore
+from backend.app.services.github_query.utils.identity_cache import UserIdentityCache
+from backend.app.services.github_query.queries.contributions.user_repositories import UserAffiliatedRepositories
+from backend.app.services.github_query.queries.contributions.user_repository_discussions import \
+    UserRepositoryDiscussions
+
+# connection of the user holding the nodes of each paginated stream
+FIELDS = {
+    UserGists: "gists",
+    UserRepositoryDiscussions: "repositoryDiscussions",
+    UserCommitComments: "commitComments",
+    UserIssueComments: "issueComments",
+    UserGistComments: "gistComments",
+    UserRepositoryDiscussionComments: "repositoryDiscussionComments",
+    UserAffiliatedRepositories: "repositories",
+}
+
+
+def repository(created_at, size):
+    return {"createdAt": created_at, "isFork": False, "owner": {"login": "alice"}, "forkCount": 0,
+            "stargazerCount": 1, "watchers": {"totalCount": 0},
+            "languages": {"totalSize": size, "edges": [{"size": size, "node": {"name": "Python"}}]}}
+
+
+class FakeClient:
+    """Serves the pages of every stream after the cursor of the query, and one commit per contribution window."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def execute(self, query, substitutions):
+        if type(query) not in FIELDS:
+            return {"user": {f"w{index}": {"restrictedContributionsCount": 0, "totalCommitContributions": 1,
+                                           "totalIssueContributions": 0, "totalPullRequestContributions": 0,
+                                           "totalPullRequestReviewContributions": 0,
+                                           "totalRepositoryContributions": 0}
+                             for index in range(len(query.windows))}}
+        return self._pages(query, type(query))
+
+    def execute_batch(self, query, substitutions):
+        return [{"user": {"login": instance["user"], "createdAt": "2019-01-02T00:00:00Z"}}
+                for instance in substitutions]
+
+    def _pages(self, query, query_class):
+        pages = self.pages.get(query_class, [[]])
+        index = 0 if query.paginator.end_cursor is None else int(query.paginator.end_cursor) + 1
+        while query.paginator.has_next() and index < len(pages):
+            query.paginator.update_paginator(index + 1 < len(pages), str(index))
+            yield {"user": {FIELDS[query_class]: {"nodes": pages[index]}}}
+            index += 1
+
+
+class FakeAsyncClient(FakeClient):
+    """Serves the pages of FakeClient to coroutines, recording the class of every executed query."""
+
+    def __init__(self, pages=None):
+        super().__init__(pages or {})
+        self.queries = []
+
+    def execute(self, query, substitutions):
+        self.queries.append(type(query))
+        response = super().execute(query, substitutions)
+        if type(query) in FIELDS:
+            return self._async_pages(response)
+        return self._data(response)
+
+    async def execute_batch(self, query, substitutions):
+        self.queries.append(type(query))
+        return super().execute_batch(query, substitutions)
+
+    @staticmethod
+    async def _data(data):
+        return data
+
+    @staticmethod
+    async def _async_pages(pages):
+        for page in pages:
+            yield page
+
+
+class TestUserMetricStatsMiner:
+    def test_refresh_after_partial_page(self):
+        """Test that the items of the page a run stopped in are not counted twice by a refresh."""
+        pages = {
+            UserGists: [[{"createdAt": "2020-01-01T00:00:00Z"}, {"createdAt": "2020-02-01T00:00:00Z"}],
+                        [{"createdAt": "2020-03-01T00:00:00Z"}, {"createdAt": "2021-06-01T00:00:00Z"}]],
+            UserAffiliatedRepositories: [[repository("2020-01-01T00:00:00Z", 10),
+                                          repository("2021-06-01T00:00:00Z", 20)]],
+        }
+        miner = UserMetricStatsMiner(FakeClient(pages))
+        miner.run("alice", "2019-01-02T00:00:00Z", "2021-01-01T00:00:00Z")
+        previous = miner.total_contributions.iloc[0].to_dict()
+        assert previous["gists"] == 3
+        assert previous["Atotal_size"] == 10
+        assert previous["commit"] == 2
+
+        # a gist created after the first run, on a new page
+        pages[UserGists].append([{"createdAt": "2021-09-01T00:00:00Z"}])
+        miner.refresh("alice", previous, miner.watermarks["alice"], "2022-01-01T00:00:00Z")
+        refreshed = miner.total_contributions.iloc[1].to_dict()
+        assert refreshed["gists"] == 5
+        assert refreshed["Atotal_count"] == 2
+        assert refreshed["Atotal_size"] == 30
+        assert refreshed["type_A_lang"] == {"Python": 30}
+        assert refreshed["commit"] == 3
+        assert miner.exceptions == []
+
+    def test_merge_missing_values(self):
+        """Test that the missing values of a row read back from a DataFrame merge as empty aggregates."""
+        previous = pd.DataFrame([{"gists": 1, "commit": pd.NA, "issue": np.nan, "type_A_lang": np.nan}],
+                                dtype=object).iloc[0].to_dict()
+        merged = UserMetricStatsMiner._merge(previous, {"gists": 2, "commit": 1, "issue": 5,
+                                                        "type_A_lang": {"Python": 20}})
+        assert merged == {"gists": 3, "commit": 1, "issue": 5, "type_A_lang": {"Python": 20}}
+        merged = UserMetricStatsMiner._merge({"type_A_lang": {"Python": 10}}, {"type_A_lang": {"Python": 20}})
+        assert merged == {"type_A_lang": {"Python": 30}}
+
+    def test_run_async_like_run(self):
+        """Test that run_async and refresh_async resolve identities, checkpoint and record watermarks like run."""
+        pages = {
+            UserGists: [[{"createdAt": "2020-01-01T00:00:00Z"}, {"createdAt": "2020-02-01T00:00:00Z"}],
+                        [{"createdAt": "2020-03-01T00:00:00Z"}, {"createdAt": "2021-06-01T00:00:00Z"}]],
+            UserAffiliatedRepositories: [[repository("2020-01-01T00:00:00Z", 10),
+                                          repository("2021-06-01T00:00:00Z", 20)]],
+        }
+        expected = UserMetricStatsMiner(FakeClient(pages), identities=UserIdentityCache())
+        expected.run("alice", end="2021-01-01T00:00:00Z")
+        store = CheckpointStore(":memory:")
+        miner = UserMetricStatsMiner(FakeAsyncClient(pages), checkpoint=store, identities=UserIdentityCache())
+        asyncio.run(miner.run_async("alice", end="2021-01-01T00:00:00Z"))
+        assert miner.exceptions == []
+        assert miner.total_contributions.equals(expected.total_contributions)
+        assert miner.watermarks == expected.watermarks
+
+        client = FakeAsyncClient(pages)
+        resumed = UserMetricStatsMiner(client, checkpoint=store)
+        asyncio.run(resumed.run_async("alice", end="2021-01-01T00:00:00Z"))
+        assert client.queries == [], "A user completed by a previous attempt should not be mined again."
+        assert resumed.total_contributions.equals(expected.total_contributions)
+
+        previous = expected.total_contributions.iloc[0].to_dict()
+        pages[UserGists].append([{"createdAt": "2021-09-01T00:00:00Z"}])
+        expected.refresh("alice", previous, expected.watermarks["alice"], "2022-01-01T00:00:00Z")
+        refreshed = UserMetricStatsMiner(FakeAsyncClient(pages))
+        asyncio.run(refreshed.refresh_async("alice", previous, miner.watermarks["alice"], "2022-01-01T00:00:00Z"))
+        assert refreshed.total_contributions.equals(expected.total_contributions.iloc[[1]].reset_index(drop=True))
+
+    def test_run_async_without_windows(self):
+        """Test that an empty time span sends no contributions query, which would have an empty selection."""
+        client = FakeAsyncClient()
+        miner = UserMetricStatsMiner(client)
+        asyncio.run(miner.run_async("alice", "2024-01-01T00:00:00Z", "2024-01-01T00:00:00Z"))
+        assert miner.exceptions == []
+        assert set(client.queries) == set(FIELDS), "Only the paginated streams should be queried."
+        row = miner.total_contributions.iloc[0]
+        assert row["commit"] == 0 and row["gists"] == 0
+
+    def test_closed_windows_from_cache(self, requests_mock, monkeypatch):
+        """Test that a second run serves the closed contribution windows from the response cache."""
+        def handler(request, context):
+            document = json.loads(request.text)["query"]
+            windows = re.findall(r"(w\d+): contributionsCollection", document)
+            if windows:
+                return {"data": {"user": {alias: {"restrictedContributionsCount": 0, "totalCommitContributions": 1,
+                                                  "totalIssueContributions": 0, "totalPullRequestContributions": 0,
+                                                  "totalPullRequestReviewContributions": 0,
+                                                  "totalRepositoryContributions": 0} for alias in windows}}}
+            page = {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+            return {"data": {"user": {field: page for field in FIELDS.values()}}}
+
+        monkeypatch.setattr(UserContributionsCollectionMultiWindow, "_now",
+                            staticmethod(lambda: "2024-06-01T00:00:00Z"))
+        requests_mock.post("https://api.github.com/graphql", json=handler)
+        client = Client(authenticator=PersonalAccessTokenAuthenticator("token"),
+                        response_cache=ResponseCache(":memory:"))
+        rows = []
+        contribution_requests = []
+        # the second run ends a day later, as mining the cohort again the next day would
+        for end in ("2024-06-01T00:00:00Z", "2024-06-02T00:00:00Z"):
+            miner = UserMetricStatsMiner(client)
+            miner.run("alice", "2020-01-01T00:00:00Z", end)
+            rows.append(miner.total_contributions.iloc[0].to_dict())
+            contribution_requests.append([request for request in requests_mock.request_history
+                                          if "contributionsCollection" in request.text])
+        assert len(contribution_requests[0]) == 2, "The closed windows should be sent apart from the open one."
+        assert len(contribution_requests[1]) == 3, "Only the open window should be sent again."
+        assert "2020-01-01" not in contribution_requests[1][-1].text
+        assert rows[0]["commit"] == rows[1]["commit"] == 5
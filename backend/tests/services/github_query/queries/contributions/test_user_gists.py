@@ -14,7 +14,7 @@ class TestUserGists:
         query {
             user(login: "$user") {
                 login
-                gists(first: $pg_size) {
+                gists(first: $pg_size, orderBy: {field: CREATED_AT, direction: ASC}) {
                     totalCount
                     nodes {
                         createdAt
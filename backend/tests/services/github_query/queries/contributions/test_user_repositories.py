@@ -1,5 +1,6 @@
 import re
-from backend.app.services.github_query.queries.contributions.user_repositories import UserRepositories
+from backend.app.services.github_query.queries.contributions.user_repositories import UserRepositories, \
+    UserAffiliatedRepositories
 
 class TestUserRepositories:
     def test_user_repositories_query_structure(self):
@@ -215,3 +216,51 @@ class TestUserRepositories:
         assert repo_stats["stargazer_count"] == 10, "Stargazer count should be 10."
         assert lang_stats["Python"] == 600, "Python size should be 600."
         assert lang_stats["JavaScript"] == 400, "JavaScript size should be 400."
+
+
+class TestUserAffiliatedRepositories:
+    @staticmethod
+    def make_repo(name, owner, is_fork, size):
+        return {
+            "name": name,
+            "isFork": is_fork,
+            "owner": {"login": owner},
+            "createdAt": "2020-01-01T00:00:00Z",
+            "forkCount": 1,
+            "stargazerCount": 2,
+            "watchers": {"totalCount": 3},
+            "languages": {"totalSize": size, "edges": [{"size": size, "node": {"name": "Python"}}]}
+        }
+
+    def test_user_affiliated_repositories_query_structure(self):
+        query_string = str(UserAffiliatedRepositories())
+        assert "repositories(first: $pg_size, ownerAffiliations: [OWNER, COLLABORATOR], orderBy: $order_by)" \
+            in query_string, "Owned and collaborated repositories should be requested in a single connection."
+        assert "isFork:" not in query_string, "The fork filter should not be applied server-side."
+        assert "isFork" in query_string and "owner { login }" in query_string, \
+            "Each repository should carry the fields needed to classify it."
+
+    def test_repository_type(self):
+        assert UserRepositories.repository_type(self.make_repo("r", "Octocat", False, 1), "octocat") == "A"
+        assert UserRepositories.repository_type(self.make_repo("r", "octocat", True, 1), "octocat") == "B"
+        assert UserRepositories.repository_type(self.make_repo("r", "other", False, 1), "octocat") == "C"
+        assert UserRepositories.repository_type(self.make_repo("r", "other", True, 1), "octocat") == "D"
+
+    def test_cumulated_repository_stats_by_type(self):
+        repo_list = [
+            self.make_repo("Repo1", "octocat", False, 100),
+            self.make_repo("Repo2", "octocat", False, 200),
+            self.make_repo("Repo3", "octocat", True, 300),
+            self.make_repo("Repo4", "other", True, 400),
+        ]
+        type_stats = {repo_type: ({"total_count": 0, "fork_count": 0, "stargazer_count": 0, "watchers_count": 0,
+                                   "total_size": 0}, {}) for repo_type in "ABCD"}
+        UserRepositories.cumulated_repository_stats_by_type(repo_list, "octocat", type_stats,
+                                                            "2022-01-01T00:00:00Z", None, 'before')
+
+        assert type_stats["A"][0]["total_count"] == 2, "Type A should contain both owned non-fork repositories."
+        assert type_stats["A"][1] == {"Python": 300}
+        assert type_stats["B"][0]["total_count"] == 1
+        assert type_stats["C"][0]["total_count"] == 0, "Empty buckets should keep their zero stats."
+        assert type_stats["C"][1] == {}
+        assert type_stats["D"][0]["total_size"] == 400
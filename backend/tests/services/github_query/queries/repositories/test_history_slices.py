@@ -0,0 +1,93 @@
+import threading
+import time
+import pytest
+from backend.app.services.github_query.queries.repositories.history_slices import time_slices, sliced_history
+from backend.app.services.github_query.queries.repositories.repository_commits import RepositoryCommits
+from backend.app.services.github_query.queries.repositories.repository_contributors import RepositoryContributors
+
+
+def history_page(oids, has_next_page):
+    nodes = [{"oid": oid, "author": {"name": oid, "email": None, "user": {"login": oid}}} for oid in oids]
+    return {"repository": {"defaultBranchRef": {"target": {"history": {
+        "nodes": nodes, "pageInfo": {"endCursor": oids[-1], "hasNextPage": has_next_page}}}}}}
+
+
+class FakeClient:
+    """Serves the pages of every slice from worker threads, counting the pages fetched."""
+
+    def __init__(self, slices):
+        self.slices = slices
+        self.threads = set()
+        self.lock = threading.Lock()
+        self.fetched = 0
+
+    def execute(self, query, substitutions):
+        assert isinstance(query, RepositoryContributors)
+        with self.lock:
+            self.threads.add(threading.current_thread().name)
+        for page in self.slices[(substitutions["since"], substitutions["until"])]:
+            if isinstance(page, Exception):
+                raise page
+            with self.lock:
+                self.fetched += 1
+            yield page
+
+
+class TestHistorySlices:
+    def test_time_slices(self):
+        """Test that the slices are contiguous, newest first and open at both ends."""
+        assert time_slices("2020-01-01T00:00:00Z", "2020-01-04T00:00:00Z", 3) == [
+            ("2020-01-03T00:00:00Z", None),
+            ("2020-01-02T00:00:00Z", "2020-01-03T00:00:00Z"),
+            (None, "2020-01-02T00:00:00Z"),
+        ]
+        assert time_slices("2020-01-01T00:00:00Z", "2020-01-04T00:00:00Z", 1) == [(None, None)]
+
+    def test_time_sliced_query(self):
+        """Test that a time-sliced query binds the slice bounds and selects the commit ids."""
+        document = RepositoryCommits(time_sliced=True).compile().document
+        assert "$since: GitTimestamp" in document and "$until: GitTimestamp" in document
+        assert "history(first: $pg_size, since: $since, until: $until, after: $after)" in document
+        assert "nodes { oid " in document
+        assert "oid" not in RepositoryCommits().compile().document
+
+    def test_sliced_history(self):
+        """Test that the pages of every slice are yielded in history order without boundary duplicates."""
+        slices = time_slices("2020-01-01T00:00:00Z", "2020-01-04T00:00:00Z", 3)
+        client = FakeClient({
+            slices[0]: [history_page(["f", "e"], True), history_page(["d"], False)],
+            slices[1]: [history_page(["d", "c"], True), history_page(["b"], False)],
+            slices[2]: [history_page(["b", "a"], False)],
+        })
+        authors = None
+        oids = []
+        for response in sliced_history(client, RepositoryContributors, {"owner": "o", "repo_name": "r",
+                                                                        "pg_size": 100}, slices, max_workers=3):
+            oids.extend(node["oid"] for node in
+                        response["repository"]["defaultBranchRef"]["target"]["history"]["nodes"])
+            authors = RepositoryContributors.extract_unique_author(response, authors)
+        assert oids == ["f", "e", "d", "c", "b", "a"]
+        assert authors["login"] == set("abcdef")
+        assert all(name.startswith("ThreadPoolExecutor") for name in client.threads)
+
+    def test_sliced_history_streams_pages(self):
+        """Test that the slices only fetch a bounded number of pages ahead of the consumer."""
+        slices = time_slices("2020-01-01T00:00:00Z", "2020-01-04T00:00:00Z", 2)
+        client = FakeClient({bounds: [history_page([f"{index}-{page}"], True) for page in range(10)]
+                             for index, bounds in enumerate(slices)})
+        history = sliced_history(client, RepositoryContributors, {}, slices, max_workers=2, lookahead=1)
+        next(history)
+        time.sleep(0.2)
+        # the page read, then the page queued and the page held by the worker of each slice
+        assert client.fetched <= 1 + 2 * 2
+        history.close()
+        assert client.fetched < 20, "Closing the history should stop the workers."
+
+    def test_sliced_history_error(self):
+        """Test that an error of a slice is raised once the pages of the slices before it were yielded."""
+        slices = time_slices("2020-01-01T00:00:00Z", "2020-01-04T00:00:00Z", 2)
+        client = FakeClient({slices[0]: [history_page(["b"], False)], slices[1]: [RuntimeError("failed")]})
+        history = sliced_history(client, RepositoryContributors, {}, slices)
+        assert next(history)["repository"]["defaultBranchRef"]["target"]["history"]["nodes"][0]["oid"] == "b"
+        with pytest.raises(RuntimeError):
+            next(history)
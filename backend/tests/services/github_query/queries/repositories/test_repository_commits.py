@@ -211,4 +211,30 @@ class TestRepositoryCommits:
         assert "" in result, "empty string should be in the cumulative commits."
         assert result[""]["alice_smith"]["total_additions"] == 7, "alice_smith without name should have 7 additions."
         assert result["Bob Brown"]["total_deletions"] == 5, "Bob Brown without login should have 5 deletions."
-        assert result["Alice Smith"]["alice_smith"]["total_files"] == 2, "Alice Smith with login should have 2 files."
\ No newline at end of file
+        assert result["Alice Smith"]["alice_smith"]["total_files"] == 2, "Alice Smith with login should have 2 files."
+
+    def test_cache_ttl(self):
+        """Test that only pages after a history cursor are cached forever."""
+        query = RepositoryCommits()
+        assert query.cache_ttl({}) == RepositoryCommits.SHORT_CACHE_TTL, "The first page follows the branch head."
+        query.paginator.update_paginator(True, "abc123 99")
+        assert query.cache_ttl({}) is None, "Pages after a cursor cannot change."
+
+    def test_commits_accumulated_across_pages(self, mock_raw_data_multiple_commits):
+        """Test that the commits of another page are added to the cumulative commits."""
+        result = RepositoryCommits.commits_list(mock_raw_data_multiple_commits)
+        result = RepositoryCommits.commits_list(mock_raw_data_multiple_commits, result)
+
+        assert result[""]["alice_smith"] == {'total_additions': 14, 'total_deletions': 4, 'total_files': 6,
+                                             'total_commits': 2}
+        assert result["Bob Brown"] == {'total_additions': 30, 'total_deletions': 10, 'total_files': 12,
+                                       'total_commits': 2}
+        assert result["Alice Smith"]["alice_smith"]["total_commits"] == 2
+
+    def test_contributions_by_login(self, mock_raw_data_multiple_commits_multiple_parents):
+        """Test that the commits are split by login, leaving merge commits out."""
+        result = RepositoryCommits.contributions_by_login(mock_raw_data_multiple_commits_multiple_parents)
+
+        assert list(result) == ["john_doe"]
+        assert result["john_doe"]["cumulated"] == {'total_additions': 10, 'total_deletions': 4, 'total_commits': 1}
+        assert [commit['changedFiles'] for commit in result["john_doe"]["individual"]] == [5]
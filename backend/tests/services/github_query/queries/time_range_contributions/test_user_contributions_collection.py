@@ -1,5 +1,5 @@
 import re
-from backend.app.services.github_query.queries.time_range_contributions.user_contributions_collection import UserContributionsCollection
+from backend.app.services.github_query.queries.time_range_contributions.user_contributions_collection import UserContributionsCollection, UserContributionsCollectionMultiWindow
 
 class TestUserContributionsCollection:
     def test_user_contributions_collection_query_structure(self):
@@ -63,3 +63,57 @@ class TestUserContributionsCollection:
         # Call the user_contributions_collection method and assert it returns the expected result
         processed_contributions = UserContributionsCollection.user_contributions_collection(raw_data)
         assert processed_contributions == expected_contributions, "Processed user contributions do not match the expected structure."
+
+
+class TestUserContributionsCollectionMultiWindow:
+    def test_multi_window_query_structure(self):
+        windows = [("2020-01-01T00:00:00Z", "2021-01-01T00:00:00Z"), ("2021-01-01T00:00:00Z", "2021-06-01T00:00:00Z")]
+        query_string = UserContributionsCollectionMultiWindow(windows).substitute(user="octocat")
+        fields = ("startedAt endedAt restrictedContributionsCount totalCommitContributions totalIssueContributions "
+                  "totalPullRequestContributions totalPullRequestReviewContributions totalRepositoryContributions")
+        expected_query = (
+            'query { user(login: "octocat") { '
+            f'w0: contributionsCollection(from: "2020-01-01T00:00:00Z", to: "2021-01-01T00:00:00Z") {{ {fields} }} '
+            f'w1: contributionsCollection(from: "2021-01-01T00:00:00Z", to: "2021-06-01T00:00:00Z") {{ {fields} }} '
+            '} }'
+        )
+        assert query_string == expected_query, "Each window should be aliased within a single user node."
+
+    def test_yearly_windows(self):
+        windows = UserContributionsCollectionMultiWindow.yearly_windows("2020-01-01T00:00:00Z", "2021-06-01T00:00:00Z")
+        assert windows == [("2020-01-01T00:00:00Z", "2020-12-31T00:00:00Z"),
+                           ("2020-12-31T00:00:00Z", "2021-06-01T00:00:00Z")]
+        assert UserContributionsCollectionMultiWindow.yearly_windows("2021-01-01T00:00:00Z", "2021-01-01T00:00:00Z") == []
+
+    def test_multi_window_processing(self):
+        def window(commits, issues):
+            return {"restrictedContributionsCount": 0, "totalCommitContributions": commits,
+                    "totalIssueContributions": issues, "totalPullRequestContributions": 0,
+                    "totalPullRequestReviewContributions": 0, "totalRepositoryContributions": 0}
+
+        raw_data = {"user": {"w0": window(10, 1), "w1": window(5, 0)}}
+        result = UserContributionsCollectionMultiWindow.user_contributions_collection(raw_data)
+        assert result == {"res_con": 0, "commit": 15, "issue": 1, "pr": 0, "pr_review": 0, "repository": 0}
+        assert "pr" in result, "Counts that stay at zero should be kept."
+        result = UserContributionsCollectionMultiWindow.user_contributions_collection(
+            raw_data, {"user": {"w0": window(1, 1)}})
+        assert result["commit"] == 16 and result["issue"] == 2, "The windows of every batch should be summed."
+        assert UserContributionsCollectionMultiWindow.user_contributions_collection()["commit"] == 0
+
+    def test_multi_window_cache_ttl(self):
+        closed = UserContributionsCollectionMultiWindow([("2020-01-01T00:00:00Z", "2021-01-01T00:00:00Z")])
+        assert closed.cache_ttl({"user": "octocat"}) is None, "Windows that ended should be cached forever."
+        current = UserContributionsCollectionMultiWindow([("2020-01-01T00:00:00Z", "2021-01-01T00:00:00Z"),
+                                                          ("2021-01-01T00:00:00Z", "2999-01-01T00:00:00Z")])
+        assert current.cache_ttl({"user": "octocat"}) == UserContributionsCollectionMultiWindow.SHORT_CACHE_TTL
+
+    def test_multi_window_batches(self):
+        windows = [("2020-01-01T00:00:00Z", "2021-01-01T00:00:00Z"), ("2021-01-01T00:00:00Z", "2022-01-01T00:00:00Z"),
+                   ("2022-01-01T00:00:00Z", "2999-01-01T00:00:00Z")]
+        assert UserContributionsCollectionMultiWindow.batches(windows) == [windows[:2], windows[2:]], \
+            "The closed windows should be sent apart from the open one."
+        for batch, ttl in zip(UserContributionsCollectionMultiWindow.batches(windows),
+                              (None, UserContributionsCollectionMultiWindow.SHORT_CACHE_TTL)):
+            assert UserContributionsCollectionMultiWindow(batch).cache_ttl({"user": "octocat"}) == ttl
+        assert UserContributionsCollectionMultiWindow.batches(windows[:2]) == [windows[:2]]
+        assert UserContributionsCollectionMultiWindow.batches([]) == []
@@ -0,0 +1,50 @@
+import threading
+import numpy as np
+from backend.app.services.github_query.utils.checkpoint_store import CheckpointStore
+
+
+class TestCheckpointStore:
+    def test_progress(self, tmp_path):
+        """Test that the latest state of every stream is kept across connections."""
+        path = str(tmp_path / "checkpoint.sqlite3")
+        store = CheckpointStore(path)
+        store.save_progress("alice", "gists", {"cursor": "c1", "count": 100, "done": False})
+        store.save_progress("alice", "gists", {"cursor": "c2", "count": 150, "done": True})
+        store.save_progress("alice", "span", {"start": "2020-01-01T00:00:00Z", "end": "2024-01-01T00:00:00Z"})
+        store.close()
+
+        store = CheckpointStore(path)
+        assert store.progress("alice") == {"gists": {"cursor": "c2", "count": 150, "done": True},
+                                           "span": {"start": "2020-01-01T00:00:00Z", "end": "2024-01-01T00:00:00Z"}}
+        assert store.progress("bob") == {}
+
+    def test_complete(self):
+        """Test that completing an entity journals its results and drops its progress."""
+        store = CheckpointStore(":memory:")
+        store.save_progress("alice", "gists", {"cursor": "c1", "count": 100, "done": False})
+        assert store.completed("alice") is None
+        store.complete("alice", {"row": {"github": "alice", "gists": np.int64(3)}})
+        assert store.completed("alice") == {"row": {"github": "alice", "gists": 3}}
+        assert store.progress("alice") == {}
+
+    def test_concurrent_connections(self, tmp_path):
+        """Test that connections writing to the same file concurrently wait for each other."""
+        path = str(tmp_path / "checkpoint.sqlite3")
+        stores = [CheckpointStore(path) for _ in range(4)]
+        assert stores[0]._connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        def write(index, store):
+            for page in range(50):
+                store.save_progress(f"user{index}", "gists", {"cursor": f"c{page}", "count": page, "done": False})
+            store.complete(f"user{index}", {"row": {"github": f"user{index}"}})
+
+        threads = [threading.Thread(target=write, args=(index, store)) for index, store in enumerate(stores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for store in stores:
+            store.close()
+        store = CheckpointStore(path)
+        assert [store.completed(f"user{index}") for index in range(4)] == \
+            [{"row": {"github": f"user{index}"}} for index in range(4)]
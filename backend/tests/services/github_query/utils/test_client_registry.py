@@ -0,0 +1,41 @@
+from backend.app.services.github_query.utils import client_registry
+from backend.app.services.github_query.utils.client_registry import ClientRegistry
+
+
+class FakeClient:
+    def __init__(self, token):
+        self.token = token
+
+
+class TestClientRegistry:
+    def test_reuse(self):
+        """Test that the client of a token is built once and reused."""
+        registry = ClientRegistry(FakeClient)
+        assert registry.get("token_a") is registry.get("token_a")
+        assert registry.get("token_b").token == "token_b"
+        assert len(registry) == 2
+
+    def test_least_recently_used_eviction(self):
+        """Test that the least recently used client is dropped once the registry is full."""
+        evicted = []
+        registry = ClientRegistry(FakeClient, max_size=2, on_evict=evicted.append)
+        client_a = registry.get("token_a")
+        registry.get("token_b")
+        registry.get("token_a")
+        registry.get("token_c")
+        assert [client.token for client in evicted] == ["token_b"]
+        assert registry.get("token_a") is client_a
+
+    def test_idle_eviction(self, monkeypatch):
+        """Test that clients unused for longer than the idle timeout are dropped."""
+        now = [0.0]
+        monkeypatch.setattr(client_registry.time, "monotonic", lambda: now[0])
+        evicted = []
+        registry = ClientRegistry(FakeClient, idle_timeout=60, on_evict=evicted.append)
+        registry.get("token_a")
+        now[0] = 30
+        registry.get("token_b")
+        now[0] = 61
+        registry.get("token_b")
+        assert [client.token for client in evicted] == ["token_a"]
+        assert len(registry) == 1
@@ -0,0 +1,72 @@
+import threading
+import time
+from backend.app.services.github_query.utils.identity_cache import UserIdentityCache
+
+
+class FakeClient:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.batches = []
+        self.viewer_requests = 0
+        self.lock = threading.Lock()
+
+    def execute_batch(self, query, substitutions):
+        with self.lock:
+            self.batches.append([substitution["user"] for substitution in substitutions])
+        time.sleep(self.delay)
+        return [None if substitution["user"] == "ghost" else
+                {"user": {"login": substitution["user"], "id": substitution["user"] + "_id",
+                          "createdAt": "2020-01-01T00:00:00Z"}}
+                for substitution in substitutions]
+
+    def execute(self, query, substitutions):
+        self.viewer_requests += 1
+        return {"viewer": {"login": "octocat"}}
+
+
+class TestUserIdentityCache:
+    def test_resolve(self):
+        """Test that only the misses are resolved, in one batch, and that unknown logins are cached too."""
+        cache = UserIdentityCache()
+        client = FakeClient()
+        identities = cache.resolve(client, ["alice", "bob", "ghost", "alice"])
+        assert identities["alice"]["id"] == "alice_id"
+        assert identities["ghost"] is None
+        assert sorted(client.batches[0]) == ["alice", "bob", "ghost"]
+
+        identities = cache.resolve(client, ["Alice", "ghost", "carol"])
+        assert identities["Alice"]["id"] == "alice_id"
+        assert client.batches[1:] == [["carol"]]
+        assert cache.get(client, "bob")["createdAt"] == "2020-01-01T00:00:00Z"
+        assert len(client.batches) == 2
+
+    def test_ttl(self):
+        """Test that expired identities are resolved again."""
+        cache = UserIdentityCache(ttl=0)
+        client = FakeClient()
+        cache.get(client, "alice")
+        cache.get(client, "alice")
+        assert client.batches == [["alice"], ["alice"]]
+
+    def test_concurrent_misses(self):
+        """Test that a login being resolved by a thread is not requested again by another one."""
+        cache = UserIdentityCache()
+        client = FakeClient(delay=0.1)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get(client, "alice"))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert client.batches == [["alice"]]
+        assert [result["id"] for result in results] == ["alice_id"] * 4
+
+    def test_viewer(self):
+        """Test that the login of a token is only queried once."""
+        cache = UserIdentityCache()
+        client = FakeClient()
+        assert cache.viewer(client, "token") == "octocat"
+        assert cache.viewer(client, "token") == "octocat"
+        assert client.viewer_requests == 1
+        cache.viewer(client, "another token")
+        assert client.viewer_requests == 2
@@ -0,0 +1,87 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from backend.app.services.github_query.miners.repository_contributors_contribution_miner import \
+    RepositoryContributorsContributionMiner
+from backend.app.services.github_query.miners.student_metric_stats_miner import UserMetricStatsMiner
+from backend.app.services.github_query.utils.parquet_sink import ParquetSink
+from backend.app.services.github_query.utils.row_buffer import RowBuffer
+
+
+def miner_schema():
+    return ParquetSink.schema(UserMetricStatsMiner.COLUMNS, UserMetricStatsMiner.DTYPES,
+                              UserMetricStatsMiner.MAP_COLUMNS)
+
+
+class TestParquetSink:
+    def test_schema(self):
+        """Test that counts, language maps and the other columns get fixed types."""
+        schema = miner_schema()
+        assert schema.names == UserMetricStatsMiner.COLUMNS
+        assert schema.field('Atotal_count').type == pa.int64()
+        assert schema.field('type_A_lang').type == pa.map_(pa.string(), pa.int64())
+        assert schema.field('end_at').type == pa.string()
+
+    def test_write(self, tmp_path):
+        """Test that flushed chunks are streamed to a file with the fixed schema."""
+        buffer = RowBuffer(UserMetricStatsMiner.COLUMNS, UserMetricStatsMiner.DTYPES)
+        sink = ParquetSink(str(tmp_path), "users", miner_schema())
+        buffer.append({'github': 'alice', 'end_at': '2024-01-01T00:00:00Z', 'Atotal_count': 2,
+                       'type_A_lang': {'Python': 100, 'C': 20}})
+        buffer.flush(sink)
+        buffer.append({'github': 'bob', 'created_at': "Do Not Exist", 'end_at': "Unknown exception"})
+        buffer.flush(sink)
+        sink.close()
+
+        assert len(sink.files) == 1
+        table = pq.read_table(sink.files[0])
+        assert table.schema.equals(miner_schema())
+        rows = table.to_pylist()
+        assert [row['github'] for row in rows] == ['alice', 'bob']
+        assert rows[0]['Atotal_count'] == 2 and rows[1]['Atotal_count'] is None
+        assert sorted(rows[0]['type_A_lang']) == [('C', 20), ('Python', 100)]
+        assert pq.ParquetFile(sink.files[0]).num_row_groups == 2
+
+    def test_rotation(self, tmp_path):
+        """Test that a new file is started once the current one reaches the size limit."""
+        schema = ParquetSink.schema(['login', 'commits'], {'commits': "Int64"})
+        sink = ParquetSink(str(tmp_path), "commits", schema, max_file_bytes=1)
+        buffer = RowBuffer(['login', 'commits'], {'commits': "Int64"})
+        for index in range(3):
+            buffer.append({'login': f"user{index}", 'commits': index})
+            buffer.flush(sink)
+        sink.close()
+
+        assert [path.rsplit("/", 1)[-1] for path in sink.files] == \
+               ["commits-00000.parquet", "commits-00001.parquet", "commits-00002.parquet"]
+        table = pq.read_table(str(tmp_path))
+        assert table.column_names == ['login', 'commits']
+        assert sorted(table.column('commits').to_pylist()) == [0, 1, 2]
+
+    def test_unknown_columns(self, tmp_path):
+        """Test that chunks holding columns outside the schema are refused instead of losing them."""
+        sink = ParquetSink(str(tmp_path), "commits", ParquetSink.schema(['login', 'commits'], {'commits': "Int64"}))
+        buffer = RowBuffer(['login', 'commits'], {'commits': "Int64"})
+        buffer.append({'login': "alice", 'commits': 1, 'total_additions': 3})
+        with pytest.raises(ValueError, match="total_additions"):
+            buffer.flush(sink)
+        sink.close()
+
+    def test_contribution_rows(self, tmp_path):
+        """Test that the rows of the contribution miner fit the schema built from its columns."""
+        miner = RepositoryContributorsContributionMiner(client=None)
+        miner._cumulated_contribution.append({'repo': 'repo', 'login': 'alice', 'total_commits': 2,
+                                              'total_additions': 5, 'total_deletions': 1})
+        cumulated = ParquetSink(str(tmp_path), "cumulated", ParquetSink.schema(
+            RepositoryContributorsContributionMiner.CUMULATED_COLUMNS,
+            RepositoryContributorsContributionMiner.CUMULATED_DTYPES))
+        individual = ParquetSink(str(tmp_path), "individual", ParquetSink.schema(
+            RepositoryContributorsContributionMiner.INDIVIDUAL_COLUMNS,
+            RepositoryContributorsContributionMiner.INDIVIDUAL_DTYPES))
+        miner.flush(cumulated, individual)
+        cumulated.close()
+        individual.close()
+
+        rows = pq.read_table(cumulated.files[0]).to_pylist()
+        assert rows == [{'repo': 'repo', 'login': 'alice', 'total_commits': 2, 'total_additions': 5,
+                         'total_deletions': 1}]
@@ -0,0 +1,59 @@
+import pandas as pd
+from backend.app.services.github_query.utils.row_buffer import RowBuffer
+
+
+class TestRowBuffer:
+    def test_to_frame(self):
+        """Test that appended rows are materialized with their dtypes and missing values."""
+        buffer = RowBuffer(['login', 'commits', 'langs'], {'commits': "Int64"})
+        buffer.append({'login': 'alice', 'commits': 3, 'langs': {'Python': 10}})
+        buffer.append({'login': 'bob'})
+        frame = buffer.to_frame()
+        assert list(frame.columns) == ['login', 'commits', 'langs']
+        assert str(frame['commits'].dtype) == "Int64"
+        assert frame['commits'].tolist() == [3, pd.NA]
+        assert frame['langs'][0] == {'Python': 10}
+        assert len(buffer) == 2
+
+    def test_frame_is_cached_until_append(self):
+        """Test that the frame is only rebuilt after new rows arrive."""
+        buffer = RowBuffer(['login'])
+        buffer.append({'login': 'alice'})
+        frame = buffer.to_frame()
+        assert buffer.to_frame() is frame
+        buffer.append({'login': 'bob'})
+        assert buffer.to_frame()['login'].tolist() == ['alice', 'bob']
+
+    def test_new_columns(self):
+        """Test that unknown columns are added and back-filled."""
+        buffer = RowBuffer(['login'])
+        buffer.append({'login': 'alice'})
+        buffer.append({'login': 'bob', 'extra': 1})
+        assert buffer.to_frame()['extra'].isna().tolist() == [True, False]
+
+    def test_mismatching_dtype(self):
+        """Test that a value that does not fit the dtype keeps the column as objects."""
+        buffer = RowBuffer(['end_at'], {'end_at': "Int64"})
+        buffer.extend([{'end_at': 1}, {'end_at': "Unknown exception"}])
+        assert buffer.to_frame()['end_at'].tolist() == [1, "Unknown exception"]
+
+    def test_flush(self, tmp_path):
+        """Test that flushed chunks are appended to a single CSV file and released."""
+        path = str(tmp_path / "rows.csv")
+        buffer = RowBuffer(['login', 'commits'], {'commits': "Int64"})
+        buffer.append({'login': 'alice', 'commits': 1})
+        buffer.flush(path)
+        assert len(buffer) == 0
+        buffer.append({'login': 'bob', 'commits': 2})
+        buffer.flush(path)
+        assert buffer.flushed_rows == 2
+        assert pd.read_csv(path).to_dict('records') == [{'login': 'alice', 'commits': 1},
+                                                         {'login': 'bob', 'commits': 2}]
+
+    def test_merge(self):
+        """Test that the rows of another buffer are appended."""
+        first, second = RowBuffer(['login']), RowBuffer(['login'])
+        first.append({'login': 'alice'})
+        second.append({'login': 'bob'})
+        first.merge(second)
+        assert first.to_frame()['login'].tolist() == ['alice', 'bob']
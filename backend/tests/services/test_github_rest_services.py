@@ -0,0 +1,162 @@
+import json
+import pytest
+from flask import Flask, session
+from requests import Response
+from backend.app.services import github_rest_services
+from backend.app.services.github_rest_services import Http
+from backend.app.services.github_query.github_rest.conditional_cache import ConditionalRequestCache
+
+
+def make_response(url, body, status_code=200, headers=None):
+    response = Response()
+    response.url = url
+    response.status_code = status_code
+    response._content = json.dumps(body).encode()
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession:
+    """Answers GET requests from a handler, recording every requested URL and its headers."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+
+    def get(self, url, headers):
+        self.requests.append((url, headers))
+        return self.handler(url, headers)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(Http, "_cache", ConditionalRequestCache())
+    app = Flask(__name__)
+    app.secret_key = "test"
+    with app.test_request_context():
+        session["access_token"] = "token"
+        yield app
+
+
+def use_session(monkeypatch, handler):
+    fake = FakeSession(handler)
+    monkeypatch.setattr(Http, "_session", fake)
+    return fake
+
+
+def contributions_handler(viewer):
+    def handler(url, headers):
+        path = url.replace(Http.BASE_URL, "").split("?")[0]
+        if path == "/users/alice":
+            return make_response(url, {"login": "alice", "repos_url": f"{Http.BASE_URL}/users/alice/repos",
+                                       "public_repos": 1})
+        if path == "/user":
+            return make_response(url, {"login": viewer})
+        if path == "/users/alice/repos" and "type=all" not in url:
+            return make_response(url, [{"name": "repo"}])
+        if path == "/users/alice/repos":
+            # the public repository of the user and a public repository the user is a member of
+            return make_response(url, [{"name": "repo", "private": False}, {"name": "other", "private": False}])
+        if path == "/user/repos":
+            return make_response(url, [{}], headers={
+                "Link": f'<{Http.BASE_URL}/user/repos?visibility=private&per_page=1&page=3>; rel="last"'})
+        return make_response(url, [])
+    return handler
+
+
+class TestGetUserContributions:
+    def test_private_repositories_of_own_token(self, app, monkeypatch):
+        """Test that the private repositories are counted with the user's own token."""
+        use_session(monkeypatch, contributions_handler("Alice"))
+        res = github_rest_services.get_user_contributions(
+            "alice", '"2024-01-01T00:00:00+00:00"', '"2024-12-31T00:00:00+00:00"').get_json()
+        assert res["repository"] == 2
+        assert res["res_con"] == 3
+
+    def test_private_repositories_of_other_token(self, app, monkeypatch):
+        """Test that repositories the user is a member of are not counted as private."""
+        use_session(monkeypatch, contributions_handler("bob"))
+        res = github_rest_services.get_user_contributions(
+            "alice", '"2024-01-01T00:00:00+00:00"', '"2024-12-31T00:00:00+00:00"').get_json()
+        assert res["repository"] == 2
+        assert res["res_con"] == 0
+
+
+def page(url, items, next_page=None, last_page=None, etag=None):
+    links = []
+    if next_page:
+        links.append(f'<{next_page}>; rel="next"')
+    if last_page:
+        links.append(f'<{last_page}>; rel="last"')
+    headers = {"Link": ", ".join(links)} if links else {}
+    if etag:
+        headers["ETag"] = etag
+    return make_response(url, items, headers=headers)
+
+
+class TestHttp:
+    def test_pool_covers_prefetchers(self):
+        """Test that the pool keeps a connection for every worker and prefetcher of aggregate_all."""
+        adapter = Http._session.get_adapter(Http.BASE_URL)
+        assert adapter._pool_maxsize >= 2 * Http.MAX_CONCURRENT_REQUESTS
+
+    def test_paginate(self, app, monkeypatch):
+        """Test that the rel="next" links are followed until the last page."""
+        pages = {
+            f"{Http.BASE_URL}/user/starred?per_page=2": page("", [1, 2], f"{Http.BASE_URL}/user/starred?page=2"),
+            f"{Http.BASE_URL}/user/starred?page=2": page("", [3, 4], f"{Http.BASE_URL}/user/starred?page=3"),
+            f"{Http.BASE_URL}/user/starred?page=3": page("", [5]),
+        }
+        fake = use_session(monkeypatch, lambda url, headers: pages[url])
+        assert list(Http.paginate("/user/starred", per_page=2)) == [1, 2, 3, 4, 5]
+        assert [url for url, _ in fake.requests] == list(pages)
+
+    def test_paginate_error(self, app, monkeypatch):
+        """Test that a page that cannot be fetched raises its error."""
+        use_session(monkeypatch, lambda url, headers: make_response(url, {"message": "Not Found"}, 404))
+        with pytest.raises(Exception, match="Not Found"):
+            list(Http.paginate("/users/ghost/repos"))
+
+    def test_paginate_from_cache(self, app, monkeypatch):
+        """Test that pages answered with 304 Not Modified are served from the cache, links included."""
+        def handler(url, headers):
+            if "If-None-Match" in headers:
+                return make_response(url, None, 304)
+            if "page=2" in url:
+                return page(url, [3], etag='"b"')
+            return page(url, [1, 2], next_page=f"{Http.BASE_URL}/user/subscriptions?page=2", etag='"a"')
+
+        fake = use_session(monkeypatch, handler)
+        assert list(Http.paginate("/user/subscriptions")) == [1, 2, 3]
+        assert list(Http.paginate("/user/subscriptions")) == [1, 2, 3]
+        assert [headers.get("If-None-Match") for _, headers in fake.requests] == [None, None, '"a"', '"b"']
+
+    def test_count(self, app, monkeypatch):
+        """Test that the page number of the rel="last" link is the number of items."""
+        fake = use_session(monkeypatch, lambda url, headers: page(
+            url, [1], next_page=f"{Http.BASE_URL}/user/starred?per_page=1&page=2",
+            last_page=f"{Http.BASE_URL}/user/starred?per_page=1&page=42"))
+        assert Http.count("/user/starred") == 42
+        assert [url for url, _ in fake.requests] == [f"{Http.BASE_URL}/user/starred?per_page=1"]
+
+    def test_count_single_page(self, app, monkeypatch):
+        """Test that endpoints without a rel="last" link hold the items of their only page."""
+        use_session(monkeypatch, lambda url, headers: page(url, [1] if "alice" in url else []))
+        assert Http.count("/users/alice/starred") == 1
+        assert Http.count("/users/bob/starred") == 0
+        assert Http.count_all(["/users/alice/starred", "/users/bob/starred"]) == [1, 0]
+
+    def test_aggregate_all(self, app, monkeypatch):
+        """Test that every endpoint is aggregated with its own function, in order."""
+        def handler(url, headers):
+            if "gists" in url and "page=2" not in url:
+                return page(url, [{"comments": 1}], next_page=f"{Http.BASE_URL}/users/alice/gists?page=2")
+            if "gists" in url:
+                return page(url, [{"comments": 2}])
+            return page(url, [{}, {}, {}])
+
+        fake = use_session(monkeypatch, handler)
+        results = Http.aggregate_all([("/users/alice/gists", github_rest_services.count_with_comments),
+                                      ("/users/alice/projects", lambda items: sum(1 for _ in items))])
+        assert results == [(2, 3), 3]
+        assert all(headers["Authorization"] == "Bearer token" for _, headers in fake.requests)